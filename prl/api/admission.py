@@ -0,0 +1,144 @@
+"""Admission control for the API worker.
+
+Every worker admits a bounded number of requests at once. Requests of tables that are
+already playing (/step, /reset, ...) are critical, they may use the whole budget and are
+woken first. Bulk requests (/environment/configure*, /tournament/create) and long-running coaching
+requests (/equity, /rollout) may only use a share of the budget and never overtake waiting critical requests. When the wait queue of a priority is full, or a
+request waited too long, it is answered right away with `503` and a `Retry-After` header.
+"""
+import asyncio
+from collections import deque
+
+from starlette.responses import JSONResponse
+
+CRITICAL = 0
+BULK = 1
+PRIORITY_NAMES = ('critical', 'bulk')
+
+MAX_IN_FLIGHT = 64
+BULK_SHARE = 0.5
+MAX_QUEUE = 256
+QUEUE_TIMEOUT = 1.0  # seconds
+RETRY_AFTER = 1  # seconds
+
+BULK_PREFIXES = ('/environment/configure', '/tournament/create')
+# simulations, that hold their slot for up to MAX_N_SAMPLES or MAX_ROLLOUTS
+BULK_SUFFIXES = ('/equity', '/rollout')
+# long-lived streams and diagnostics must not hold or wait for a slot
+EXEMPT_PREFIXES = ('/admin',)
+EXEMPT_SUFFIXES = ('/spectate',)
+
+
+def get_priority(path: str):
+    """Returns priority of a request path, None for requests that bypass admission control."""
+    if path == '/' or path.startswith(EXEMPT_PREFIXES) or path.rstrip('/').endswith(EXEMPT_SUFFIXES):
+        return None
+    if path.startswith(BULK_PREFIXES) or path.rstrip('/').endswith(BULK_SUFFIXES):
+        return BULK
+    return CRITICAL
+
+
+class AdmissionController:
+    def __init__(self,
+                 max_in_flight: int = MAX_IN_FLIGHT,
+                 bulk_share: float = BULK_SHARE,
+                 max_queue: int = MAX_QUEUE,
+                 queue_timeout: float = QUEUE_TIMEOUT,
+                 retry_after: int = RETRY_AFTER):
+        self.max_in_flight = max_in_flight
+        self.bulk_limit = max(1, int(max_in_flight * bulk_share))
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.retry_after = retry_after
+        self.in_flight = 0
+        self._waiters = (deque(), deque())
+        self.admitted = [0, 0]
+        self.rejected = [0, 0]
+        self.max_queue_depth = [0, 0]
+
+    def _can_admit(self, priority: int):
+        if priority == CRITICAL:
+            return self.in_flight < self.max_in_flight
+        return self.in_flight < self.bulk_limit and not self._waiters[CRITICAL]
+
+    def _admit(self, priority: int):
+        self.in_flight += 1
+        self.admitted[priority] += 1
+
+    async def acquire(self, priority: int) -> bool:
+        """Waits for a slot. Returns False if the request should be shed."""
+        if self._can_admit(priority):
+            self._admit(priority)
+            return True
+        waiters = self._waiters[priority]
+        if len(waiters) >= self.max_queue:
+            self.rejected[priority] += 1
+            return False
+        slot = asyncio.get_running_loop().create_future()
+        waiters.append(slot)
+        self.max_queue_depth[priority] = max(self.max_queue_depth[priority], len(waiters))
+        try:
+            await asyncio.wait_for(asyncio.shield(slot), self.queue_timeout)
+        except asyncio.TimeoutError:
+            if slot.done():
+                # slot was handed over just in time
+                return True
+            self._withdraw(priority, slot)
+            self.rejected[priority] += 1
+            return False
+        except asyncio.CancelledError:
+            if slot.done():
+                # admitted, but the request will never run and release its slot
+                self.release()
+            else:
+                self._withdraw(priority, slot)
+            raise
+        return True
+
+    def _withdraw(self, priority: int, slot: asyncio.Future):
+        """Removes a slot that is still waiting, e.g. a critical waiter no longer holds back bulk requests."""
+        self._waiters[priority].remove(slot)
+        slot.cancel()
+        self._wake()
+
+    def _wake(self):
+        for priority in (CRITICAL, BULK):
+            waiters = self._waiters[priority]
+            while waiters and self._can_admit(priority):
+                self._admit(priority)
+                waiters.popleft().set_result(None)
+
+    def release(self):
+        self.in_flight -= 1
+        self._wake()
+
+    def stats(self) -> dict:
+        return {'in_flight': self.in_flight,
+                'max_in_flight': self.max_in_flight,
+                'bulk_limit': self.bulk_limit,
+                **{name: {'queued': len(self._waiters[p]),
+                          'max_queue_depth': self.max_queue_depth[p],
+                          'admitted': self.admitted[p],
+                          'rejected': self.rejected[p]} for p, name in enumerate(PRIORITY_NAMES)}}
+
+
+class AdmissionControlMiddleware:
+    """ASGI middleware, that puts every http request through an AdmissionController."""
+
+    def __init__(self, app, controller: AdmissionController):
+        self.app = app
+        self.controller = controller
+
+    async def __call__(self, scope, receive, send):
+        priority = get_priority(scope['path']) if scope['type'] == 'http' else None
+        if priority is None:
+            return await self.app(scope, receive, send)
+        if not await self.controller.acquire(priority):
+            response = JSONResponse({'detail': 'Server overloaded, retry later.'},
+                                    status_code=503,
+                                    headers={'Retry-After': str(self.controller.retry_after)})
+            return await response(scope, receive, send)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.release()
@@ -0,0 +1,243 @@
+"""Headless agent-vs-agent arena.
+
+Plays hands between configured policies directly on the environment, without HTTP or pydantic.
+Tables are built like the tables of the API (`build_environment_from_config`) and rotate the button
+with the seat logic of /reset. Hands are split into chunks that are played on a process pool,
+each chunk with its own seed, such that results do not depend on scheduling. Every finished chunk
+is appended to an optional jsonl file, the last line holds the summary:
+
+    python -m prl.api.arena random call --n-hands 1000000 --out arena.jsonl
+
+A policy is a function `policy(obs, bounds, rng) -> (what, how_much)`, where bounds are the
+`ActionBounds` of the player to act. Policies are configured by name, see POLICIES,
+or as 'package.module:function'.
+"""
+import argparse
+import importlib
+import json
+import math
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field, asdict
+from typing import Callable, Dict, Iterator, List, Optional
+
+import numpy as np
+
+from prl.api.calls.environment.reset import assign_button_to_random_frontend_seat, \
+    move_button_to_next_available_frontend_seat, prepare_environment
+from prl.api.calls.environment.utils import get_indices_map
+from prl.api.environment_registry import build_environment_from_config
+from prl.api.hand_history import reset_seeded
+from prl.api.legal_actions import CHECK_CALL, BET_RAISE, ActionBounds, get_action_bounds
+from prl.api.session import EnvironmentSession
+
+CHUNK_SIZE = 10_000
+Z_95 = 1.96
+
+
+def random_policy(obs, bounds: ActionBounds, rng: np.random.Generator):
+    what = int(rng.choice(bounds.actions))
+    return what, bounds.min_raise if what == BET_RAISE else -1
+
+
+def call_policy(obs, bounds: ActionBounds, rng: np.random.Generator):
+    return CHECK_CALL, -1
+
+
+def min_raise_policy(obs, bounds: ActionBounds, rng: np.random.Generator):
+    if BET_RAISE in bounds.actions:
+        return BET_RAISE, bounds.min_raise
+    return CHECK_CALL, -1
+
+
+POLICIES: Dict[str, Callable] = {'random': random_policy,
+                                 'call': call_policy,
+                                 'min_raise': min_raise_policy}
+
+
+def load_policy(name: str) -> Callable:
+    """Returns the policy registered as name, or imports it from 'package.module:function'."""
+    if name in POLICIES:
+        return POLICIES[name]
+    module, _, attr = name.partition(':')
+    if not attr:
+        raise ValueError(f'Unknown policy {name}, use one of {list(POLICIES)} or package.module:function.')
+    return getattr(importlib.import_module(module), attr)
+
+
+@dataclass
+class SeatResult:
+    """Winnings of one seat, in big blinds per hand, aggregated with Welford's algorithm."""
+    n_hands: int = 0
+    mean: float = 0.
+    m2: float = 0.
+
+    def add(self, winnings_bb: float):
+        self.n_hands += 1
+        delta = winnings_bb - self.mean
+        self.mean += delta / self.n_hands
+        self.m2 += delta * (winnings_bb - self.mean)
+
+    def merge(self, other: 'SeatResult'):
+        n = self.n_hands + other.n_hands
+        if n == 0:
+            return
+        delta = other.mean - self.mean
+        self.m2 += other.m2 + delta ** 2 * self.n_hands * other.n_hands / n
+        self.mean += delta * other.n_hands / n
+        self.n_hands = n
+
+    def bb_per_100(self) -> float:
+        return self.mean * 100
+
+    def ci_95(self) -> Optional[float]:
+        """Half width of the 95% confidence interval of bb/100, None for less than two hands."""
+        if self.n_hands < 2:
+            return None
+        return Z_95 * math.sqrt(self.m2 / (self.n_hands - 1) / self.n_hands) * 100
+
+
+@dataclass
+class ArenaConfig:
+    policies: List[str]  # one per seat, seat 0 is HERO
+    starting_stack_size: int = 20000
+    n_hands: int = 100_000
+    chunk_size: int = CHUNK_SIZE
+    seed: int = 0
+    n_workers: Optional[int] = None  # defaults to the number of cpus
+
+
+@dataclass
+class Chunk:
+    index: int
+    n_hands: int
+    seed: int
+    seats: List[SeatResult] = field(default_factory=list)
+
+
+class ArenaTable:
+    """One table, reused for every chunk a worker process plays."""
+
+    def __init__(self, config: ArenaConfig):
+        self.policies = [load_policy(name) for name in config.policies]
+        self.starting_stack_size = config.starting_stack_size
+        self.session = EnvironmentSession(build_environment_from_config(
+            {'n_players': len(self.policies), 'starting_stack_size': config.starting_stack_size}))
+        self.big_blind = self.session.env.env.BIG_BLIND
+
+    def play_hand(self) -> List[float]:
+        """Plays one hand with fresh stacks and returns the winnings of each seat in chips."""
+        session = self.session
+        n_players = len(self.policies)
+        stacks = [self.starting_stack_size] * n_players
+        if session.initial_state:
+            assign_button_to_random_frontend_seat(session, stacks)
+            session.initial_state = False
+        else:
+            move_button_to_next_available_frontend_seat(session, stacks)
+        mapped_indices = get_indices_map(stacks=stacks, new_btn_seat_frontend=session.button_index)
+        session.mapped_indices = mapped_indices
+        env = prepare_environment(session, n_players, stacks)
+        obs, _, done, _ = reset_seeded(env, session.start_hand(n_players, stacks))
+        while not done:
+            pid = env.env.current_player.seat_id
+            policy = self.policies[mapped_indices[pid]]
+            obs, _, done, _ = env.step(policy(obs, get_action_bounds(env.env), session.rng))
+        winnings = [0.] * n_players
+        for pid, seat in enumerate(env.env.seats):
+            winnings[mapped_indices[pid]] = seat.stack - self.starting_stack_size
+        return winnings
+
+    def play_chunk(self, chunk: Chunk) -> Chunk:
+        self.session.rng = np.random.default_rng(chunk.seed)
+        self.session.initial_state = True
+        seats = [SeatResult() for _ in self.policies]
+        for _ in range(chunk.n_hands):
+            for seat, chips in zip(seats, self.play_hand()):
+                seat.add(chips / self.big_blind)
+        chunk.seats = seats
+        return chunk
+
+
+# worker process state, the table is built once per process
+_table: Optional[ArenaTable] = None
+
+
+def _init_worker(config: ArenaConfig):
+    global _table
+    _table = ArenaTable(config)
+
+
+def _play_chunk(chunk: Chunk) -> Chunk:
+    return _table.play_chunk(chunk)
+
+
+def make_chunks(config: ArenaConfig) -> List[Chunk]:
+    n_chunks = max(1, math.ceil(config.n_hands / config.chunk_size))
+    seeds = np.random.SeedSequence(config.seed).spawn(n_chunks)
+    sizes = [config.chunk_size] * (n_chunks - 1) + [config.n_hands - config.chunk_size * (n_chunks - 1)]
+    return [Chunk(index=i, n_hands=n, seed=int(s.generate_state(1)[0])) for i, (n, s) in enumerate(zip(sizes, seeds))]
+
+
+def summarize(config: ArenaConfig, seats: List[SeatResult]) -> dict:
+    return {'n_hands': seats[0].n_hands,
+            'seats': [{'seat': i,
+                       'policy': name,
+                       'bb_per_100': seat.bb_per_100(),
+                       'ci_95': seat.ci_95()} for i, (name, seat) in enumerate(zip(config.policies, seats))]}
+
+
+def iter_arena(config: ArenaConfig) -> Iterator[Chunk]:
+    """Plays all chunks of config on a process pool and yields them in order."""
+    # not forked, the arena may run inside the API process, which runs threads
+    with ProcessPoolExecutor(max_workers=config.n_workers or os.cpu_count(),
+                             mp_context=multiprocessing.get_context('forkserver'),
+                             initializer=_init_worker,
+                             initargs=(config,)) as pool:
+        yield from pool.map(_play_chunk, make_chunks(config))
+
+
+def run_arena(config: ArenaConfig, out_path: Optional[str] = None) -> dict:
+    """Plays config.n_hands and returns the summary. If out_path is given,
+    one line per finished chunk and the summary are appended to it."""
+    totals = [SeatResult() for _ in config.policies]
+    out = open(out_path, 'a') if out_path else None
+    try:
+        for chunk in iter_arena(config):
+            for total, seat in zip(totals, chunk.seats):
+                total.merge(seat)
+            if out:
+                out.write(json.dumps(asdict(chunk)) + '\n')
+                out.flush()
+        summary = summarize(config, totals)
+        if out:
+            out.write(json.dumps({'summary': summary}) + '\n')
+    finally:
+        if out:
+            out.close()
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Plays hands between policies, one per seat starting at HERO.')
+    parser.add_argument('policies', nargs='+')
+    parser.add_argument('--n-hands', type=int, default=100_000)
+    parser.add_argument('--starting-stack-size', type=int, default=20000)
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--out', default=None)
+    args = parser.parse_args()
+    config = ArenaConfig(policies=args.policies,
+                         starting_stack_size=args.starting_stack_size,
+                         n_hands=args.n_hands,
+                         chunk_size=args.chunk_size,
+                         seed=args.seed,
+                         n_workers=args.workers)
+    for seat in run_arena(config, args.out)['seats']:
+        print(f"seat {seat['seat']} {seat['policy']}: {seat['bb_per_100']:.2f} +- {seat['ci_95']} bb/100")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,11 @@
+from fastapi import APIRouter
+from starlette.requests import Request
+
+router = APIRouter()
+
+
+@router.get("/admin/admission",
+            operation_id="get_admission_stats")
+async def get_admission_stats(request: Request):
+    """In-flight requests, queue depths and admitted/rejected counts per priority of this worker."""
+    return request.app.admission.stats()
@@ -0,0 +1,34 @@
+import asyncio
+
+from fastapi import APIRouter, HTTPException
+from starlette.concurrency import run_in_threadpool
+
+from prl.api.arena import ArenaConfig, POLICIES, run_arena
+from prl.api.model.arena import ArenaRequestBody, ArenaSummary
+
+router = APIRouter()
+MAX_ARENA_HANDS = 1_000_000
+_running = asyncio.Lock()
+
+
+@router.post("/admin/arena",
+             response_model=ArenaSummary,
+             operation_id="run_arena")
+async def run_arena_endpoint(body: ArenaRequestBody):
+    """Plays hands between registered policies on a process pool and returns bb/100 per seat.
+    For longer runs or custom policies, use `python -m prl.api.arena`. Only one arena runs at a time."""
+    unknown = [name for name in body.policies if name not in POLICIES]
+    if unknown:
+        raise HTTPException(status_code=422, detail=f'Unknown policies {unknown}, use one of {list(POLICIES)}.')
+    if not 2 <= len(body.policies) <= 6:
+        raise HTTPException(status_code=422, detail='Provide between 2 and 6 policies.')
+    if not 0 < body.n_hands <= MAX_ARENA_HANDS:
+        raise HTTPException(status_code=422, detail=f'n_hands must be in (0, {MAX_ARENA_HANDS}].')
+    if _running.locked():
+        raise HTTPException(status_code=409, detail='An arena is already running.')
+    async with _running:
+        config = ArenaConfig(policies=body.policies,
+                             starting_stack_size=body.starting_stack_size,
+                             n_hands=body.n_hands,
+                             seed=body.seed)
+        return await run_in_threadpool(run_arena, config)
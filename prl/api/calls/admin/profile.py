@@ -0,0 +1,36 @@
+import asyncio
+
+from fastapi import APIRouter, HTTPException
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse
+
+from prl.api.profiler import sample_stacks, collapse
+
+router = APIRouter()
+MAX_PROFILE_SECONDS = 60
+_profiling = asyncio.Lock()
+
+
+@router.get("/admin/profile",
+            response_class=PlainTextResponse,
+            operation_id="profile_worker")
+async def profile_worker(seconds: float = 5, interval_ms: float = 5):
+    """Samples the call stacks of this worker for the given number of seconds.
+    Returns collapsed stacks, e.g. for `flamegraph.pl`. Only one profile runs at a time."""
+    if not 0 < seconds <= MAX_PROFILE_SECONDS:
+        raise HTTPException(status_code=422, detail=f'seconds must be in (0, {MAX_PROFILE_SECONDS}].')
+    if _profiling.locked():
+        raise HTTPException(status_code=409, detail='A profile is already running.')
+    async with _profiling:
+        # sample from a worker thread, so that the event loop keeps serving the requests we want to see
+        samples = await run_in_threadpool(sample_stacks, seconds, max(interval_ms, 1) / 1000)
+    return PlainTextResponse(collapse(samples))
+
+
+@router.get("/admin/loop",
+            operation_id="get_loop_lag")
+async def get_loop_lag(request: Request):
+    """Returns the event loop lag histogram, and the handlers that blocked the loop for longer than
+    the threshold, grouped by route and env_id and as recent events with their call stacks."""
+    return request.app.loop_monitor.summary()
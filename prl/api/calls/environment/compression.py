@@ -0,0 +1,19 @@
+from fastapi import APIRouter, HTTPException
+from starlette.responses import Response
+
+from prl.api.compression import load_dictionary
+
+router = APIRouter()
+
+
+@router.get("/environment/compression/dictionary",
+            operation_id="get_compression_dictionary")
+async def get_compression_dictionary():
+    """Returns the zstd dictionary for responses with `Content-Encoding: prl-zstd`.
+    Its id, to be sent in the `Prl-Zstd-Dictionary` request header, is in the same header of this response."""
+    dictionary = load_dictionary()
+    if dictionary is None:
+        raise HTTPException(status_code=404, detail='No compression dictionary available.')
+    return Response(content=dictionary.as_bytes(),
+                    media_type='application/octet-stream',
+                    headers={'Prl-Zstd-Dictionary': str(dictionary.dict_id())})
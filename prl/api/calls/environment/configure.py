@@ -1,12 +1,15 @@
 import logging
 
-from fastapi import APIRouter
-from prl.api.model.environment_config import EnvironmentConfig, EnvironmentConfigRequestBody
+from fastapi import APIRouter, HTTPException
+from prl.api.model.environment_config import EnvironmentConfig, EnvironmentConfigRequestBody, \
+    EnvironmentConfigBatch, EnvironmentConfigBatchRequestBody
+from starlette.concurrency import run_in_threadpool
 from starlette.requests import Request
 
 logger = logging.getLogger('configure')
 
 router = APIRouter()
+MAX_BATCH_SIZE = 1000
 
 
 @router.post("/environment/configure",
@@ -29,8 +32,36 @@ async def configure_environment(body: EnvironmentConfigRequestBody, request: Req
     print(n_players)
     print(starting_stack_size)
     config = {"n_players": n_players,
-              "starting_stack_size": starting_stack_size}
+              "starting_stack_size": starting_stack_size,
+              "seed": body.seed}
 
-    return EnvironmentConfig(env_id=request.app.backend.add_environment(config),
+    env_id = request.app.backend.add_environment(config)
+    return EnvironmentConfig(env_id=env_id,
                              num_players=n_players,
-                             starting_stack_size=starting_stack_size)
+                             starting_stack_size=starting_stack_size,
+                             seed=request.app.backend.sessions[env_id].seed)
+
+
+@router.post("/environment/configure_batch",
+             response_model=EnvironmentConfigBatch,
+             operation_id="configure_environment_batch")
+async def configure_environment_batch(body: EnvironmentConfigBatchRequestBody, request: Request):
+    """Creates one environment per config and returns all IDs in one response.
+
+    Internal: Calls backend.EnvironmentRegistry.add_environments(...),
+    which constructs the environments in parallel, off the event loop."""
+    if not 1 <= len(body.configs) <= MAX_BATCH_SIZE:
+        raise HTTPException(status_code=422, detail=f'Between 1 and {MAX_BATCH_SIZE} configs per batch.')
+    for config in body.configs:
+        if not 2 <= config.n_players <= 6:
+            raise HTTPException(status_code=422, detail='n_players must be between 2 and 6.')
+    configs = [{"n_players": c.n_players,
+                "starting_stack_size": c.starting_stack_size,
+                "seed": c.seed} for c in body.configs]
+    env_ids = await run_in_threadpool(request.app.backend.add_environments, configs)
+    sessions = request.app.backend.sessions
+    return EnvironmentConfigBatch(environments=[EnvironmentConfig(env_id=env_id,
+                                                                  num_players=c.n_players,
+                                                                  starting_stack_size=c.starting_stack_size,
+                                                                  seed=sessions[env_id].seed)
+                                                for env_id, c in zip(env_ids, body.configs)])
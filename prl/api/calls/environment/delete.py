@@ -1,4 +1,4 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, HTTPException
 from prl.api.model.environment_delete import EnvironmentDeletion
 from starlette.requests import Request
 
@@ -10,11 +10,10 @@ router = APIRouter()
             operation_id="step_environment")
 async def delete_environment(request: Request,
                              env_id: int, ):
-    del request.app.backend.active_ens[env_id]
-    success = False
-    try:
-        _ = request.app.backend.active_ens[env_id]
-    except KeyError:
-        success = True
+    session = request.app.backend.sessions.get(env_id)
+    if session is not None and session.tournament is not None:
+        raise HTTPException(status_code=409, detail='Tournament tables are deleted with their tournament.')
+    request.app.backend.remove_environment(env_id)
+    success = env_id not in request.app.backend.sessions
 
     return {'success': success}
@@ -0,0 +1,52 @@
+from fastapi import APIRouter, HTTPException
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import Request
+
+from prl.api import equity
+from prl.api.calls.environment.utils import get_session
+from prl.api.model.environment_equity import EnvironmentEquity, PlayerEquity
+from prl.api.model.environment_state import EnvironmentState
+
+router = APIRouter()
+# bounds the time a request can hold a worker thread
+MAX_N_SAMPLES = 200_000
+
+
+def get_cards(state: EnvironmentState):
+    """Returns hole cards of players that have not folded keyed by frontend seat, and dealt board cards,
+    as decoded by get_player_cards and get_board_cards."""
+    hands = {}
+    for seat, player in state.players:
+        if player is None or player.has_folded_this_episode_p:
+            continue
+        hands[player.pid] = (equity.card_id(player.c0.rank, player.c0.suit),
+                             equity.card_id(player.c1.rank, player.c1.suit))
+    board = [equity.card_id(card.rank, card.suit) for _, card in state.board if card.rank >= 0]
+    return hands, board
+
+
+@router.get("/environment/{env_id}/equity",
+            response_model=EnvironmentEquity,
+            operation_id="get_environment_equity")
+async def get_environment_equity(request: Request,
+                                 env_id: int,
+                                 n_samples: int = equity.DEFAULT_N_SAMPLES,
+                                 tolerance: float = equity.DEFAULT_TOLERANCE):
+    """Returns win and tie probabilities of all live players in the last emitted state.
+    The simulation runs in a worker thread, so it does not block other tables."""
+    if not 1 <= n_samples <= MAX_N_SAMPLES:
+        raise HTTPException(status_code=422, detail=f'n_samples must be between 1 and {MAX_N_SAMPLES}.')
+    session = get_session(request, env_id)
+    if session.last_state is None:
+        raise HTTPException(status_code=404, detail=f'Environment {env_id} has not been reset yet.')
+    hands, board = get_cards(session.last_state.full())
+    if len(hands) < 2:
+        raise HTTPException(status_code=409, detail='Equity requires at least two players that have not folded.')
+
+    seats = list(hands.keys())
+    wins, ties, n_used, method = await run_in_threadpool(equity.equity,
+                                                         list(hands.values()), board,
+                                                         n_samples=n_samples,
+                                                         tolerance=tolerance)
+    players = {seat: PlayerEquity(win=float(wins[i]), tie=float(ties[i])) for i, seat in enumerate(seats)}
+    return EnvironmentEquity(env_id=env_id, method=method, n_samples=n_used, players=players)
@@ -0,0 +1,16 @@
+from fastapi import APIRouter
+from starlette.requests import Request
+
+from prl.api.calls.environment.utils import get_session
+
+router = APIRouter()
+
+
+@router.get("/environment/{env_id}/hands",
+            operation_id="get_environment_hands")
+async def get_environment_hands(request: Request, env_id: int):
+    """Returns the most recent hands of this environment as records for `python -m prl.api.replay`,
+    oldest first. The last record is the hand currently played."""
+    session = get_session(request, env_id)
+    return {'seed': session.seed,
+            'hands': [hand.to_dict() for hand in session.hands]}
@@ -0,0 +1,27 @@
+from fastapi import APIRouter, HTTPException
+from starlette.requests import Request
+from starlette.responses import Response
+
+from prl.api.calls.environment.response import etag_matches
+from prl.api.calls.environment.utils import get_session
+
+router = APIRouter()
+
+
+@router.get("/environment/{env_id}/observation",
+            operation_id="get_environment_observation")
+async def get_environment_observation(request: Request, env_id: int):
+    """Returns the raw observation of the last state emitted by /reset or /step, as little-endian float32
+    values in the order of the environments observation keys, relative to the player to act.
+    Shares the ETag of GET /state, so it answers `If-None-Match` with 304 Not Modified as well."""
+    session = get_session(request, env_id)
+    if session.last_state is None:
+        raise HTTPException(status_code=404, detail=f'Environment {env_id} has not been reset yet.')
+
+    etag = request.app.backend.state_etag(env_id, session.state_version)
+    if etag_matches(request.headers.get('if-none-match'), etag):
+        return Response(status_code=304, headers={'ETag': etag})
+    # the only copy of the buffer, the response must not change when the table steps on
+    return Response(content=session.observation.pinned().astype('<f4', copy=False).tobytes(),
+                    media_type='application/octet-stream',
+                    headers={'ETag': etag})
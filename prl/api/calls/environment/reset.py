@@ -68,16 +68,24 @@ and translate it back for the frontend to
 """
 from __future__ import annotations
 
+from typing import Optional
+
 import numpy as np
-from fastapi import APIRouter
-from prl.environment.Wrappers.prl_wrappers import AgentObservationType
-from prl.environment.steinberger.PokerRL import NoLimitHoldem
+from fastapi import APIRouter, HTTPException
 from starlette.requests import Request
+from starlette.responses import Response
 
-from prl.api.calls.environment.utils import get_table_info, get_board_cards, get_player_stats, get_stacks, \
-    update_button_seat_frontend, get_indices_map
+from prl.api.calls.environment.response import parse_fields, build_response
+from prl.api.calls.environment.utils import get_table_info, get_board_cards, get_player_stats, get_seat_stacks, \
+    update_button_seat_frontend, get_indices_map, get_session
+from prl.api.environment_registry import build_environment, apply_starting_stacks, apply_blinds
+from prl.api.hand_history import reset_seeded
 from prl.api.model.environment_reset import EnvironmentResetRequestBody
+from prl.api.lazy_state import Lazy, LazyState
+from prl.api.legal_actions import get_legal_actions
 from prl.api.model.environment_state import EnvironmentState, Info
+from prl.api.profiler import NO_TRACE
+from prl.api.session import EnvironmentSession
 
 router = APIRouter()
 abbrevs = ['first', 'second', 'third', 'fourth', 'fifth', 'sixth']
@@ -99,23 +107,18 @@ def get_blinds(stacks: np.ndarray, button_index: int):
     return sb, bb
 
 
-def move_button_to_next_available_frontend_seat(env_id, request, stacks: list):
+def move_button_to_next_available_frontend_seat(session: EnvironmentSession, stacks: list):
     """Move button position. Skip eliminated players."""
-    old_btn_seat = request.app.backend.metadata[env_id]['button_index']
-    new_btn_seat_frontend = update_button_seat_frontend(stacks, old_btn_seat)
-    request.app.backend.metadata[env_id]['button_index'] = new_btn_seat_frontend
+    session.button_index = update_button_seat_frontend(stacks, session.button_index)
 
 
-def assign_button_to_random_frontend_seat(env_id, request, stacks: list):
+def assign_button_to_random_frontend_seat(session: EnvironmentSession, stacks: list):
     """Randomly determine first button seat position in frontend."""
     # Randomly determine first button seat position in frontend
     stacks = np.array(stacks)
     stacks[stacks == None] = 0  # [200. None 140. 800. None None]
     available_pids = np.where(stacks > 0)[0]  # [200.   0. 140. 800.   0.   0.]
-    new_btn_seat_frontend = np.random.choice(available_pids)  # pick from [0 2 3]
-
-
-    request.app.backend.metadata[env_id]['button_index'] = new_btn_seat_frontend
+    session.button_index = int(session.rng.choice(available_pids))  # pick from [0 2 3]
 
 
 def stack_sizes_valid(stacks: list):
@@ -129,55 +132,61 @@ def stack_sizes_valid(stacks: list):
     return valid
 
 
-def try_get_stacks(request, body) -> list:
+def try_get_stacks(session: EnvironmentSession, body) -> list:
     """Try loading stack sizes from request body. If these are invalid,
     tries loading stack sizes from last played hand. If this fails,
     it returns default stack size for each player."""
-    n_players = request.app.backend.active_ens[body.env_id].env.N_SEATS
-    default_stack = request.app.backend.active_ens[body.env_id].env.DEFAULT_STACK_SIZE
+    n_players = session.env.env.N_SEATS
+    default_stack = session.env.env.DEFAULT_STACK_SIZE
     stacks = [default_stack for _ in range(n_players)]
     if body.stack_sizes:
         request_stacks = list(body.stack_sizes.dict().values())
         if stack_sizes_valid(request_stacks):
             stacks = request_stacks
-        else:
-            try:
-                stacks = list(request.app.backend.metadata[body.env_id]['last_stack_sizes'].values())
-            except KeyError:
-                # no last round played
-                pass
+        elif session.last_stack_sizes is not None:
+            stacks = list(session.last_stack_sizes)
+        # else: no last round played
     return stacks
 
 
-@router.post("/environment/{env_id}/reset/",
-             response_model=EnvironmentState,
-             operation_id="reset_environment")
-async def reset_environment(body: EnvironmentResetRequestBody, request: Request):
-    # DEFAULTS
-    env_id = body.env_id
-
-    # Parse stacks from body, if invalid, try loading stacks from last round, if fails, use default
-    stacks = try_get_stacks(request, body)  # stacks relative to hero
-
+def prepare_environment(session: EnvironmentSession, n_players: int, stack_sizes_rolled: list):
+    """Returns the environment for the next hand, with rolled starting stacks and the blinds of the session applied.
+    If only stacks or button changed, the environment and its cached observation layout are reused,
+    only its starting stacks are set. When players are eliminated, the sessions environment for the new
+    number of seats is used, and only built if the session never had that many players before."""
+    session.env_shells.setdefault(session.env.env.N_SEATS, session.env)
+    env = session.env_shells.get(n_players)
+    if env is None:
+        env = build_environment(n_players, stack_sizes_rolled, session.blinds)
+        session.env_shells[n_players] = env
+    else:
+        # the observation keys only depend on the number of seats, so the layout stays valid
+        apply_starting_stacks(env, stack_sizes_rolled)
+        if session.blinds is not None:
+            apply_blinds(env, session.blinds)
+    if env is not session.env or session.layout is None:
+        session.env = env
+        session.update_layout()
+    return env
+
+
+def deal_hand(session: EnvironmentSession, env_id: int, stacks: list, trace=NO_TRACE) -> LazyState:
+    """Moves the button, deals the next hand with stacks relative to hero and emits its state.
+    Seats with a stack of 0 or None are skipped, see module docstring."""
     # 2. Move Button to next available frontend seat
-    if request.app.backend.metadata[env_id]['initial_state']:
-        assign_button_to_random_frontend_seat(env_id, request, stacks)  # stacks relative to hero
+    if session.initial_state:
+        assign_button_to_random_frontend_seat(session, stacks)  # stacks relative to hero
         # reset old stacks
-        request.app.backend.metadata[body.env_id]['last_stack_sizes'] = list()
-        request.app.backend.metadata[env_id]['initial_state'] = False
+        session.last_stack_sizes = None
+        session.initial_state = False
     else:
-        move_button_to_next_available_frontend_seat(env_id, request, stacks)  # stacks relative to hero
-    new_btn_seat_frontend = request.app.backend.metadata[env_id]['button_index']
+        move_button_to_next_available_frontend_seat(session, stacks)  # stacks relative to hero
+    new_btn_seat_frontend = session.button_index
 
     mapped_indices = get_indices_map(stacks=stacks, new_btn_seat_frontend=new_btn_seat_frontend)
 
     # 3. On un-rolled, un-trimmed stacks, apply transformation for backend
     # [None 200. None 140. 800. None]
-    # stacks_sizes = {}
-    # tmp = np.array(stacks)
-    # tmp[np.where(tmp==None)] = 0
-    # for i, s in enumerate(tmp):
-    #     stacks_sizes[f'p{i}'] = round(s)
     rolled_stack_values = np.roll(stacks, -new_btn_seat_frontend)  # [200. None 140. 800. None None]
     rolled_stack_values[np.where(rolled_stack_values == None)] = 0  # [200.   0. 140. 800.   0.   0.]
 
@@ -185,48 +194,48 @@ async def reset_environment(body: EnvironmentResetRequestBody, request: Request)
     stack_sizes_rolled = rolled_stack_values[seat_ids_with_pos_stacks]  # [200. 140. 800.]
     n_players = len(stack_sizes_rolled)  # 3
     stack_sizes_rolled = [round(s) for s in stack_sizes_rolled]  # [200 140 800]
-    request.app.backend.metadata[env_id]['mapped_indices'] = mapped_indices  # {0: 0, 1: 2, 2:3}
+    session.mapped_indices = mapped_indices  # [0, 2, 3]
 
     # Set env_args such that rolled starting stacks are used
-    args = NoLimitHoldem.ARGS_CLS(n_seats=n_players,
-                                  starting_stack_sizes_list=stack_sizes_rolled,
-                                  use_simplified_headsup_obs=False)
-    request.app.backend.active_ens[env_id].overwrite_args(args,
-                                                          agent_observation_mode=AgentObservationType.SEER,
-                                                          n_players=n_players)
-    obs_dict = request.app.backend.active_ens[env_id].obs_idx_dict
-    obs_keys = [k for k in obs_dict.keys()]
-    obs, _, _, _ = request.app.backend.active_ens[env_id].reset()
+    env = prepare_environment(session, n_players, stack_sizes_rolled)
+    deck_seed = session.start_hand(n_players, stack_sizes_rolled)
+    trace.lap('prepare_env')
+    obs, _, _, _ = reset_seeded(env, deck_seed)
+    obs = session.observation.write(obs)
+    session.legal_actions = get_legal_actions(env.env, done=False)
+    session.stats.start_hand(mapped_indices)
+    trace.lap('env_reset')
 
     # offset that moves observation from relativ to current seat to relative to hero offset
     # when we have the observation relative to hero offset, we can apply our indices map from above
     # to map to the seat ids in the frontend
-    pid_next_to_act_backend = request.app.backend.active_ens[env_id].env.current_player.seat_id
+    pid_next_to_act_backend = env.env.current_player.seat_id
     offset_current_player_to_hero = pid_next_to_act_backend
-    normalization = request.app.backend.active_ens[env_id].normalization
-    # table_info = get_table_info(obs_keys, obs, offset=offset, n_players=n_players, normalization=normalization)
-    table_info = get_table_info(obs_keys=obs_keys,
-                                obs=obs,
-                                observer_offset=offset_current_player_to_hero,
-                                normalization=normalization,
-                                map_indices=mapped_indices)
-
-    board_cards = get_board_cards(idx_board_start=obs_keys.index('0th_board_card_rank_0'),
-                                  idx_board_end=obs_keys.index('0th_player_card_0_rank_0'),
-                                  obs=obs)
-
-    player_info = get_player_stats(obs=obs,
-                                   obs_keys=obs_keys,
-                                   offset=offset_current_player_to_hero,
-                                   mapped_indices=mapped_indices,
-                                   normalization=normalization)
-
-    # small blind an big blind have been removed, need to add them back to stacks manually
-    stack_sizes = get_stacks(player_info)
-    request.app.backend.metadata[body.env_id]['last_stack_sizes'] = stack_sizes
-
-    request.app.backend.metadata[env_id]['sb'] = mapped_indices[request.app.backend.active_ens[env_id].env.SB_POS]
-    request.app.backend.metadata[env_id]['bb'] = mapped_indices[request.app.backend.active_ens[env_id].env.BB_POS]
+    layout = session.layout
+    normalization = env.normalization
+    # decoders run lazily, only for the fields that are selected or otherwise needed
+    table_info = Lazy(lambda: get_table_info(layout=layout,
+                                             obs=obs,
+                                             observer_offset=offset_current_player_to_hero,
+                                             normalization=normalization,
+                                             map_indices=mapped_indices))
+
+    board_cards = Lazy(lambda: get_board_cards(idx_board_start=layout.idx_board_start,
+                                               idx_board_end=layout.idx_board_end,
+                                               obs=obs))
+
+    player_info = Lazy(lambda: get_player_stats(obs=obs,
+                                                layout=layout,
+                                                offset=offset_current_player_to_hero,
+                                                mapped_indices=mapped_indices,
+                                                normalization=normalization))
+
+    # stacks are read from the env seats, player_info is only decoded if selected
+    stack_sizes = get_seat_stacks(env.env.seats, mapped_indices)
+    session.set_stack_sizes(stack_sizes)
+
+    session.sb = mapped_indices[env.env.SB_POS]
+    session.bb = mapped_indices[env.env.BB_POS]
     result = {'env_id': env_id,
               'n_players': n_players,
               'stack_sizes': stack_sizes,
@@ -235,15 +244,43 @@ async def reset_environment(body: EnvironmentResetRequestBody, request: Request)
               'players': player_info,
               'board': board_cards,
               'button_index': new_btn_seat_frontend,
-              'sb': request.app.backend.metadata[env_id]['sb'],
-              'bb': request.app.backend.metadata[env_id]['bb'],
+              'sb': session.sb,
+              'bb': session.bb,
               'p_acts_next': mapped_indices[0] if n_players < 4 else mapped_indices[3],
               'game_over': False,  # whole game
               'done': False,  # this hand
+              'legal_actions': session.legal_actions,
               'info': Info(**{'continue_round': True,
                               'draw_next_stage': False,
                               'rundown': False,
                               'deal_next_hand': False,
                               'payouts': None})
               }
-    return EnvironmentState(**dict(result))
+    state = LazyState(result)
+    session.emit_state(state)
+    return state
+
+
+@router.post("/environment/{env_id}/reset/",
+             response_model=EnvironmentState,
+             operation_id="reset_environment")
+async def reset_environment(body: EnvironmentResetRequestBody,
+                            request: Request,
+                            response: Response,
+                            fields: Optional[str] = None):
+    """Deals the next hand. `fields` optionally selects parts of the returned state, see /step."""
+    # DEFAULTS
+    env_id = body.env_id
+    selection = parse_fields(fields)
+    session = get_session(request, env_id)
+    if session.tournament is not None:
+        raise HTTPException(status_code=409, detail='Hands of tournament tables are dealt by the tournament.')
+    trace = session.trace or NO_TRACE
+    trace.begin()
+
+    # Parse stacks from body, if invalid, try loading stacks from last round, if fails, use default
+    stacks = try_get_stacks(session, body)  # stacks relative to hero
+
+    state = deal_hand(session, env_id, stacks, trace)
+    etag = request.app.backend.state_etag(env_id, session.state_version)
+    return build_response(state, selection, etag, response, trace)
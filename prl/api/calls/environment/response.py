@@ -0,0 +1,59 @@
+from typing import Optional
+
+from fastapi import HTTPException
+from fastapi.encoders import jsonable_encoder
+from starlette.responses import Response, JSONResponse
+
+from prl.api.lazy_state import LazyState
+from prl.api.model.environment_state import EnvironmentState
+from prl.api.profiler import NO_TRACE
+
+
+def parse_fields(fields: Optional[str]) -> Optional[dict]:
+    """Parses a selector like 'p_acts_next,table.total_to_call,stack_sizes' into
+    {'p_acts_next': None, 'table': {'total_to_call': None}, 'stack_sizes': None}.
+    None selects every field. Selecting a field as a whole overrides selections of its sub-fields."""
+    if not fields:
+        return None
+    selection = {}
+    for path in fields.split(','):
+        names = [name.strip() for name in path.split('.') if name.strip()]
+        if not names:
+            continue
+        if names[0] not in EnvironmentState.__fields__:
+            raise HTTPException(status_code=422, detail=f'Unknown field {names[0]}.')
+        node = selection
+        for i, name in enumerate(names):
+            if name in node and node[name] is None:
+                break  # already selected as a whole
+            if i == len(names) - 1:
+                node[name] = None
+            else:
+                node = node.setdefault(name, {})
+    return selection
+
+
+def etag_matches(if_none_match: str, etag: str):
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(',')]
+    return '*' in candidates or etag in candidates or f'W/{etag}' in candidates
+
+
+def build_response(state: LazyState, selection: Optional[dict], etag: str, response: Response, trace=NO_TRACE):
+    """Returns the full EnvironmentState, or a json response with only the selected fields."""
+    if selection is not None:
+        content = jsonable_encoder(state.select(selection))
+        trace.lap('decode')
+        return JSONResponse(content=content, headers={'ETag': etag})
+    state.resolve_all()
+    trace.lap('decode')
+    full = state.full()
+    trace.lap('build_state')
+    if trace is not NO_TRACE:
+        # serialize here instead of in fastapi, to measure it
+        content = full.json()
+        trace.lap('serialize')
+        return Response(content=content, media_type='application/json', headers={'ETag': etag})
+    response.headers['ETag'] = etag
+    return full
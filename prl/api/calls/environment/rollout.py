@@ -0,0 +1,50 @@
+import asyncio
+
+import numpy as np
+from fastapi import APIRouter, HTTPException
+from starlette.requests import Request
+
+from prl.api.calls.environment.utils import get_session
+from prl.api.legal_actions import validate_actions
+from prl.api.model.environment_rollout import EnvironmentRolloutRequestBody, EnvironmentRollout, ActionOutcome
+from prl.api.arena import POLICIES
+from prl.api.rollout import default_actions, snapshot, submit_rollouts, summarize
+
+router = APIRouter()
+MAX_ROLLOUTS = 100_000
+
+
+@router.post("/environment/{env_id}/rollout",
+             response_model=EnvironmentRollout,
+             operation_id="rollout_environment")
+async def rollout_environment(request: Request, env_id: int, body: EnvironmentRolloutRequestBody):
+    """Estimates the chips won per candidate action of the player to act, by playing continuations
+    from a snapshot of the current state on a process pool. The table itself is not changed."""
+    session = get_session(request, env_id)
+    if session.legal_actions is None:
+        raise HTTPException(status_code=409, detail='No hand is running, reset the environment first.')
+    if body.policy not in POLICIES:
+        raise HTTPException(status_code=422, detail=f'Unknown policy {body.policy}, use one of {list(POLICIES)}.')
+    if not 0 < body.n_rollouts <= MAX_ROLLOUTS:
+        raise HTTPException(status_code=422, detail=f'n_rollouts must be in (0, {MAX_ROLLOUTS}].')
+    actions = body.actions or default_actions(session.legal_actions)
+    for reason in validate_actions(session.legal_actions, actions):
+        if reason is not None:
+            raise HTTPException(status_code=422, detail=reason)
+    env = session.env.env
+    # read before awaiting the rollouts, the table may step on meanwhile
+    player = session.mapped_indices[env.current_player.seat_id]
+    blinds = env.SMALL_BLIND, env.BIG_BLIND
+    state = snapshot(env)
+    # not drawn from session.rng, deck seeds and button of the table must not depend on rollouts
+    seed = body.seed if body.seed is not None else int(np.random.default_rng().integers(2 ** 32))
+    futures = submit_rollouts(state, env.N_SEATS, blinds, actions, body.policy, body.n_rollouts, seed)
+    outcomes = []
+    for action, chunks in zip(actions, futures):
+        results = await asyncio.gather(*(asyncio.wrap_future(chunk) for chunk in chunks))
+        outcomes.append(ActionOutcome(action_what=action[0],
+                                      action_how_much=action[1],
+                                      **summarize(np.concatenate(results), blinds[1])))
+    return EnvironmentRollout(env_id=env_id,
+                              player=player,
+                              outcomes=outcomes)
@@ -0,0 +1,22 @@
+from fastapi import APIRouter
+from starlette.requests import Request
+from starlette.responses import StreamingResponse
+
+from prl.api.calls.environment.utils import get_session
+from prl.api.spectators import stream_frames
+
+router = APIRouter()
+
+
+@router.get("/environment/{env_id}/spectate",
+            operation_id="spectate_environment")
+async def spectate_environment(request: Request, env_id: int):
+    """Server-Sent-Events stream of the tables state with hole cards hidden.
+    Each /reset and /step of the table emits one `state` event, the latest state is sent on subscribing.
+    Idle streams get a `: keepalive` comment every 15 seconds."""
+    session = get_session(request, env_id)
+    channel = session.spectators
+    queue = channel.subscribe(session.last_state)
+    return StreamingResponse(stream_frames(channel, queue),
+                             media_type='text/event-stream',
+                             headers={'Cache-Control': 'no-cache'})
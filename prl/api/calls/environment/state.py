@@ -0,0 +1,30 @@
+from fastapi import APIRouter, HTTPException
+from starlette.requests import Request
+from starlette.responses import Response
+
+from prl.api.calls.environment.response import etag_matches
+from prl.api.calls.environment.utils import get_session
+from prl.api.model.environment_state import EnvironmentState
+
+router = APIRouter()
+
+
+@router.get("/environment/{env_id}/state",
+            response_model=EnvironmentState,
+            operation_id="get_environment_state")
+async def get_environment_state(request: Request, env_id: int):
+    """Returns the last state emitted by /reset or /step without touching the environment.
+    Responds with 304 Not Modified if the `If-None-Match` header carries the current ETag."""
+    session = get_session(request, env_id)
+    if session.last_state is None:
+        raise HTTPException(status_code=404, detail=f'Environment {env_id} has not been reset yet.')
+
+    etag = request.app.backend.state_etag(env_id, session.state_version)
+    if etag_matches(request.headers.get('if-none-match'), etag):
+        return Response(status_code=304, headers={'ETag': etag})
+    if session.state_bytes is None:
+        # serialize once per state version, subsequent requests are served from cache
+        session.state_bytes = session.last_state.full().json().encode()
+    return Response(content=session.state_bytes,
+                    media_type='application/json',
+                    headers={'ETag': etag})
@@ -0,0 +1,18 @@
+from fastapi import APIRouter
+from starlette.requests import Request
+
+from prl.api.calls.environment.utils import get_session
+from prl.api.model.environment_stats import EnvironmentStats
+
+router = APIRouter()
+
+
+@router.get("/environment/{env_id}/stats",
+            response_model=EnvironmentStats,
+            operation_id="get_environment_stats")
+async def get_environment_stats(request: Request, env_id: int):
+    """Returns VPIP, PFR, 3-bet, aggression factor and showdown win rate per seat of this environment.
+    Seats are not players, stats per player across tables are kept by tournaments, see /tournament/{id}/stats.
+    Stats are updated on every /reset and /step, reading them costs no decoding."""
+    session = get_session(request, env_id)
+    return EnvironmentStats(env_id=env_id, seats=session.stats.summary())
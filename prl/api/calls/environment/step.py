@@ -1,29 +1,53 @@
-from random import randint
+import logging
+from typing import Optional
 
 import numpy as np
-from fastapi import APIRouter
+from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 from starlette.requests import Request
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import Response
 
-from prl.api.model.environment_state import EnvironmentState, LastAction, Info
-from .utils import get_table_info, get_board_cards, get_player_stats, get_stacks
+from prl.api.idempotency import IdempotencyKeyReused
+from prl.api.lazy_state import Lazy, LazyState
+from prl.api.legal_actions import FOLD, CHECK_CALL, BET_RAISE, get_legal_actions, validate_actions
+from prl.api.model.environment_state import EnvironmentState, LastAction, Info, Rundown
+from prl.api.profiler import NO_TRACE
+from prl.api.rundown import get_rundown_streets
+from prl.api.session import EnvironmentSession
+from .response import parse_fields, build_response
+from .utils import get_table_info, get_board_cards, get_player_stats, get_seat_stacks, get_session
 
 router = APIRouter()
+logger = logging.getLogger('step')
+PREFLOP = 0  # env.current_round
+# a rundown can take at most one step per remaining street
+MAX_RUNDOWN_STEPS = 4
 
 
 class EnvironmentStepRequestBody(BaseModel):
     env_id: int
     action: int
     action_how_much: float
+    # optional client chosen key, e.g. a sequence number. Retried requests with the same key
+    # are answered with the original response instead of stepping the environment again
+    idempotency_key: Optional[str] = None
+    # if everyone is all-in after this action, deal the remaining streets within this request
+    # and return them in `EnvironmentState.rundown`, instead of waiting for further steps
+    fast_forward: bool = False
 
 
-def get_action(request, body):
-    if body.action == -1:  # query ai model, random action for now
+def request_fingerprint(body: EnvironmentStepRequestBody) -> tuple:
+    """Parts of the request that decide its outcome, a retry must repeat them exactly."""
+    return body.action, body.action_how_much, body.fast_forward
+
+
+def get_action(session: EnvironmentSession, body):
+    legal = session.legal_actions
+    if body.action == -1 and legal is not None:  # query ai model, random legal action for now
         # todo query baseline TAG agent
-        what = randint(0, 2)
-        raise_amount = -1
-        if what == 2:
-            raise_amount = max(max([p.current_bet for p in request.app.backend.active_ens[body.env_id].env.seats]), 100)
+        what = int(session.rng.choice(legal.actions))
+        raise_amount = legal.min_raise if what == BET_RAISE else -1
         action = (what, raise_amount)
     else:
         action = (body.action, body.action_how_much)
@@ -33,62 +57,90 @@ def get_action(request, body):
 @router.post("/environment/{env_id}/step",
              response_model=EnvironmentState,
              operation_id="step_environment")
-async def step_environment(body: EnvironmentStepRequestBody, request: Request):
+async def step_environment(body: EnvironmentStepRequestBody,
+                           request: Request,
+                           response: Response,
+                           fields: Optional[str] = None):
+    """Steps the environment. `fields` optionally selects parts of the returned state,
+    e.g. `fields=p_acts_next,table.total_to_call,stack_sizes`. Unselected parts are not decoded.
+    Actions that are not in the `legal_actions` of the last state are rejected with 422."""
     env_id = body.env_id
-    n_players = request.app.backend.active_ens[env_id].env.N_SEATS
-    action = get_action(request, body)
-
-    obs, a, done, info = request.app.backend.active_ens[env_id].step(action)
-    # if action was fold, but player could have checked, the environment internally changes the action
-    # if that happens, we must overwrite last action accordingly
-    mapped_indices = request.app.backend.metadata[env_id]['mapped_indices']
-    action = request.app.backend.active_ens[env_id].env.last_action  # [what, how_much, who]
+    selection = parse_fields(fields)
+    session = get_session(request, env_id)
+    if body.idempotency_key is not None:
+        try:
+            replayed = session.responses.get(body.idempotency_key, request_fingerprint(body))
+        except IdempotencyKeyReused as e:
+            raise HTTPException(status_code=422, detail=str(e))
+        if replayed is not None:
+            response.headers['Idempotent-Replayed'] = 'true'
+            return replayed
+    action = get_action(session, body)
+    reason, = validate_actions(session.legal_actions, [action])
+    if reason is not None:
+        raise HTTPException(status_code=422, detail=reason)
+    trace = session.trace or NO_TRACE
+    trace.begin()
+    env = session.env
+    n_players = env.env.N_SEATS
+    preflop = env.env.current_round == PREFLOP
+    facing_bet = FOLD in session.legal_actions.actions
+
+    obs, a, done, info = env.step(action)
+    # decoders and the hand record read this view of the sessions buffer, not the wrappers array
+    obs = session.observation.write(obs)
+    session.record_step(action, obs, done)
+    # illegal actions are rejected above, but the environment may still adjust the action,
+    # e.g. a raise to all-in below the call amount becomes a call, so last action is read back
+    mapped_indices = session.mapped_indices
+    action = env.env.last_action  # [what, how_much, who]
     action = action[0], action[1], mapped_indices[action[2]]
+    session.stats.record_action(action[2], action[0], preflop, facing_bet)
     print(f'Stepping environment with action = {action}')
 
-    pid_next_to_act_backend = request.app.backend.active_ens[env_id].env.current_player.seat_id
+    fast_forwarded = body.fast_forward and info['rundown']
+    n_rundown_steps = 0
+    while fast_forwarded and not done and n_rundown_steps < MAX_RUNDOWN_STEPS:
+        obs, a, done, info = env.step((CHECK_CALL, -1))
+        obs = session.observation.write(obs)
+        session.record_step((CHECK_CALL, -1), obs, done)
+        n_rundown_steps += 1
+    session.legal_actions = get_legal_actions(env.env, done)
+    trace.lap('env_step')
+
+    pid_next_to_act_backend = env.env.current_player.seat_id
     offset_current_player_to_hero = pid_next_to_act_backend
 
-    obs_dict = request.app.backend.active_ens[env_id].obs_idx_dict
-    obs_keys = [k for k in obs_dict.keys()]
-    normalization = request.app.backend.active_ens[env_id].normalization
-    table_info = get_table_info(obs_keys=obs_keys,
-                                obs=obs,
-                                observer_offset=offset_current_player_to_hero,
-                                normalization=normalization,
-                                map_indices=mapped_indices)
-
-    board_cards = get_board_cards(idx_board_start=obs_keys.index('0th_board_card_rank_0'),
-                                  idx_board_end=obs_keys.index('0th_player_card_0_rank_0'),
-                                  obs=obs)
-
-    player_info = get_player_stats(obs=obs,
-                                   obs_keys=obs_keys,
-                                   offset=offset_current_player_to_hero,
-                                   mapped_indices=mapped_indices,
-                                   normalization=normalization)
-    stack_sizes_rolled = get_stacks(player_info)
+    layout = session.layout
+    normalization = env.normalization
+    # decoders run lazily, only for the fields that are selected or otherwise needed
+    table_info = Lazy(lambda: get_table_info(layout=layout,
+                                             obs=obs,
+                                             observer_offset=offset_current_player_to_hero,
+                                             normalization=normalization,
+                                             map_indices=mapped_indices))
+
+    board_cards = Lazy(lambda: get_board_cards(idx_board_start=layout.idx_board_start,
+                                               idx_board_end=layout.idx_board_end,
+                                               obs=obs))
+
+    player_info = Lazy(lambda: get_player_stats(obs=obs,
+                                                layout=layout,
+                                                offset=offset_current_player_to_hero,
+                                                mapped_indices=mapped_indices,
+                                                normalization=normalization))
     payouts_rolled = {}
     print('info[payouts] = ', info['payouts'])
     for k, v in info['payouts'].items():
         pid = mapped_indices[int(k)]
         payouts_rolled[pid] = v
-
-    # when done, the observation sets the stacks to 0
-    # todo: remove last_stack_sizes entirely and replace with stacks from seats
     if done:
-        stack_sizes_rolled = request.app.backend.metadata[body.env_id]['last_stack_sizes']
-        print('STACK_SIZS BEFORE APPLYING PAYOUTS:', stack_sizes_rolled)
-        # for seat_id, (seat_pid, stack) in enumerate(stack_sizes_rolled.items()):
-        #     if seat_id in payouts_rolled:
-        #         stack_sizes_rolled[seat_pid] += payouts_rolled[seat_id]
-        #     # manually subtract last action from players stack_size, environment does not do it
-        #     if seat_id == action[2] and (action[0] != 0):
-        #         stack_sizes_rolled[seat_pid] -= action[1]
-        for i, player in enumerate(request.app.backend.active_ens[env_id].env.seats):
-            stack_sizes_rolled[f'p{mapped_indices[i]}'] = player.stack
-    request.app.backend.metadata[body.env_id]['last_stack_sizes'] = stack_sizes_rolled
-    is_game_over = len(np.where(np.array(list(stack_sizes_rolled.values())) != 0)[0]) < 2
+        session.stats.end_hand(mapped_indices, [seat.folded_this_episode for seat in env.env.seats], payouts_rolled)
+
+    # stacks are read from the seats, because when done, the observation sets the stacks to 0
+    session.set_stack_sizes(get_seat_stacks(env.env.seats, mapped_indices))
+    stack_sizes_rolled = session.stack_sizes()
+    is_game_over = len(np.where(np.array(session.last_stack_sizes) != 0)[0]) < 2
     print('done = ', done)
     print('RETURNING WITH STACK_SIZS:', stack_sizes_rolled)
     print('PASYOUS = ', payouts_rolled)
@@ -102,16 +154,35 @@ async def step_environment(body: EnvironmentStepRequestBody, request: Request):
               'table': table_info,
               'players': player_info,
               'board': board_cards,
-              'button_index': request.app.backend.metadata[env_id]['button_index'],
-              'sb': request.app.backend.metadata[env_id]['sb'],
-              'bb': request.app.backend.metadata[env_id]['bb'],
+              'button_index': session.button_index,
+              'sb': session.sb,
+              'bb': session.bb,
               'done': done,
               'game_over': is_game_over,  # less than two players remaining
               'p_acts_next': mapped_indices[pid_next_to_act_backend],
+              'legal_actions': session.legal_actions,
               'info': Info(**{'continue_round': info['continue_round'],
                               'draw_next_stage': info['draw_next_stage'],
                               'rundown': info['rundown'],
                               'deal_next_hand': info['deal_next_hand'],
                               'payouts': payouts_rolled})
               }
-    return EnvironmentState(**dict(result))
+    state = LazyState(result)
+    if fast_forwarded and session.last_state is not None:
+        result['rundown'] = Rundown(streets=get_rundown_streets(session.last_state.resolve('board'),
+                                                                state.resolve('board')),
+                                    payouts=payouts_rolled,
+                                    stack_sizes=stack_sizes_rolled)
+    session.emit_state(state)
+    etag = request.app.backend.state_etag(env_id, session.state_version)
+    step_response = build_response(state, selection, etag, response, trace)
+    if body.idempotency_key is not None:
+        session.responses.put(body.idempotency_key, step_response, request_fingerprint(body))
+    if done and session.tournament is not None:
+        # deals the next hand of this table, its state is available via /state and /spectate.
+        # the step itself succeeded, so a failing tournament must not turn its response into a 500
+        try:
+            await run_in_threadpool(session.tournament.hand_finished, env_id)
+        except Exception:
+            logger.exception(f'Tournament of table {env_id} failed to finish the hand.')
+    return step_response
@@ -0,0 +1,27 @@
+from fastapi import APIRouter
+from starlette.requests import Request
+
+from prl.api.calls.environment.utils import get_session
+from prl.api.profiler import TableTrace
+
+router = APIRouter()
+
+
+@router.post("/environment/{env_id}/trace",
+             operation_id="set_environment_trace")
+async def set_environment_trace(request: Request, env_id: int, enabled: bool = True):
+    """Enables or disables recording stage timings of /reset and /step for this environment only.
+    Enabling again discards previously recorded timings."""
+    session = get_session(request, env_id)
+    session.trace = TableTrace() if enabled else None
+    return {'env_id': env_id, 'enabled': enabled}
+
+
+@router.get("/environment/{env_id}/trace",
+            operation_id="get_environment_trace")
+async def get_environment_trace(request: Request, env_id: int):
+    """Returns count, mean, p50, p99 and max duration per stage in milliseconds."""
+    session = get_session(request, env_id)
+    return {'env_id': env_id,
+            'enabled': session.trace is not None,
+            'stages': session.trace.summary() if session.trace is not None else {}}
@@ -67,12 +67,15 @@ and translate it back for the frontend to
 }
 """
 
-import re
+from array import array
 
 import numpy as np
+from fastapi import HTTPException
 from prl.environment.steinberger.PokerRL.game import Poker
 
 from prl.api.model.environment_state import PlayerInfo, Card, Board, Table, Players
+from prl.api.observation import ObservationLayout
+from prl.api.session import EnvironmentSession
 
 MAX_PLAYERS = 6
 RANK_DICT = {
@@ -100,16 +103,24 @@ SUIT_DICT = {
 }
 
 
-def get_indices_map(stacks: list, new_btn_seat_frontend: int):
+def get_session(request, env_id: int) -> EnvironmentSession:
+    try:
+        return request.app.backend.sessions[env_id]
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f'Environment {env_id} not found.')
+
+
+def get_indices_map(stacks: list, new_btn_seat_frontend: int) -> array:
     """ Gets a list of stacks. Rolls all non-zero stacks relative to button,
-    and returns a map of the indices mapping from button-view back to the initial view"""
+    and returns a map of the indices mapping from button-view back to the initial view.
+    The map is an array indexed by backend pid, holding the frontend seat."""
     stacks = np.array(stacks)
     stacks[np.where(stacks == None)] = 0
     seat_ids_remaining_frontend = [i for i, s in enumerate(stacks) if s > 0]  # [1, 2, 5]
     roll_by = -seat_ids_remaining_frontend.index(new_btn_seat_frontend)
     rolled_seat_ids = np.roll(seat_ids_remaining_frontend, roll_by)  # [5, 1, 2]
     # mapped_indices = dict(list(zip(seat_ids_remaining_frontend, rolled_seat_ids)))
-    return dict([(pid_backend, seat_frontend) for pid_backend, seat_frontend in enumerate(rolled_seat_ids)])
+    return array('b', [int(seat_frontend) for seat_frontend in rolled_seat_ids])
 
 
 def update_button_seat_frontend(stacks: list, old_btn_seat: int):
@@ -139,47 +150,35 @@ def maybe_replace_leading_digit(val):
     return val.replace('5th', 'sixth')
 
 
-def get_player_cards(idx_start, idx_end, obs, n_suits=4, n_ranks=13):
-    cur_idx = idx_start
-    cards = {}
-    end_idx = 0
-    for i in range(2):
+def get_cards(idx_start, n_cards, obs, n_suits=4, n_ranks=13) -> list:
+    """Decodes n_cards one-hot encoded cards from a view of obs starting at idx_start."""
+    card_size = n_suits + n_ranks
+    bits = obs[idx_start:idx_start + n_cards * card_size].reshape(n_cards, card_size)
+    cards = []
+    for i, card_bits in enumerate(bits):
         suit = -127
         rank = -127
-        end_idx = cur_idx + n_suits + n_ranks
-        bits = obs[cur_idx:end_idx]
-        # print(f'obs[cur_idx:end_idx] = {obs[cur_idx:end_idx]}')
-        if sum(bits) > 0:
-            idx = np.where(bits == 1)[0]
-            rank, suit = idx[0], idx[1] - n_ranks
-
-        cards[f'c{i}'] = Card(**{'name': RANK_DICT[rank] + SUIT_DICT[suit],
-                                 'suit': suit,
-                                 'rank': rank,
-                                 'index': i})
-        cur_idx = end_idx
-    assert end_idx == idx_end
+        if card_bits.any():
+            idx = np.flatnonzero(card_bits == 1)
+            rank, suit = int(idx[0]), int(idx[1]) - n_ranks
+        cards.append(Card(name=RANK_DICT[rank] + SUIT_DICT[suit], suit=suit, rank=rank, index=i))
     return cards
 
 
-def get_player_stats(obs, obs_keys, offset, mapped_indices: dict, normalization):
-    observation_slices_per_player = []
+def get_player_cards(idx_start, idx_end, obs, n_suits=4, n_ranks=13):
+    n_cards = (idx_end - idx_start) // (n_suits + n_ranks)
+    assert n_cards == 2
+    return {f'c{i}': card for i, card in enumerate(get_cards(idx_start, n_cards, obs, n_suits, n_ranks))}
 
-    for i in range(MAX_PLAYERS):
-        start_idx = obs_keys.index(f'stack_p{i}')
-        end_idx = obs_keys.index(f'side_pot_rank_p{i}_is_5') + 1
-        observation_slices_per_player.append(slice(start_idx, end_idx))
 
+def get_player_stats(obs, layout: ObservationLayout, offset, mapped_indices: array, normalization):
     player_info = {}
-    obs_keys = [re.sub(re.compile(r'p\d'), 'p', s) for s in obs_keys]
-    for pid, frontend_seat in mapped_indices.items():
-        hand = get_player_cards(idx_start=obs_keys.index(f"{pid}th_player_card_0_rank_0"),
-                                idx_end=obs_keys.index(f"{pid}th_player_card_1_suit_3") + 1,
-                                obs=obs)
-        p_info = dict(list(zip(obs_keys, obs))[observation_slices_per_player[pid]])
+    for pid, frontend_seat in enumerate(mapped_indices):
+        hand = get_player_cards(*layout.player_cards[pid], obs=obs)
+        p_info = dict(zip(layout.player_keys, obs[layout.players[pid]].tolist()))
         p_info['stack_p'] = round(p_info['stack_p'] * normalization)
         p_info['curr_bet_p'] = round(p_info['curr_bet_p'] * normalization)
-        player_info[f'p{frontend_seat}'] = PlayerInfo(**{'pid': frontend_seat, **p_info, **dict(hand)})
+        player_info[f'p{frontend_seat}'] = PlayerInfo(**{'pid': frontend_seat, **p_info, **hand})
 
     p_info_rolled = np.roll(list(player_info.values()), offset, axis=0)
     p_info_rolled = dict(list(zip(player_info.keys(), p_info_rolled)))
@@ -188,30 +187,12 @@ def get_player_stats(obs, obs_keys, offset, mapped_indices: dict, normalization)
 
 
 def get_board_cards(idx_board_start, idx_board_end, obs, n_suits=4, n_ranks=13):
-    cur_idx = idx_board_start
-    cards = {}
-    end_idx = 0
-    for i in range(5):
-        suit = -127
-        rank = -127
-        end_idx = cur_idx + n_suits + n_ranks
-        bits = obs[cur_idx:end_idx]
-        if sum(bits) > 0:
-            idx = np.where(bits == 1)[0]
-            rank, suit = idx[0], idx[1] - n_ranks
-
-        cards[f'b{i}'] = Card(**{'name': RANK_DICT[rank] + SUIT_DICT[suit],
-                                 'suit': suit,
-                                 'rank': rank,
-                                 'index': i})
-        cur_idx = end_idx
-    # print(f'idx_board_end = {idx_board_end}')
-    # print(f'end_idx = {end_idx}')
-    assert idx_board_end == end_idx
-    return Board(**cards)
-
-
-def get_table_info(obs_keys, obs, observer_offset, normalization, map_indices):
+    assert idx_board_end - idx_board_start == 5 * (n_suits + n_ranks)
+    cards = get_cards(idx_board_start, 5, obs, n_suits, n_ranks)
+    return Board(**{f'b{i}': card for i, card in enumerate(cards)})
+
+
+def get_table_info(layout: ObservationLayout, obs, observer_offset, normalization, map_indices):
     """Observer offset is necessary to compensate for the fact,
     that the vectorized observation is not relative to hero or button, but it
     is relative to the next acting player.
@@ -230,30 +211,38 @@ def get_table_info(obs_keys, obs, observer_offset, normalization, map_indices):
     """
 
     side_pots: np.ndarray = np.zeros(MAX_PLAYERS)
-    for pid, seat in map_indices.items():
-        side_pots[seat] = obs[obs_keys.index(f'side_pot_{pid}')]
+    for pid, seat in enumerate(map_indices):
+        side_pots[seat] = obs[layout.side_pots[pid]]
     sp_keys = ['side_pot_0', 'side_pot_1', 'side_pot_2', 'side_pot_3', 'side_pot_4', 'side_pot_5']
 
     side_pots = np.roll(side_pots, observer_offset)
 
-    table = {'ante': round(obs[obs_keys.index('ante')] * normalization),
-             'small_blind': round(obs[obs_keys.index('small_blind')] * normalization),
-             'big_blind': round(obs[obs_keys.index('big_blind')] * normalization),
-             'min_raise': round(obs[obs_keys.index('min_raise')] * normalization),
-             'pot_amt': round(obs[obs_keys.index('pot_amt')] * normalization),
-             'total_to_call': round(obs[obs_keys.index('total_to_call')] * normalization),
-             'round_preflop': obs[obs_keys.index('round_preflop')],
-             'round_flop': obs[obs_keys.index('round_flop')],
-             'round_turn': obs[obs_keys.index('round_turn')],
-             'round_river': obs[obs_keys.index('round_river')],
+    values = {key: float(obs[i]) for key, i in layout.table.items()}
+    table = {'ante': round(values['ante'] * normalization),
+             'small_blind': round(values['small_blind'] * normalization),
+             'big_blind': round(values['big_blind'] * normalization),
+             'min_raise': round(values['min_raise'] * normalization),
+             'pot_amt': round(values['pot_amt'] * normalization),
+             'total_to_call': round(values['total_to_call'] * normalization),
+             'round_preflop': values['round_preflop'],
+             'round_flop': values['round_flop'],
+             'round_turn': values['round_turn'],
+             'round_river': values['round_river'],
              # side pots 0 to 5
-             **dict(list(zip(sp_keys, side_pots)))
+             **dict(zip(sp_keys, side_pots.tolist()))
              }
-    # table_kwargs = list(zip(obs_keys, obs))[0:obs_keys.index('side_pot_5') + 1]
-    # return Table(**dict(table_kwargs))
     return Table(**table)
 
 
+def get_seat_stacks(seats, mapped_indices) -> dict:
+    """Returns stacks of the environments seats as {'p0': ..., 'p5': ...} relative to HERO.
+    Seats of eliminated players have a stack of 0."""
+    stacks = {f'p{seat}': 0 for seat in range(MAX_PLAYERS)}
+    for pid, player in enumerate(seats):
+        stacks[f'p{mapped_indices[pid]}'] = int(player.stack)
+    return stacks
+
+
 def get_stacks(player_info):
     stacks = {}
     for pid, pinfo in player_info.dict().items():
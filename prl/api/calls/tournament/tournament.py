@@ -0,0 +1,93 @@
+from fastapi import APIRouter, HTTPException
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import Request
+
+from prl.api.model.tournament import TournamentRequestBody, TournamentStatus, TournamentTable, TournamentPlayer, \
+    TournamentStats
+from prl.api.tournament import EMPTY, Tournament
+
+router = APIRouter()
+MAX_ENTRANTS = 10000
+
+
+def get_tournament(request: Request, tournament_id: int) -> Tournament:
+    tournament = request.app.backend.tournaments.get(tournament_id)
+    if tournament is None:
+        raise HTTPException(status_code=404, detail=f'Tournament {tournament_id} does not exist.')
+    return tournament
+
+
+def get_status(tournament: Tournament) -> TournamentStatus:
+    small_blind, big_blind = tournament.blinds()
+    return TournamentStatus(tournament_id=tournament.tournament_id,
+                            level=tournament.level(),
+                            small_blind=small_blind,
+                            big_blind=big_blind,
+                            n_entrants=tournament.n_entrants,
+                            n_remaining=tournament.n_remaining,
+                            finished=tournament.finished,
+                            tables=[TournamentTable(env_id=env_id,
+                                                    players=[int(p) if p != EMPTY else None for p in seats],
+                                                    failed=env_id in tournament.failed)
+                                    for env_id, seats in tournament.seats.items()],
+                            standings=tournament.standings())
+
+
+@router.post("/tournament/create",
+             response_model=TournamentStatus,
+             operation_id="create_tournament")
+async def create_tournament(body: TournamentRequestBody, request: Request):
+    """Creates the tables of a tournament and deals their first hands. Players find their table and seat
+    via /tournament/{tournament_id}/players/{player_id} and play with /step, tables are dealt, broken
+    and balanced by the tournament."""
+    if not 2 <= body.n_entrants <= MAX_ENTRANTS:
+        raise HTTPException(status_code=422, detail=f'n_entrants must be between 2 and {MAX_ENTRANTS}.')
+    if not body.blind_levels or body.level_seconds <= 0:
+        raise HTTPException(status_code=422, detail='Provide at least one blind level and a positive duration.')
+    tournament_id = await run_in_threadpool(request.app.backend.add_tournament,
+                                            n_entrants=body.n_entrants,
+                                            starting_stack_size=body.starting_stack_size,
+                                            blind_levels=body.blind_levels,
+                                            level_seconds=body.level_seconds,
+                                            seed=body.seed)
+    return get_status(request.app.backend.tournaments[tournament_id])
+
+
+@router.get("/tournament/{tournament_id}",
+            response_model=TournamentStatus,
+            operation_id="get_tournament")
+async def get_tournament_status(request: Request, tournament_id: int):
+    return get_status(get_tournament(request, tournament_id))
+
+
+@router.get("/tournament/{tournament_id}/players/{player_id}",
+            response_model=TournamentPlayer,
+            operation_id="get_tournament_player")
+async def get_tournament_player(request: Request, tournament_id: int, player_id: int):
+    tournament = get_tournament(request, tournament_id)
+    if not 0 <= player_id < tournament.n_entrants:
+        raise HTTPException(status_code=404, detail=f'Player {player_id} does not exist.')
+    env_id = int(tournament.player_table[player_id])
+    return TournamentPlayer(player_id=player_id,
+                            chips=int(tournament.chips[player_id]),
+                            env_id=env_id if env_id != EMPTY else None,
+                            seat=int(tournament.player_seat[player_id]) if env_id != EMPTY else None)
+
+
+@router.get("/tournament/{tournament_id}/stats",
+            response_model=TournamentStats,
+            operation_id="get_tournament_stats")
+async def get_tournament_stats(request: Request, tournament_id: int):
+    """Returns VPIP, PFR, 3-bet, aggression factor and showdown win rate per player,
+    over all tables the player was dealt in at."""
+    tournament = get_tournament(request, tournament_id)
+    return TournamentStats(tournament_id=tournament_id, players=tournament.stats.summary(key='player_id'))
+
+
+@router.get("/tournament/{tournament_id}/delete",
+            operation_id="delete_tournament")
+async def delete_tournament(request: Request, tournament_id: int):
+    """Deletes the tournament and all of its tables."""
+    get_tournament(request, tournament_id)
+    request.app.backend.remove_tournament(tournament_id)
+    return {'success': True}
@@ -0,0 +1,5 @@
+"""Asyncio client of the API, for bots and tools driving many tables from one process.
+Requires the optional dependency httpx: `pip install prl_api[client]`."""
+from prl.api.client.async_client import PrlClient
+
+__all__ = ['PrlClient']
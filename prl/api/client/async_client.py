@@ -0,0 +1,158 @@
+import asyncio
+import json
+import uuid
+from typing import Dict, List, Optional, Union
+
+import numpy as np
+
+try:
+    import httpx
+except ImportError:  # pragma: no cover
+    httpx = None
+
+from prl.api import compression
+from prl.api.model.environment_config import EnvironmentConfig, EnvironmentConfigBatch
+from prl.api.model.environment_state import EnvironmentState
+
+MAX_CONNECTIONS = 100
+# must not exceed MAX_BATCH_SIZE of /environment/configure_batch
+CONFIGURE_BATCH_SIZE = 1000
+MAX_RETRIES = 3
+DEFAULT_RETRY_AFTER = 1.  # seconds
+
+
+class PrlClient:
+    """Asyncio client of the API. One instance is meant to drive many tables concurrently,
+    all requests share its pool of keep-alive connections:
+
+        async with PrlClient('http://localhost:8000') as client:
+            env_ids = await client.configure_many([{'n_players': 6, 'starting_stack_size': 20000}] * 100)
+            states = await asyncio.gather(*(client.reset(env_id) for env_id in env_ids))
+
+    Requests shed by admission control (503) are retried after their Retry-After, as are requests that
+    could not connect. Other transport errors, e.g. a read timeout after the server already dealt a hand,
+    are only retried for idempotent requests: reads, and steps, which carry an idempotency key so that
+    the table is not stepped twice. For /reset or /configure, they are raised to the caller.
+    If zstandard is installed, responses are requested prl-zstd compressed with the shipped dictionary."""
+
+    def __init__(self,
+                 base_url: str = 'http://localhost:8000',
+                 max_connections: int = MAX_CONNECTIONS,
+                 max_retries: int = MAX_RETRIES,
+                 compress: bool = True,
+                 transport=None):
+        if httpx is None:
+            raise ImportError('PrlClient requires httpx, install it with `pip install prl_api[client]`.')
+        self.max_retries = max_retries
+        headers = {}
+        self._dictionary = None
+        if compress and compression.zstandard is not None:
+            headers['Accept-Encoding'] = f'{compression.ENCODING}, gzip, deflate'
+            self._dictionary = compression.load_dictionary()
+            if self._dictionary is not None:
+                headers['Prl-Zstd-Dictionary'] = str(self._dictionary.dict_id())
+        self._http = httpx.AsyncClient(base_url=base_url,
+                                       headers=headers,
+                                       limits=httpx.Limits(max_connections=max_connections,
+                                                           max_keepalive_connections=max_connections),
+                                       transport=transport)
+        self._paths: Optional[set] = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def close(self):
+        await self._http.aclose()
+
+    async def _request(self, method: str, path: str, idempotent: bool = False, **kwargs) -> 'httpx.Response':
+        for attempt in range(self.max_retries + 1):
+            try:
+                response = await self._http.request(method, path, **kwargs)
+            except (httpx.ConnectError, httpx.ConnectTimeout):
+                # the request never reached the server
+                if attempt == self.max_retries:
+                    raise
+                await asyncio.sleep(DEFAULT_RETRY_AFTER)
+                continue
+            except httpx.TransportError:
+                if not idempotent or attempt == self.max_retries:
+                    raise
+                await asyncio.sleep(DEFAULT_RETRY_AFTER)
+                continue
+            if response.status_code != 503 or attempt == self.max_retries:
+                break
+            await asyncio.sleep(float(response.headers.get('Retry-After', DEFAULT_RETRY_AFTER)))
+        response.raise_for_status()
+        return response
+
+    def _content(self, response: 'httpx.Response') -> bytes:
+        if response.headers.get('Content-Encoding') == compression.ENCODING:
+            return compression.decompress(response.content,
+                                          response.headers.get('Prl-Zstd-Dictionary'),
+                                          self._dictionary)
+        return response.content
+
+    async def has_path(self, path: str) -> bool:
+        """True if the server exposes path, looked up once in its openapi schema."""
+        if self._paths is None:
+            schema = json.loads(self._content(await self._request('GET', '/openapi.json', idempotent=True)))
+            self._paths = set(schema.get('paths', {}))
+        return path in self._paths
+
+    async def configure(self, n_players: int, starting_stack_size: int,
+                        seed: Optional[int] = None) -> EnvironmentConfig:
+        response = await self._request('POST', '/environment/configure',
+                                       json={'n_players': n_players,
+                                             'starting_stack_size': starting_stack_size,
+                                             'seed': seed})
+        return EnvironmentConfig.parse_raw(self._content(response))
+
+    async def configure_many(self, configs: List[dict]) -> List[int]:
+        """Creates one environment per config, e.g. {'n_players': 6, 'starting_stack_size': 20000}.
+        Uses /configure_batch if the server has it. Returns env_ids in the order of configs."""
+        if not await self.has_path('/environment/configure_batch'):
+            created = await asyncio.gather(*(self.configure(**config) for config in configs))
+            return [config.env_id for config in created]
+        env_ids = []
+        for start in range(0, len(configs), CONFIGURE_BATCH_SIZE):
+            response = await self._request('POST', '/environment/configure_batch',
+                                           json={'configs': configs[start:start + CONFIGURE_BATCH_SIZE]})
+            batch = EnvironmentConfigBatch.parse_raw(self._content(response))
+            env_ids.extend(config.env_id for config in batch.environments)
+        return env_ids
+
+    async def reset(self, env_id: int, stack_sizes: Optional[Dict[str, int]] = None,
+                    fields: Optional[str] = None) -> Union[EnvironmentState, dict]:
+        """Deals the next hand. stack_sizes are given as {'stack_p0': ..., 'stack_p5': ...}.
+        If fields are selected, the selected parts are returned as a dict."""
+        response = await self._request('POST', f'/environment/{env_id}/reset/',
+                                       json={'env_id': env_id, 'stack_sizes': stack_sizes},
+                                       params={'fields': fields} if fields else None)
+        content = self._content(response)
+        return json.loads(content) if fields else EnvironmentState.parse_raw(content)
+
+    async def step(self, env_id: int, action: int, action_how_much: float = -1,
+                   fast_forward: bool = False, fields: Optional[str] = None) -> Union[EnvironmentState, dict]:
+        """Steps the environment. If fields are selected, the selected parts are returned as a dict."""
+        body = {'env_id': env_id,
+                'action': action,
+                'action_how_much': action_how_much,
+                # random keys, tables are shared by clients and keys must not collide across them
+                'idempotency_key': uuid.uuid4().hex,
+                'fast_forward': fast_forward}
+        response = await self._request('POST', f'/environment/{env_id}/step', idempotent=True, json=body,
+                                       params={'fields': fields} if fields else None)
+        content = self._content(response)
+        return json.loads(content) if fields else EnvironmentState.parse_raw(content)
+
+    async def observation(self, env_id: int) -> np.ndarray:
+        """Raw float32 observation of the last state, relative to the player to act."""
+        response = await self._request('GET', f'/environment/{env_id}/observation', idempotent=True)
+        return np.frombuffer(self._content(response), dtype='<f4')
+
+    async def delete(self, env_id: int) -> bool:
+        response = await self._request('GET', f'/environment/{env_id}/delete')
+        return json.loads(self._content(response))['success']
@@ -0,0 +1,142 @@
+"""zstd compression of responses, with a dictionary trained on recorded states.
+
+EnvironmentState json repeats the same keys for every player, card and the table, which a shared
+dictionary captures up front, so that even single small states compress well. Clients negotiate
+it with `Accept-Encoding: prl-zstd` and announce the id of the dictionary they hold in the
+`Prl-Zstd-Dictionary` header. Responses from `minimum_size` bytes on are compressed, with the
+dictionary if the ids match, else as plain zstd. Streaming responses, e.g. /spectate, are compressed
+as one zstd stream that is flushed after every frame, so later frames also reference earlier ones.
+
+The dictionary is shipped in prl/api/data, it is trained from responses with one json per line,
+e.g. the synthetic corpus of prl.api.state_corpus:
+
+    python -m prl.api.compression responses.jsonl
+The threshold and level are read from PRL_ZSTD_MINIMUM_SIZE and PRL_ZSTD_LEVEL.
+
+zstandard is optional, without it responses are sent uncompressed.
+"""
+import os
+import sys
+from functools import lru_cache
+from typing import List, Optional
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover
+    zstandard = None
+
+from starlette.datastructures import Headers, MutableHeaders
+
+ENCODING = 'prl-zstd'
+DICTIONARY_HEADER = 'prl-zstd-dictionary'
+DICTIONARY_PATH = os.path.join(os.path.dirname(__file__), 'data', 'state_dictionary.zstd')
+DICTIONARY_SIZE = 16 * 1024
+MINIMUM_SIZE = int(os.environ.get('PRL_ZSTD_MINIMUM_SIZE', 256))  # bytes
+LEVEL = int(os.environ.get('PRL_ZSTD_LEVEL', 3))
+COMPRESSIBLE_TYPES = ('application/json', 'text/event-stream', 'text/plain')
+
+
+@lru_cache(maxsize=1)
+def load_dictionary(path: str = DICTIONARY_PATH):
+    """Returns the shipped ZstdCompressionDict, None if it has not been trained or zstandard is missing."""
+    if zstandard is None or not os.path.exists(path):
+        return None
+    with open(path, 'rb') as f:
+        return zstandard.ZstdCompressionDict(f.read())
+
+
+def train_dictionary(samples: List[bytes], path: str = DICTIONARY_PATH, size: int = DICTIONARY_SIZE):
+    dictionary = zstandard.train_dictionary(size, samples)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(dictionary.as_bytes())
+    load_dictionary.cache_clear()
+
+
+def decompress(body: bytes, dictionary_id: Optional[str], dictionary=None) -> bytes:
+    """Decompresses a complete prl-zstd response body, as sent with dictionary_id."""
+    if dictionary_id is not None:
+        if dictionary is None or str(dictionary.dict_id()) != dictionary_id:
+            raise ValueError(f'Response was compressed with unknown dictionary {dictionary_id}.')
+        return zstandard.ZstdDecompressor(dict_data=dictionary).decompressobj().decompress(body)
+    return zstandard.ZstdDecompressor().decompressobj().decompress(body)
+
+
+class CompressionMiddleware:
+    """ASGI middleware, that compresses responses of clients accepting prl-zstd."""
+
+    def __init__(self, app, minimum_size: int = MINIMUM_SIZE, level: int = LEVEL,
+                 dictionary_path: str = DICTIONARY_PATH):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.dictionary = load_dictionary(dictionary_path)
+        self.dictionary_id = str(self.dictionary.dict_id()) if self.dictionary is not None else None
+        if zstandard is not None:
+            self._compressors = {False: zstandard.ZstdCompressor(level=level)}
+            if self.dictionary is not None:
+                self._compressors[True] = zstandard.ZstdCompressor(level=level, dict_data=self.dictionary)
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or zstandard is None:
+            return await self.app(scope, receive, send)
+        headers = Headers(scope=scope)
+        if ENCODING not in headers.get('accept-encoding', ''):
+            return await self.app(scope, receive, send)
+        use_dictionary = self.dictionary_id is not None and headers.get(DICTIONARY_HEADER) == self.dictionary_id
+        responder = _ZstdResponder(send, self._compressors[use_dictionary],
+                                   self.dictionary_id if use_dictionary else None, self.minimum_size)
+        await self.app(scope, receive, responder.send)
+
+
+class _ZstdResponder:
+    def __init__(self, send, compressor, dictionary_id: Optional[str], minimum_size: int):
+        self._send = send
+        self.compressor = compressor
+        self.dictionary_id = dictionary_id
+        self.minimum_size = minimum_size
+        self.start = None
+        self.stream = None  # compressobj of a streaming response
+        self.passthrough = False
+
+    def _set_encoding(self, headers: MutableHeaders):
+        headers['Content-Encoding'] = ENCODING
+        headers.add_vary_header('Accept-Encoding')
+        if self.dictionary_id is not None:
+            headers['Prl-Zstd-Dictionary'] = self.dictionary_id
+
+    async def send(self, message):
+        if message['type'] == 'http.response.start':
+            self.start = message
+            return
+        if message['type'] != 'http.response.body' or self.passthrough:
+            return await self._send(message)
+        body = message.get('body', b'')
+        more_body = message.get('more_body', False)
+        if self.stream is not None:
+            flush = zstandard.COMPRESSOBJ_FLUSH_BLOCK if more_body else zstandard.COMPRESSOBJ_FLUSH_FINISH
+            message['body'] = self.stream.compress(body) + self.stream.flush(flush)
+            return await self._send(message)
+
+        # first body message decides how the response is sent
+        headers = MutableHeaders(raw=self.start['headers'])
+        content_type = headers.get('content-type', '')
+        if 'content-encoding' in headers or not content_type.startswith(COMPRESSIBLE_TYPES) \
+                or (not more_body and len(body) < self.minimum_size):
+            self.passthrough = True
+            await self._send(self.start)
+            return await self._send(message)
+        self._set_encoding(headers)
+        if more_body:
+            del headers['Content-Length']
+            self.stream = self.compressor.compressobj()
+            message['body'] = self.stream.compress(body) + self.stream.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+        else:
+            message['body'] = self.compressor.compress(body)
+            headers['Content-Length'] = str(len(message['body']))
+        await self._send(self.start)
+        await self._send(message)
+
+
+if __name__ == '__main__':
+    with open(sys.argv[1], 'rb') as f:
+        train_dictionary([line.strip() for line in f if line.strip()], *sys.argv[2:3])
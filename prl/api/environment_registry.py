@@ -1,28 +1,106 @@
-from typing import Optional, List, Dict, Any
+import itertools
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
 
 from prl.environment.steinberger.PokerRL import NoLimitHoldem
 from prl.environment.Wrappers.prl_wrappers import AugmentObservationWrapper, AgentObservationType
 
+from prl.api.session import EnvironmentSession
+from prl.api.tournament import Tournament
+
+BUILD_WORKERS = 8
+
+
+def build_environment(n_players: int, starting_stack_sizes: list, blinds: Optional[Tuple[int, int]] = None):
+    """Constructs a wrapped environment, as used by every table of the backend.
+    blinds are (small blind, big blind), None keeps the defaults of NoLimitHoldem."""
+    args = NoLimitHoldem.ARGS_CLS(n_seats=n_players,
+                                  starting_stack_sizes_list=starting_stack_sizes,
+                                  use_simplified_headsup_obs=False)
+    env = NoLimitHoldem(is_evaluating=True,
+                        env_args=args,
+                        lut_holder=NoLimitHoldem.get_lut_holder())
+    env_wrapped = AugmentObservationWrapper(env)
+    env_wrapped.set_agent_observation_mode(AgentObservationType.SEER)
+    if blinds is not None:
+        apply_blinds(env_wrapped, blinds)
+    return env_wrapped
+
+
+def apply_blinds(env, blinds: Tuple[int, int]):
+    """Sets (small blind, big blind) of the next hand. They are game constants of NoLimitHoldem rather
+    than fields of its args, posted on env.reset() and used for min raises, like the starting stacks."""
+    env.env.SMALL_BLIND, env.env.BIG_BLIND = blinds
+    return env
+
+
+def apply_starting_stacks(env, starting_stack_sizes: list):
+    """Sets the starting stacks of the next hand on an environment built by build_environment for as many seats.
+    Unlike `overwrite_args`, this does not rebuild anything, the seats pick up their stacks on env.reset().
+    Observations are normalized by the mean starting stack, so the wrappers `normalization` is updated alike."""
+    for seat, stack in zip(env.env.seats, starting_stack_sizes):
+        # read by PokerPlayer.reset()
+        seat._starting_stack_arg = stack
+    env.normalization = float(sum(starting_stack_sizes)) / len(starting_stack_sizes)
+    return env
+
+
+def build_environment_from_config(config: dict):
+    num_players = config['n_players']
+    starting_stack_sizes = [config['starting_stack_size'] for _ in range(num_players)]
+    return build_environment(num_players, starting_stack_sizes)
+
 
 class EnvironmentRegistry:
-    def __init__(self):
-        self._num_active_environments = 0
-        self.active_ens: Optional[Dict[int, Any]] = {}
-        self.metadata: Optional[Dict[int, Dict]] = {}
+    def __init__(self, build_workers: int = BUILD_WORKERS):
+        # env_ids are allocated under a lock, so that concurrent builds never share an id
+        self._env_ids = itertools.count(1)
+        self._env_ids_lock = threading.Lock()
+        self._build_pool = ThreadPoolExecutor(max_workers=build_workers, thread_name_prefix='env-build')
+        self.sessions: Dict[int, EnvironmentSession] = {}
+        self.tournaments: Dict[int, Tournament] = {}
+        self._tournament_ids = itertools.count(1)
+        # distinguishes ETags of this process from those handed out before a restart
+        self.epoch = uuid.uuid4().hex[:8]
+
+    def _allocate_env_ids(self, n: int) -> List[int]:
+        with self._env_ids_lock:
+            return [next(self._env_ids) for _ in range(n)]
 
     def add_environment(self, config: dict):
-        self._num_active_environments += 1
-        env_id = self._num_active_environments
-        num_players = config['n_players']
-        starting_stack_sizes = [config['starting_stack_size'] for _ in range(num_players)]
-        args = NoLimitHoldem.ARGS_CLS(n_seats=num_players,
-                                      starting_stack_sizes_list=starting_stack_sizes,
-                                      use_simplified_headsup_obs=False)
-        env = NoLimitHoldem(is_evaluating=True,
-                            env_args=args,
-                            lut_holder=NoLimitHoldem.get_lut_holder())
-        env_wrapped = AugmentObservationWrapper(env)
-        env_wrapped.set_agent_observation_mode(AgentObservationType.SEER)
-        self.active_ens[env_id] = env_wrapped
-        self.metadata[env_id] = {'initial_state': True}
+        env_id, = self._allocate_env_ids(1)
+        self.sessions[env_id] = EnvironmentSession(build_environment_from_config(config), seed=config.get('seed'))
         return env_id
+
+    def add_environments(self, configs: List[dict]) -> List[int]:
+        """Builds environments for all configs in parallel on the build pool.
+        Registers all of them, or none if a build fails. Returns their env_ids in the order of configs."""
+        envs = list(self._build_pool.map(build_environment_from_config, configs))
+        sessions = [EnvironmentSession(env, seed=config.get('seed')) for env, config in zip(envs, configs)]
+        # ids are only allocated once everything is built, a failed batch burns none
+        env_ids = self._allocate_env_ids(len(configs))
+        self.sessions.update(zip(env_ids, sessions))
+        return env_ids
+
+    def remove_environment(self, env_id: int):
+        session = self.sessions.pop(env_id)
+        # end spectator streams of this table
+        session.spectators.close()
+
+    def add_tournament(self, **kwargs) -> int:
+        """Creates and starts a Tournament, see prl.api.tournament. Builds its tables, call it off the event loop."""
+        tournament_id = next(self._tournament_ids)
+        tournament = Tournament(tournament_id, self, **kwargs)
+        tournament.start()
+        self.tournaments[tournament_id] = tournament
+        return tournament_id
+
+    def remove_tournament(self, tournament_id: int):
+        tournament = self.tournaments.pop(tournament_id)
+        for env_id in list(tournament.seats):
+            self.remove_environment(env_id)
+
+    def state_etag(self, env_id: int, state_version: int):
+        return f'"{self.epoch}-{env_id}-{state_version}"'
@@ -0,0 +1,238 @@
+"""Vectorized hand evaluation and equity estimation.
+
+Cards are encoded as integers `rank * 4 + suit`, using the ranks and suits of
+utils.get_player_cards and utils.get_board_cards, i.e. rank 0 is a deuce and rank 12 an ace.
+
+Equities of all streets are estimated by Monte Carlo simulation, where all samples of a batch
+are evaluated at once with numpy. Heads-up preflop equities are looked up in a shipped table
+instead, with one entry for each of the 47008 matchups that are distinct up to suits, see `build_preflop_table`.
+"""
+import itertools
+import os
+import sys
+from functools import lru_cache
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+N_RANKS = 13
+N_SUITS = 4
+N_CARDS = N_RANKS * N_SUITS
+RANKS = np.arange(N_RANKS)
+SUITS = np.arange(N_SUITS)
+# tiebreak ranks are encoded base 13 below the hand category
+TIEBREAK_WEIGHTS = N_RANKS ** np.arange(4, -1, -1)
+CATEGORY_WEIGHT = N_RANKS ** 5
+HIGH_CARD, PAIR, TWO_PAIR, TRIPS, STRAIGHT, FLUSH, FULL_HOUSE, QUADS, STRAIGHT_FLUSH = range(9)
+
+DEFAULT_N_SAMPLES = 20000
+DEFAULT_BATCH_SIZE = 2000
+# standard error of the equity, an even matchup reaches it after about 10000 samples
+DEFAULT_TOLERANCE = 0.005
+PREFLOP_TABLE_PATH = os.path.join(os.path.dirname(os.path.realpath(__file__)), 'data', 'preflop_equity_hu.npy')
+PREFLOP_TABLE_DTYPE = np.dtype([('key', np.int64), ('win', np.float32), ('tie', np.float32)])
+SUIT_PERMUTATIONS = np.array(list(itertools.permutations(range(N_SUITS))))
+KEY_WEIGHTS = N_CARDS ** np.arange(3, -1, -1)
+
+
+def card_id(rank: int, suit: int) -> int:
+    return rank * N_SUITS + suit
+
+
+def _straight_high(presence: np.ndarray) -> np.ndarray:
+    """Returns the rank of the highest straight card per row, -1 if there is no straight."""
+    # prepend the ace, so that it also counts as the low card of A2345
+    extended = np.concatenate([presence[:, -1:], presence], axis=1)
+    windows = np.lib.stride_tricks.sliding_window_view(extended, 5, axis=1).all(axis=2)  # (N, 10)
+    # windows[:, i] is the straight with high card rank i + 3
+    highest = N_RANKS - 1 - windows[:, ::-1].argmax(axis=1)
+    return np.where(windows.any(axis=1), highest, -1)
+
+
+def _top_ranks(presence: np.ndarray, k: int) -> np.ndarray:
+    """Returns the k highest present ranks per row, in descending order."""
+    keyed = np.where(presence, RANKS, -1)
+    return -np.sort(-keyed, axis=1)[:, :k]
+
+
+def evaluate(cards: np.ndarray) -> np.ndarray:
+    """Scores hands of seven cards given as int array of shape (N, 7).
+    Returns int64 array of shape (N,), higher scores are better hands, equal scores are split pots."""
+    n = len(cards)
+    ranks = cards // N_SUITS
+    suits = cards % N_SUITS
+    rank_hot = ranks[:, :, None] == RANKS  # (N, 7, 13)
+    counts = rank_hot.sum(axis=1)
+    presence = counts > 0
+
+    suit_counts = (suits[:, :, None] == SUITS).sum(axis=1)
+    flush_suit = suit_counts.argmax(axis=1)
+    has_flush = suit_counts.max(axis=1) >= 5
+    flush_presence = (rank_hot & (suits == flush_suit[:, None])[:, :, None]).any(axis=1)
+
+    straight_high = _straight_high(presence)
+    straight_flush_high = np.where(has_flush, _straight_high(flush_presence), -1)
+
+    # ranks ordered by count first and rank second, e.g. the trips of a full house come first
+    grouped = -np.sort(-np.where(presence, counts * N_RANKS + RANKS, -1), axis=1)
+    r1, r2 = grouped[:, 0] % N_RANKS, grouped[:, 1] % N_RANKS
+    c1, c2 = grouped[:, 0] // N_RANKS, grouped[:, 1] // N_RANKS
+    without_r1 = presence & (RANKS != r1[:, None])
+    without_r1_r2 = without_r1 & (RANKS != r2[:, None])
+
+    zeros = np.zeros((n, 1), dtype=np.int64)
+
+    def tiebreak(*columns):
+        columns = [c if c.ndim == 2 else c[:, None] for c in columns]
+        columns += [zeros] * (5 - sum(c.shape[1] for c in columns))
+        return np.concatenate(columns, axis=1)
+
+    conditions = [straight_flush_high >= 0,
+                  c1 == 4,
+                  (c1 == 3) & (c2 >= 2),
+                  has_flush,
+                  straight_high >= 0,
+                  c1 == 3,
+                  (c1 == 2) & (c2 == 2),
+                  c1 == 2]
+    categories = [STRAIGHT_FLUSH, QUADS, FULL_HOUSE, FLUSH, STRAIGHT, TRIPS, TWO_PAIR, PAIR]
+    tiebreaks = [tiebreak(straight_flush_high),
+                 tiebreak(r1, _top_ranks(without_r1, 1)),
+                 tiebreak(r1, r2),
+                 _top_ranks(flush_presence, 5),
+                 tiebreak(straight_high),
+                 tiebreak(r1, _top_ranks(without_r1, 2)),
+                 tiebreak(r1, r2, _top_ranks(without_r1_r2, 1)),
+                 tiebreak(r1, _top_ranks(without_r1, 3))]
+    category = np.select(conditions, categories, HIGH_CARD)
+    ranks_tiebreak = np.select([c[:, None] for c in conditions], tiebreaks, _top_ranks(presence, 5))
+    return category.astype(np.int64) * CATEGORY_WEIGHT + ranks_tiebreak @ TIEBREAK_WEIGHTS
+
+
+def _accumulate(scores: np.ndarray, wins: np.ndarray, ties: np.ndarray):
+    """scores has shape (n_players, n_samples). Adds won and tied (split) pots per player."""
+    best = scores.max(axis=0)
+    is_best = scores == best
+    n_best = is_best.sum(axis=0)
+    wins += (is_best & (n_best == 1)).sum(axis=1)
+    ties += (is_best & (n_best > 1)).sum(axis=1)
+
+
+def monte_carlo_equity(hands: Sequence[Tuple[int, int]],
+                       board: Sequence[int],
+                       n_samples: int = DEFAULT_N_SAMPLES,
+                       tolerance: float = DEFAULT_TOLERANCE,
+                       batch_size: int = DEFAULT_BATCH_SIZE,
+                       rng: Optional[np.random.Generator] = None):
+    """Estimates win and tie probabilities of each hand, given the known board cards.
+    Sampling stops after n_samples or as soon as the standard error of every players
+    equity, i.e. win + tie / 2, falls below tolerance. Returns (wins, ties, n_samples_used)."""
+    rng = np.random.default_rng() if rng is None else rng
+    n_players = len(hands)
+    known = [c for hand in hands for c in hand] + list(board)
+    deck = np.setdiff1d(np.arange(N_CARDS), known)
+    n_missing = 5 - len(board)
+    hole_cards = np.array(hands, dtype=np.int64)  # (n_players, 2)
+    wins = np.zeros(n_players, dtype=np.int64)
+    ties = np.zeros(n_players, dtype=np.int64)
+
+    if n_missing == 0:
+        n_samples, batch_size = 1, 1
+    n_done = 0
+    while n_done < n_samples:
+        size = min(batch_size, n_samples - n_done)
+        # sample missing board cards without replacement, independently per row
+        draws = deck[rng.random((size, len(deck))).argsort(axis=1)[:, :n_missing]]
+        boards = np.concatenate([np.broadcast_to(np.array(board, dtype=np.int64), (size, len(board))), draws], axis=1)
+        scores = np.stack([evaluate(np.concatenate([np.broadcast_to(hole, (size, 2)), boards], axis=1))
+                           for hole in hole_cards])
+        _accumulate(scores, wins, ties)
+        n_done += size
+        # a sample is worth 1 for a win, 1/2 for a tie and 0 otherwise
+        mean = (wins + ties / 2) / n_done
+        variance = (wins + ties / 4) / n_done - mean ** 2
+        if np.all(np.sqrt(variance / n_done) < tolerance):
+            break
+    return wins / n_done, ties / n_done, n_done
+
+
+def matchup_keys(matchups: np.ndarray) -> np.ndarray:
+    """Keys of heads-up matchups given as int array of shape (N, 2, 2), equal for matchups that only
+    differ by a permutation of suits. A key encodes the four cards base 52, with the higher card first in
+    each hand, and is the smallest such encoding over all permutations of suits."""
+    matchups = np.asarray(matchups, dtype=np.int64)
+    permuted = matchups // N_SUITS * N_SUITS + SUIT_PERMUTATIONS[:, matchups % N_SUITS]  # (24, N, 2, 2)
+    permuted = -np.sort(-permuted, axis=-1)
+    return (permuted.reshape(len(SUIT_PERMUTATIONS), len(matchups), 4) @ KEY_WEIGHTS).min(axis=0)
+
+
+def _decode_key(key: int) -> List[Tuple[int, int]]:
+    cards = [int(key) // int(w) % N_CARDS for w in KEY_WEIGHTS]
+    return [(cards[0], cards[1]), (cards[2], cards[3])]
+
+
+def preflop_matchups(chunk_size: int = 100000) -> np.ndarray:
+    """Sorted keys of all heads-up preflop matchups, up to suits and the order of both hands.
+    Of the two orders of a matchup, the one with the smaller key is kept."""
+    combos = np.array(list(itertools.combinations(range(N_CARDS), 2)))
+    first, second = np.triu_indices(len(combos), k=1)
+    keys = []
+    for start in range(0, len(first), chunk_size):
+        matchups = np.stack([combos[first[start:start + chunk_size]], combos[second[start:start + chunk_size]]], axis=1)
+        matchups = matchups[~(matchups[:, 0, :, None] == matchups[:, 1, None, :]).any(axis=(1, 2))]
+        keys.append(np.unique(np.minimum(matchup_keys(matchups), matchup_keys(matchups[:, ::-1]))))
+    return np.unique(np.concatenate(keys))
+
+
+@lru_cache(maxsize=1)
+def load_preflop_table(path: str = PREFLOP_TABLE_PATH) -> Optional[np.ndarray]:
+    """Memory maps the heads-up preflop table, holding win and tie probability of the first hand of
+    every matchup in `preflop_matchups`, sorted by key. Returns None if it is missing."""
+    if not os.path.exists(path):
+        return None
+    return np.load(path, mmap_mode='r')
+
+
+def preflop_equity(hands: Sequence[Tuple[int, int]]):
+    """Looks up heads-up preflop equities. Returns None if no table is available."""
+    table = load_preflop_table()
+    if table is None or len(hands) != 2:
+        return None
+    key, swapped_key = matchup_keys([hands, hands[::-1]])
+    row = table[np.searchsorted(table['key'], min(key, swapped_key))]
+    win, tie = float(row['win']), float(row['tie'])
+    loss = 1 - win - tie
+    wins = [loss, win] if swapped_key < key else [win, loss]
+    return np.array(wins), np.array([tie, tie])
+
+
+def equity(hands: Sequence[Tuple[int, int]],
+           board: Sequence[int],
+           n_samples: int = DEFAULT_N_SAMPLES,
+           tolerance: float = DEFAULT_TOLERANCE):
+    """Returns (wins, ties, n_samples_used, method), where n_samples_used is 0 for table lookups."""
+    if not board:
+        looked_up = preflop_equity(hands)
+        if looked_up is not None:
+            return looked_up[0], looked_up[1], 0, 'preflop_table'
+    wins, ties, n_used = monte_carlo_equity(hands, board, n_samples=n_samples, tolerance=tolerance)
+    return wins, ties, n_used, 'monte_carlo'
+
+
+def build_preflop_table(path: str = PREFLOP_TABLE_PATH, n_samples: int = DEFAULT_N_SAMPLES,
+                        tolerance: float = DEFAULT_TOLERANCE, seed: int = 0):
+    """Computes the heads-up preflop table by Monte Carlo simulation of every matchup."""
+    rng = np.random.default_rng(seed)
+    keys = preflop_matchups()
+    table = np.zeros(len(keys), dtype=PREFLOP_TABLE_DTYPE)
+    for i, key in enumerate(keys):
+        wins, ties, _ = monte_carlo_equity(_decode_key(key), [], n_samples=n_samples, tolerance=tolerance, rng=rng)
+        table[i] = key, wins[0], ties[0]
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    np.save(path, table)
+    load_preflop_table.cache_clear()
+
+
+if __name__ == '__main__':
+    # python -m prl.api.equity [path]
+    build_preflop_table(*sys.argv[1:2])
@@ -0,0 +1,63 @@
+"""Records of played hands, as needed to re-execute them with `prl.api.replay`.
+
+A hand is fully determined by the seat count, the rolled starting stacks passed to the environment,
+the seed of the deck shuffle and the actions passed to `env.step`. After each step, a fingerprint of
+the resulting state is recorded, such that a replay can verify it reproduces the same states.
+"""
+import threading
+import zlib
+from dataclasses import dataclass, field, asdict
+from typing import List
+
+import numpy as np
+
+from prl.api.observation import OBS_DTYPE
+
+# the global numpy RNG is seeded per deal, tables dealing on different threads take turns
+_GLOBAL_RNG_LOCK = threading.Lock()
+
+
+@dataclass
+class StepRecord:
+    action: List[float]  # [what, how_much] as passed to env.step
+    fingerprint: list
+
+
+@dataclass
+class HandRecord:
+    n_players: int
+    starting_stacks: List[int]  # relative to BTN, as passed to the environment
+    deck_seed: int
+    button_index: int  # frontend seat, for reference only
+    steps: List[StepRecord] = field(default_factory=list)
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, record: dict):
+        steps = [StepRecord(**step) for step in record.get('steps', [])]
+        return cls(**{**record, 'steps': steps})
+
+
+def fingerprint(env, obs, done) -> list:
+    """Cheap summary of the environment state after a step: last action, stacks, done and a checksum of obs.
+    The checksum is taken over obs as float32, the dtype of the sessions ObservationBuffer."""
+    what, how_much, who = env.env.last_action
+    return [int(what), float(how_much), int(who),
+            [int(seat.stack) for seat in env.env.seats],
+            bool(done),
+            zlib.crc32(np.ascontiguousarray(obs, dtype=OBS_DTYPE))]
+
+
+def reset_seeded(env, deck_seed: int):
+    """Resets env with its deck shuffled by deck_seed and returns what env.reset() returns.
+    The environment shuffles with the global numpy RNG, which is seeded for this reset only
+    and restored afterwards, so other users of np.random are not made deterministic."""
+    with _GLOBAL_RNG_LOCK:
+        state = np.random.get_state()
+        np.random.seed(deck_seed)
+        try:
+            return env.reset()
+        finally:
+            np.random.set_state(state)
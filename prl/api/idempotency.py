@@ -0,0 +1,39 @@
+"""Replay of /step responses for retried requests.
+
+Each table keeps the responses of its most recent keyed step requests in a small ring.
+A request carrying a key that is still in the ring is answered from it,
+without stepping the environment a second time. Each key is stored with a fingerprint of its
+request, a key that comes back with a different request is rejected instead of replayed.
+"""
+from typing import Any, Hashable, Optional
+
+RESPONSE_RING_SIZE = 16
+
+
+class IdempotencyKeyReused(ValueError):
+    pass
+
+
+class ResponseRing:
+    def __init__(self, size: int = RESPONSE_RING_SIZE):
+        self._keys = [None] * size
+        self._fingerprints = [None] * size
+        self._responses = [None] * size
+        self._next = 0
+
+    def get(self, key: Hashable, fingerprint: Hashable = None) -> Optional[Any]:
+        """Returns the response stored for key, None if there is none.
+        Raises IdempotencyKeyReused if key was stored for a request with another fingerprint."""
+        # linear scan is cheaper than hashing for a ring this small
+        for i, k in enumerate(self._keys):
+            if k == key:
+                if self._fingerprints[i] != fingerprint:
+                    raise IdempotencyKeyReused(f'Idempotency key {key} was already used for a different request.')
+                return self._responses[i]
+        return None
+
+    def put(self, key: Hashable, response: Any, fingerprint: Hashable = None):
+        self._keys[self._next] = key
+        self._fingerprints[self._next] = fingerprint
+        self._responses[self._next] = response
+        self._next = (self._next + 1) % len(self._keys)
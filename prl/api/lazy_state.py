@@ -0,0 +1,59 @@
+"""EnvironmentState whose expensive fields are decoded on first access.
+
+/reset and /step wrap the decoders of utils.py (table, board, players) into `Lazy`, such that
+clients selecting only a few fields do not pay for decoding and serializing the others.
+The full EnvironmentState is only built when someone needs it, e.g. spectators or GET /state.
+"""
+from typing import Callable, Optional
+
+from prl.api.model.environment_state import EnvironmentState
+
+
+class Lazy:
+    __slots__ = ('decode',)
+
+    def __init__(self, decode: Callable):
+        self.decode = decode
+
+
+def _include(selection: dict):
+    """Translates a field selection into pydantic's include format."""
+    return {name: ... if sub is None else _include(sub) for name, sub in selection.items()}
+
+
+class LazyState:
+    __slots__ = ('_fields', '_state')
+
+    def __init__(self, fields: dict):
+        self._fields = fields
+        self._state: Optional[EnvironmentState] = None
+
+    def resolve(self, name: str):
+        value = self._fields.get(name, EnvironmentState.__fields__[name].default)
+        if isinstance(value, Lazy):
+            value = self._fields[name] = value.decode()
+        return value
+
+    def resolve_all(self):
+        for name in self._fields:
+            self.resolve(name)
+
+    def full(self) -> EnvironmentState:
+        if self._state is None:
+            self.resolve_all()
+            self._state = EnvironmentState(**self._fields)
+        return self._state
+
+    def select(self, selection: dict) -> dict:
+        """Returns only the selected fields, decoding only what is needed.
+        selection maps field names to None for the whole field, or to a selection of its sub-fields."""
+        selected = {}
+        for name, sub in selection.items():
+            value = self.resolve(name)
+            if sub is not None and value is not None:
+                if isinstance(value, dict):
+                    value = {key: value[key] for key in sub if key in value}
+                else:
+                    value = value.dict(include=_include(sub))
+            selected[name] = value
+        return selected
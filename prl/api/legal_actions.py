@@ -0,0 +1,79 @@
+"""Legal actions of the player to act, derived from the seat state of the environment.
+
+PokerRL silently rewrites actions it does not accept: a fold that could have been a check becomes
+a check, raises are clipped into [min_raise, max_raise] and raises that cannot reopen the betting
+become calls. The legal actions are computed once per /reset and /step, cached on the session,
+and used to reject such actions before they reach `env.step`.
+"""
+from typing import List, NamedTuple, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from prl.api.model.environment_state import LegalActions
+
+FOLD = 0
+CHECK_CALL = 1
+BET_RAISE = 2
+
+
+def _raise_is_capped(env, player) -> bool:
+    """True if a short all-in raise this round prevents player from raising again."""
+    capped_raise = getattr(env, 'capped_raise', None)
+    return bool(capped_raise is not None
+                and capped_raise.happened_this_round
+                and capped_raise.player_that_cant_reopen is player)
+
+
+class ActionBounds(NamedTuple):
+    """Plain version of LegalActions, for headless callers like prl.api.arena."""
+    actions: List[int]
+    to_call: int
+    min_raise: Optional[int]
+    max_raise: Optional[int]
+
+
+def get_action_bounds(env) -> ActionBounds:
+    """env is the unwrapped PokerRL environment, i.e. `session.env.env`, of a running hand."""
+    player = env.current_player
+    to_call = int(env._get_biggest_bet_out_there_aka_total_to_call())
+    actions = [CHECK_CALL]
+    if to_call > player.current_bet:
+        actions.insert(0, FOLD)
+    min_raise = max_raise = None
+    all_in = int(player.stack + player.current_bet)
+    if all_in > to_call and not _raise_is_capped(env, player):
+        actions.append(BET_RAISE)
+        min_raise = min(int(env._get_current_total_min_raise()), all_in)
+        max_raise = all_in
+    return ActionBounds(actions, to_call, min_raise, max_raise)
+
+
+def get_legal_actions(env, done: bool) -> Optional[LegalActions]:
+    """Returns the legal actions of the player to act, or None when done."""
+    if done:
+        return None
+    return LegalActions(**get_action_bounds(env)._asdict())
+
+
+def validate_actions(legal: Optional[Union[LegalActions, ActionBounds]],
+                     actions: Sequence[Tuple[int, float]]) -> List[Optional[str]]:
+    """Checks a batch of (what, how_much) actions against legal.
+    Returns None for each legal action and the reason for each illegal one."""
+    if legal is None:
+        return ['The hand is over, reset the environment to deal the next hand.'] * len(actions)
+    what = np.array([a[0] for a in actions], dtype=np.int64)
+    how_much = np.array([a[1] for a in actions], dtype=np.float64)
+    is_legal = np.isin(what, legal.actions)
+    is_raise = what == BET_RAISE
+    if legal.min_raise is not None:
+        in_bounds = (how_much >= legal.min_raise) & (how_much <= legal.max_raise)
+        is_legal &= ~is_raise | in_bounds
+    reasons = []
+    for w, amount, ok in zip(what, how_much, is_legal):
+        if ok:
+            reasons.append(None)
+        elif w in legal.actions:
+            reasons.append(f'Raise to {amount:g} is out of bounds [{legal.min_raise}, {legal.max_raise}].')
+        else:
+            reasons.append(f'Action {w} is not legal, legal actions are {legal.actions}.')
+    return reasons
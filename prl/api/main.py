@@ -1,15 +1,39 @@
 import uvicorn
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from environment_registry import EnvironmentRegistry
-import calls.environment.configure
-import calls.environment.reset
-import calls.environment.step
-import calls.environment.delete
-import requests
+from prl.api.environment_registry import EnvironmentRegistry
+from prl.api.admission import AdmissionController, AdmissionControlMiddleware
+from prl.api.profiler import LoopMonitor
+from prl.api.compression import CompressionMiddleware
+from prl.api.rollout import shutdown_pool
+from prl.api import calls
+import prl.api.calls.environment.configure
+import prl.api.calls.environment.reset
+import prl.api.calls.environment.step
+import prl.api.calls.environment.delete
+import prl.api.calls.environment.spectate
+import prl.api.calls.environment.state
+import prl.api.calls.environment.equity
+import prl.api.calls.environment.hands
+import prl.api.calls.environment.trace
+import prl.api.calls.environment.stats
+import prl.api.calls.environment.compression
+import prl.api.calls.environment.rollout
+import prl.api.calls.environment.observation
+import prl.api.calls.tournament.tournament
+import prl.api.calls.admin.admission
+import prl.api.calls.admin.profile
+import prl.api.calls.admin.arena
 
 app = FastAPI()
 
+# added before CORS, such that shed requests still carry CORS headers
+app.admission = AdmissionController()
+app.add_middleware(AdmissionControlMiddleware, controller=app.admission)
+# compresses responses of clients that accept prl-zstd, threshold and level are configured
+# via PRL_ZSTD_MINIMUM_SIZE and PRL_ZSTD_LEVEL, see prl/api/compression.py
+app.add_middleware(CompressionMiddleware)
+
 origins = [
     "http://localhost:1234",
     "http://localhost:8000",
@@ -24,12 +48,42 @@ app.add_middleware(
     allow_headers=["*"],
 )
 app.backend = EnvironmentRegistry()
+app.loop_monitor = LoopMonitor()
+
+
+@app.on_event("startup")
+async def start_loop_monitor():
+    app.loop_monitor.start()
+
+
+@app.on_event("shutdown")
+async def stop_loop_monitor():
+    app.loop_monitor.stop()
+
+
+@app.on_event("shutdown")
+async def stop_rollout_workers():
+    shutdown_pool()
+
 
 # register api calls
 app.include_router(calls.environment.configure.router)
 app.include_router(calls.environment.reset.router)
 app.include_router(calls.environment.step.router)
 app.include_router(calls.environment.delete.router)
+app.include_router(calls.environment.spectate.router)
+app.include_router(calls.environment.state.router)
+app.include_router(calls.environment.equity.router)
+app.include_router(calls.environment.hands.router)
+app.include_router(calls.environment.trace.router)
+app.include_router(calls.environment.stats.router)
+app.include_router(calls.environment.compression.router)
+app.include_router(calls.environment.rollout.router)
+app.include_router(calls.environment.observation.router)
+app.include_router(calls.tournament.tournament.router)
+app.include_router(calls.admin.admission.router)
+app.include_router(calls.admin.profile.router)
+app.include_router(calls.admin.arena.router)
 
 @app.get("/")
 async def root():
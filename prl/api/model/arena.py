@@ -0,0 +1,26 @@
+from typing import List, Optional
+
+from pydantic import BaseModel, Field
+
+
+class ArenaRequestBody(BaseModel):
+    policies: List[str] = Field(
+        ...,
+        example=['random', 'call'],
+        description="One policy per seat, starting at HERO. See prl.api.arena.POLICIES."
+    )
+    n_hands: int = Field(10000, example=10000, description="Number of hands to play.")
+    starting_stack_size: int = Field(20000, example=20000, description="Stack of every seat at the start of each hand.")
+    seed: int = Field(0, example=42, description="Seeds button assignment, policies and deck shuffles.")
+
+
+class ArenaSeat(BaseModel):
+    seat: int
+    policy: str
+    bb_per_100: float
+    ci_95: Optional[float] = Field(..., description="Half width of the 95% confidence interval of bb_per_100.")
+
+
+class ArenaSummary(BaseModel):
+    n_hands: int
+    seats: List[ArenaSeat]
@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import Optional, List
 
 from pydantic import BaseModel, Field
 
@@ -6,6 +6,7 @@ from pydantic import BaseModel, Field
 class EnvironmentConfigRequestBody(BaseModel):
     n_players: int
     starting_stack_size: int
+    seed: Optional[int] = None
 
     class Config:
         schema_extra = {
@@ -16,6 +17,11 @@ class EnvironmentConfigRequestBody(BaseModel):
             "starting_stack_size": {
                 "example": 20000,
                 "description": "The number of chips each player will get on resetting the environment."
+            },
+            "seed": {
+                "example": 42,
+                "description": "Seeds button assignment, random actions and deck shuffles of this environment. "
+                               "A random seed is chosen if omitted."
             }
         }
 
@@ -37,3 +43,27 @@ class EnvironmentConfig(BaseModel):
         example=20000,
         description="The number of chips each player will get on resetting the environment."
     )
+    seed: Optional[int] = Field(
+        None,
+        example=42,
+        description="The seed of the environment. Pass it to /configure again to reproduce its hands."
+    )
+
+
+class EnvironmentConfigBatchRequestBody(BaseModel):
+    configs: List[EnvironmentConfigRequestBody]
+
+    class Config:
+        schema_extra = {
+            "configs": {
+                "example": [{"n_players": 6, "starting_stack_size": 20000}],
+                "description": "One config per environment to create."
+            }
+        }
+
+
+class EnvironmentConfigBatch(BaseModel):
+    environments: List[EnvironmentConfig] = Field(
+        ...,
+        description="Created environments, in the order of the requested configs."
+    )
@@ -0,0 +1,26 @@
+from typing import Dict
+
+from pydantic import BaseModel, Field
+
+
+class PlayerEquity(BaseModel):
+    win: float
+    tie: float
+
+
+class EnvironmentEquity(BaseModel):
+    env_id: int
+    method: str = Field(
+        ...,
+        example="monte_carlo",
+        description="Either 'preflop_table' for heads-up preflop lookups or 'monte_carlo'."
+    )
+    n_samples: int = Field(
+        ...,
+        example=20000,
+        description="Number of simulated boards, 0 for table lookups."
+    )
+    players: Dict[int, PlayerEquity] = Field(
+        ...,
+        description="Win and tie probability of each player that has not folded, keyed by frontend seat."
+    )
@@ -0,0 +1,35 @@
+from typing import List, Optional, Tuple
+
+from pydantic import BaseModel, Field
+
+
+class EnvironmentRolloutRequestBody(BaseModel):
+    n_rollouts: int = Field(1000, example=1000, description="Continuations played per action.")
+    policy: str = Field('random', example='random',
+                        description="Policy of all decisions after the first action, see prl.api.arena.POLICIES.")
+    actions: Optional[List[Tuple[int, float]]] = Field(
+        None,
+        example=[[1, -1], [2, 400]],
+        description="(what, how_much) to evaluate. Defaults to fold, check/call, min raise and all-in, where legal."
+    )
+    seed: Optional[int] = Field(None, example=42)
+
+
+class ActionOutcome(BaseModel):
+    action_what: int
+    action_how_much: float
+    n: int
+    ev: float = Field(..., description="Mean chips won by the player to act, relative to the current stack.")
+    ev_bb: float
+    std: float
+    win_rate: float
+    loss_rate: float
+    p10: float
+    p50: float
+    p90: float
+
+
+class EnvironmentRollout(BaseModel):
+    env_id: int
+    player: int = Field(..., description="Frontend seat of the player to act.")
+    outcomes: List[ActionOutcome]
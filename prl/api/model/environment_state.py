@@ -1,4 +1,4 @@
-from typing import Optional, Dict
+from typing import Optional, Dict, List
 
 from pydantic import BaseModel
 
@@ -106,6 +106,23 @@ class Info(BaseModel):
     payouts: Optional[Dict[int, float]]
 
 
+class Rundown(BaseModel):
+    """Result of fast-forwarding an all-in hand to showdown.
+    `streets` holds the cards dealt on each remaining street, e.g. [[flop x3], [turn], [river]]."""
+    streets: List[List[Card]]
+    payouts: Dict[int, float]
+    stack_sizes: Dict
+
+
+class LegalActions(BaseModel):
+    """Actions the player to act may take. Raise bounds are total bets in chips, as passed to /step.
+    `to_call` is the total bet a call amounts to."""
+    actions: List[int]  # subset of [0 fold, 1 check/call, 2 raise]
+    to_call: int
+    min_raise: Optional[int]  # None if raising is not legal
+    max_raise: Optional[int]
+
+
 class EnvironmentState(BaseModel):
     # meta
     env_id: int
@@ -124,3 +141,5 @@ class EnvironmentState(BaseModel):
     game_over: bool  # whole game
     done: bool  # hand
     info: Info
+    rundown: Optional[Rundown] = None  # only set when the step was fast-forwarded
+    legal_actions: Optional[LegalActions] = None  # None when the hand is over
@@ -0,0 +1,21 @@
+from typing import List, Optional
+
+from pydantic import BaseModel, Field
+
+
+class HudStats(BaseModel):
+    hands: int
+    vpip: Optional[float] = Field(..., description="Share of hands with money voluntarily put in preflop.")
+    pfr: Optional[float] = Field(..., description="Share of hands with a preflop raise.")
+    three_bet: Optional[float] = Field(..., description="Share of 3-bets when facing a single preflop raise.")
+    aggression_factor: Optional[float] = Field(..., description="Postflop bets and raises per call.")
+    showdown_win_rate: Optional[float] = Field(..., description="Share of showdowns that paid out chips.")
+
+
+class SeatStats(HudStats):
+    seat: int = Field(..., description="Frontend seat, 0 is HERO.")
+
+
+class EnvironmentStats(BaseModel):
+    env_id: int
+    seats: List[SeatStats]
@@ -0,0 +1,52 @@
+from typing import List, Optional, Tuple
+
+from pydantic import BaseModel, Field
+
+from prl.api.model.environment_stats import HudStats
+from prl.api.tournament import DEFAULT_BLIND_LEVELS, DEFAULT_LEVEL_SECONDS
+
+
+class TournamentRequestBody(BaseModel):
+    n_entrants: int = Field(..., example=60, description="Number of players, seated at tables of six.")
+    starting_stack_size: int = Field(..., example=20000)
+    blind_levels: List[Tuple[int, int]] = Field(
+        list(DEFAULT_BLIND_LEVELS),
+        example=[[25, 50], [50, 100], [100, 200]],
+        description="(small blind, big blind) per level, the last level is kept until the end."
+    )
+    level_seconds: float = Field(DEFAULT_LEVEL_SECONDS, example=600, description="Duration of each blind level.")
+    seed: Optional[int] = Field(None, example=42, description="Seeds seating and the tables.")
+
+
+class TournamentTable(BaseModel):
+    env_id: int
+    players: List[Optional[int]] = Field(..., description="Player id per frontend seat, None for empty seats.")
+    failed: bool = Field(False, description="The table could not be dealt and is out of play.")
+
+
+class TournamentStatus(BaseModel):
+    tournament_id: int
+    level: int
+    small_blind: int
+    big_blind: int
+    n_entrants: int
+    n_remaining: int
+    finished: bool
+    tables: List[TournamentTable]
+    standings: List[int] = Field(..., description="Player ids, leader first, eliminated players by elimination.")
+
+
+class TournamentPlayer(BaseModel):
+    player_id: int
+    chips: int
+    env_id: Optional[int] = Field(..., description="Table of the player, None once eliminated.")
+    seat: Optional[int] = Field(..., description="Frontend seat at env_id, the player acts when p_acts_next == seat.")
+
+
+class TournamentPlayerStats(HudStats):
+    player_id: int
+
+
+class TournamentStats(BaseModel):
+    tournament_id: int
+    players: List[TournamentPlayerStats] = Field(..., description="Players that played at least one hand.")
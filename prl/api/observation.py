@@ -0,0 +1,75 @@
+"""Preallocated float32 observations and their layout.
+
+Every session copies each observation of its environment once into an ObservationBuffer, converting
+it to float32 on the way. The decoders of utils.py, the fingerprints of recorded hands and
+GET /environment/{env_id}/observation all read views of that buffer, instead of new arrays per step.
+
+The buffer has two slots. The decoders of a LazyState may run long after the request that created
+it, e.g. when GET /state asks for the last state, so the slot of the last emitted state is pinned and
+observations are written to the other slot until the next state is emitted. This also keeps the last
+state decodable while /step runs, e.g. its rundown compares the board before and after stepping.
+
+ObservationLayout holds the indices the decoders need, looked up once per environment instead of
+searching the observation keys on every decode.
+"""
+import re
+from typing import List
+
+import numpy as np
+
+OBS_DTYPE = np.float32
+MAX_PLAYERS = 6
+TABLE_KEYS = ('ante', 'small_blind', 'big_blind', 'min_raise', 'pot_amt', 'total_to_call',
+              'round_preflop', 'round_flop', 'round_turn', 'round_river')
+
+
+class ObservationLayout:
+    __slots__ = ('size', 'table', 'side_pots', 'players', 'player_keys', 'player_cards',
+                 'idx_board_start', 'idx_board_end')
+
+    def __init__(self, obs_keys: List[str]):
+        index = {key: i for i, key in enumerate(obs_keys)}
+        self.size = len(obs_keys)
+        self.table = {key: index[key] for key in TABLE_KEYS}
+        self.side_pots = [index[f'side_pot_{pid}'] for pid in range(MAX_PLAYERS)]
+        # slices are relative to the acting player, p0 is the player to act
+        self.players = [slice(index[f'stack_p{i}'], index[f'side_pot_rank_p{i}_is_5'] + 1)
+                        for i in range(MAX_PLAYERS)]
+        self.player_keys = [re.sub(r'p\d', 'p', key) for key in obs_keys[self.players[0]]]
+        self.player_cards = [(index[f'{pid}th_player_card_0_rank_0'], index[f'{pid}th_player_card_1_suit_3'] + 1)
+                             for pid in range(MAX_PLAYERS)]
+        self.idx_board_start = index['0th_board_card_rank_0']
+        self.idx_board_end = index['0th_player_card_0_rank_0']
+
+
+def _read_only(array: np.ndarray) -> np.ndarray:
+    view = array.view()
+    view.flags.writeable = False
+    return view
+
+
+class ObservationBuffer:
+    __slots__ = ('_slots', '_pinned')
+
+    def __init__(self, size: int):
+        self._slots = np.zeros((2, size), dtype=OBS_DTYPE)
+        self._pinned = 0
+
+    @property
+    def size(self) -> int:
+        return self._slots.shape[1]
+
+    def write(self, obs) -> np.ndarray:
+        """Copies obs into the unpinned slot, overwriting what was written since the last pin.
+        Returns a read-only view of the slot."""
+        slot = self._slots[1 - self._pinned]
+        np.copyto(slot, obs, casting='same_kind')
+        return _read_only(slot)
+
+    def pin(self):
+        """Pins the last written observation, i.e. the one of the state being emitted."""
+        self._pinned = 1 - self._pinned
+
+    def pinned(self) -> np.ndarray:
+        """Read-only view of the observation of the last emitted state."""
+        return _read_only(self._slots[self._pinned])
@@ -0,0 +1,118 @@
+"""Incremental HUD statistics of the players at a table.
+
+Counters are kept in a single int64 array indexed by [frontend seat, counter] and updated on every
+/reset and /step, so reading stats never re-scans hand histories. The per hand flags make sure VPIP
+and PFR count at most once per hand. Counters of a table are kept per seat, so they describe
+whoever sits there. Where seats are known to belong to players, e.g. in a tournament, the table
+forwards every update to an aggregate with one row per player, summed over all tables they played.
+"""
+from typing import Optional, Sequence
+
+import numpy as np
+
+from prl.api.legal_actions import CHECK_CALL, BET_RAISE
+
+MAX_PLAYERS = 6
+NO_PLAYER = -1
+# counters
+HANDS = 0
+VPIP = 1
+PFR = 2
+THREE_BET = 3
+THREE_BET_OPPORTUNITIES = 4
+POSTFLOP_BETS_RAISES = 5
+POSTFLOP_CALLS = 6
+SHOWDOWNS = 7
+SHOWDOWNS_WON = 8
+N_COUNTERS = 9
+# per hand flags
+_VPIP = 0
+_PFR = 1
+_THREE_BET_OPPORTUNITY = 2
+
+
+def _ratio(numerator: np.ndarray, denominator: np.ndarray) -> list:
+    """Element-wise ratio, None where the denominator is 0."""
+    return [float(n) / d if d else None for n, d in zip(numerator, denominator)]
+
+
+class PlayerStats:
+    __slots__ = ('counts', 'aggregate', 'players', '_hand_flags', '_n_raises_preflop')
+
+    def __init__(self, n_rows: int = MAX_PLAYERS):
+        """n_rows are seats of a table, or players of an aggregate."""
+        self.counts = np.zeros((n_rows, N_COUNTERS), dtype=np.int64)
+        # aggregate PlayerStats and the row of the player in each seat, NO_PLAYER for seats of nobody
+        self.aggregate: Optional['PlayerStats'] = None
+        self.players: Optional[np.ndarray] = None
+        self._hand_flags = np.zeros((n_rows, 3), dtype=bool)
+        self._n_raises_preflop = 0
+
+    def set_players(self, aggregate: 'PlayerStats', players: Sequence[int]):
+        """Forwards updates of each seat to the row of its player in aggregate, from the next hand on."""
+        self.aggregate = aggregate
+        self.players = np.array(players, dtype=np.int64)
+
+    def _add(self, seat: int, counter: int):
+        self.counts[seat, counter] += 1
+        if self.aggregate is not None and self.players[seat] != NO_PLAYER:
+            self.aggregate.counts[self.players[seat], counter] += 1
+
+    def start_hand(self, seats: Sequence[int]):
+        """seats are the frontend seats dealt into the hand, e.g. session.mapped_indices."""
+        self._hand_flags[:] = False
+        self._n_raises_preflop = 0
+        for seat in seats:
+            self._add(seat, HANDS)
+
+    def record_action(self, seat: int, what: int, preflop: bool, facing_bet: bool):
+        """Records action what of seat, as executed by the environment.
+        facing_bet tells whether seat had something to call, i.e. whether a call was not a check."""
+        flags = self._hand_flags[seat]
+        if preflop:
+            if self._n_raises_preflop == 1 and not flags[_THREE_BET_OPPORTUNITY]:
+                flags[_THREE_BET_OPPORTUNITY] = True
+                self._add(seat, THREE_BET_OPPORTUNITIES)
+            voluntary = what == BET_RAISE or (what == CHECK_CALL and facing_bet)
+            if voluntary and not flags[_VPIP]:
+                flags[_VPIP] = True
+                self._add(seat, VPIP)
+            if what == BET_RAISE:
+                if not flags[_PFR]:
+                    flags[_PFR] = True
+                    self._add(seat, PFR)
+                if self._n_raises_preflop == 1:
+                    self._add(seat, THREE_BET)
+                self._n_raises_preflop += 1
+        elif what == BET_RAISE:
+            self._add(seat, POSTFLOP_BETS_RAISES)
+        elif what == CHECK_CALL and facing_bet:
+            self._add(seat, POSTFLOP_CALLS)
+
+    def end_hand(self, seats: Sequence[int], folded: Sequence[bool], payouts: dict):
+        """seats and folded are indexed by backend pid, payouts are keyed by frontend seat.
+        A hand goes to showdown when more than one player has not folded."""
+        remaining = [seat for seat, has_folded in zip(seats, folded) if not has_folded]
+        if len(remaining) < 2:
+            return
+        for seat in remaining:
+            self._add(seat, SHOWDOWNS)
+            if payouts.get(seat, 0) > 0:
+                self._add(seat, SHOWDOWNS_WON)
+
+    def summary(self, key: str = 'seat') -> list:
+        """Returns the stats of every row that played at least one hand, with the row under key."""
+        c = self.counts.T
+        hands = c[HANDS]
+        vpip, pfr = _ratio(c[VPIP], hands), _ratio(c[PFR], hands)
+        three_bet = _ratio(c[THREE_BET], c[THREE_BET_OPPORTUNITIES])
+        aggression = _ratio(c[POSTFLOP_BETS_RAISES], c[POSTFLOP_CALLS])
+        showdown_win_rate = _ratio(c[SHOWDOWNS_WON], c[SHOWDOWNS])
+        return [{key: row,
+                 'hands': int(hands[row]),
+                 'vpip': vpip[row],
+                 'pfr': pfr[row],
+                 'three_bet': three_bet[row],
+                 'aggression_factor': aggression[row],
+                 'showdown_win_rate': showdown_win_rate[row]}
+                for row in range(len(self.counts)) if hands[row]]
@@ -0,0 +1,196 @@
+"""Live diagnostics of a running worker.
+
+`sample_stacks` is a sampling profiler: it periodically reads the current frame of every other
+thread and counts identical call stacks. Its output is in collapsed format, one stack per line,
+ready for flamegraph.pl or speedscope. The sampled threads are not instrumented, so the overhead
+on the event loop is only the time the sampler holds the GIL.
+
+`TableTrace` records how long the stages of /reset and /step take, for a single table.
+
+`LoopMonitor` measures event loop lag continuously. A watchdog thread notices when the loop has not
+ticked for longer than a threshold, and attributes the stall to the handler running on the loop
+at that moment, with its route, env_id and call stack.
+"""
+import asyncio
+import bisect
+import os
+import sys
+import threading
+import time
+from collections import Counter, deque
+from typing import Dict, Optional
+
+MAX_TRACED_STEPS = 1000
+
+
+def _frame_name(frame) -> str:
+    code = frame.f_code
+    return f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})'
+
+
+def sample_stacks(duration: float, interval: float) -> Counter:
+    """Samples the call stacks of all other threads for duration seconds, every interval seconds.
+    Returns counts of collapsed stacks 'thread;outermost;...;innermost'."""
+    own_id = threading.get_ident()
+    thread_names = {t.ident: t.name for t in threading.enumerate()}
+    samples = Counter()
+    end = time.monotonic() + duration
+    while time.monotonic() < end:
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own_id:
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(_frame_name(frame))
+                frame = frame.f_back
+            stack.append(thread_names.get(thread_id, str(thread_id)))
+            samples[';'.join(reversed(stack))] += 1
+        time.sleep(interval)
+    return samples
+
+
+def collapse(samples: Counter) -> str:
+    return '\n'.join(f'{stack} {count}' for stack, count in samples.most_common())
+
+
+class TableTrace:
+    """Durations of the stages of the most recent requests of one table.
+    A handler calls begin() once and lap(stage) at the end of each stage."""
+
+    def __init__(self, max_len: int = MAX_TRACED_STEPS):
+        self.max_len = max_len
+        self.stages: Dict[str, deque] = {}
+        self._last = 0.
+
+    def begin(self):
+        self._last = time.perf_counter()
+
+    def lap(self, stage: str):
+        now = time.perf_counter()
+        durations = self.stages.get(stage)
+        if durations is None:
+            durations = self.stages[stage] = deque(maxlen=self.max_len)
+        durations.append(now - self._last)
+        self._last = now
+
+    def summary(self) -> dict:
+        summary = {}
+        for name, durations in self.stages.items():
+            ms = sorted(d * 1000 for d in durations)
+            summary[name] = {'count': len(ms),
+                             'mean_ms': sum(ms) / len(ms),
+                             'p50_ms': ms[len(ms) // 2],
+                             'p99_ms': ms[min(len(ms) - 1, int(len(ms) * 0.99))],
+                             'max_ms': ms[-1]}
+        return summary
+
+
+class _NoTrace:
+    """Stands in for TableTrace on tables that are not traced."""
+
+    def begin(self):
+        pass
+
+    def lap(self, stage: str):
+        pass
+
+
+NO_TRACE = _NoTrace()
+
+
+LAG_BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000)
+LOOP_TICK = 0.05  # seconds
+BLOCKING_THRESHOLD = 0.1  # seconds
+MAX_BLOCKING_EVENTS = 100
+
+
+def _find_handler(frame):
+    """Returns (route, env_id) of the innermost frame that has a starlette request, else (None, None)."""
+    while frame is not None:
+        request = frame.f_locals.get('request')
+        scope = getattr(request, 'scope', None)
+        if isinstance(scope, dict):
+            route = getattr(scope.get('route'), 'path', None) or scope.get('path')
+            return route, frame.f_locals.get('env_id')
+        frame = frame.f_back
+    return None, None
+
+
+class LoopMonitor:
+    """Lag histogram of the event loop and the handlers that blocked it longest.
+    Call start() from within the running loop, e.g. on app startup."""
+
+    def __init__(self, tick: float = LOOP_TICK, threshold: float = BLOCKING_THRESHOLD,
+                 max_events: int = MAX_BLOCKING_EVENTS):
+        self.tick = tick
+        self.threshold = threshold
+        # one count per bucket of LAG_BUCKETS_MS, the last one counts lags above all buckets
+        self.lag_counts = [0] * (len(LAG_BUCKETS_MS) + 1)
+        self.max_lag_ms = 0.
+        self.events = deque(maxlen=max_events)
+        # (route, env_id) -> [number of stalls, total ms]
+        self.by_handler: Dict[tuple, list] = {}
+        self._heartbeat = time.perf_counter()
+        self._open_event: Optional[dict] = None
+        self._loop_thread_id = None
+        self._task = None
+        self._stopped = threading.Event()
+
+    def start(self):
+        self._loop_thread_id = threading.get_ident()
+        self._heartbeat = time.perf_counter()
+        self._task = asyncio.get_running_loop().create_task(self._tick())
+        threading.Thread(target=self._watch, name='loop-watchdog', daemon=True).start()
+
+    def stop(self):
+        self._stopped.set()
+        if self._task is not None:
+            self._task.cancel()
+
+    async def _tick(self):
+        while True:
+            self._heartbeat = time.perf_counter()
+            await asyncio.sleep(self.tick)
+            self.record_lag(time.perf_counter() - self._heartbeat - self.tick)
+
+    def record_lag(self, lag: float):
+        lag_ms = max(lag, 0.) * 1000
+        self.lag_counts[bisect.bisect_left(LAG_BUCKETS_MS, lag_ms)] += 1
+        self.max_lag_ms = max(self.max_lag_ms, lag_ms)
+        event, self._open_event = self._open_event, None
+        if event is not None:
+            # the stall is over, now its duration is known
+            event['lag_ms'] = lag_ms
+            stats = self.by_handler.setdefault((event['route'], event['env_id']), [0, 0.])
+            stats[0] += 1
+            stats[1] += lag_ms
+
+    def _watch(self):
+        while not self._stopped.wait(self.threshold / 2):
+            heartbeat = self._heartbeat
+            stalled = time.perf_counter() - heartbeat - self.tick
+            if stalled < self.threshold or self._open_event is not None:
+                continue
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is None:
+                continue
+            route, env_id = _find_handler(frame)
+            stack = []
+            while frame is not None:
+                stack.append(_frame_name(frame))
+                frame = frame.f_back
+            self._open_event = {'route': route,
+                                'env_id': env_id,
+                                'stack': ';'.join(reversed(stack)),
+                                'lag_ms': None}  # set when the loop ticks again
+            self.events.append(self._open_event)
+
+    def summary(self) -> dict:
+        return {'threshold_ms': self.threshold * 1000,
+                'max_lag_ms': self.max_lag_ms,
+                'histogram': {'le_ms': list(LAG_BUCKETS_MS) + [None],
+                              'counts': list(self.lag_counts)},
+                'by_handler': [{'route': route, 'env_id': env_id, 'count': count, 'total_ms': total_ms}
+                               for (route, env_id), (count, total_ms)
+                               in sorted(self.by_handler.items(), key=lambda item: -item[1][1])],
+                'events': list(self.events)}
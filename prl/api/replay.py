@@ -0,0 +1,69 @@
+"""Headless replay of recorded hands.
+
+Hands recorded by the API (see GET /environment/{env_id}/hands) are re-executed directly on the
+environment, without HTTP or pydantic, and each resulting state is compared against its recorded
+fingerprint. Use it to reproduce production bugs or to run regression corpora:
+
+    python -m prl.api.replay hands.jsonl
+"""
+import json
+import sys
+from dataclasses import dataclass
+from typing import Iterable, List, Optional
+
+from prl.api.environment_registry import build_environment, apply_starting_stacks
+from prl.api.hand_history import HandRecord, fingerprint, reset_seeded
+
+
+@dataclass
+class ReplayResult:
+    ok: bool
+    n_steps: int
+    mismatch_at: Optional[int] = None  # index of the first step that diverged
+    expected: Optional[list] = None
+    actual: Optional[list] = None
+
+
+class ReplayEngine:
+    def __init__(self):
+        # n_players -> environment, reused across hands like the sessions of the API do
+        self._envs = {}
+
+    def _get_environment(self, n_players: int, starting_stacks: List[int]):
+        env = self._envs.get(n_players)
+        if env is not None:
+            apply_starting_stacks(env, starting_stacks)
+        else:
+            env = build_environment(n_players, starting_stacks)
+            self._envs[n_players] = env
+        return env
+
+    def replay_hand(self, record: HandRecord) -> ReplayResult:
+        env = self._get_environment(record.n_players, record.starting_stacks)
+        reset_seeded(env, record.deck_seed)
+        for i, step in enumerate(record.steps):
+            obs, _, done, _ = env.step(tuple(step.action))
+            actual = fingerprint(env, obs, done)
+            if actual != step.fingerprint:
+                return ReplayResult(ok=False, n_steps=i + 1, mismatch_at=i,
+                                    expected=step.fingerprint, actual=actual)
+        return ReplayResult(ok=True, n_steps=len(record.steps))
+
+    def replay_corpus(self, records: Iterable[HandRecord]) -> List[ReplayResult]:
+        return [self.replay_hand(record) for record in records]
+
+
+def load_records(path: str) -> List[HandRecord]:
+    """Reads hand records from a file with one json record per line."""
+    with open(path) as f:
+        return [HandRecord.from_dict(json.loads(line)) for line in f if line.strip()]
+
+
+if __name__ == '__main__':
+    results = ReplayEngine().replay_corpus(load_records(sys.argv[1]))
+    failed = [(i, r) for i, r in enumerate(results) if not r.ok]
+    for i, result in failed:
+        print(f'hand {i} diverged at step {result.mismatch_at}: '
+              f'expected {result.expected}, got {result.actual}')
+    print(f'{len(results) - len(failed)}/{len(results)} hands reproduced')
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,119 @@
+"""Lookahead rollouts from the current state of a table.
+
+The state of the PokerRL environment is snapshot with `state_dict()`, which holds only seats, pots,
+board and deck, not the lut holder or the observation wrapper. Worker processes keep one unwrapped
+environment per seat count, load the snapshot into it and play N continuations per candidate action,
+with the undealt deck reshuffled for every continuation. Blinds are not part of the snapshot, the
+workers get those of the table, e.g. of the current tournament level. The table itself is never touched.
+"""
+import math
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, Future
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from prl.api.legal_actions import FOLD, CHECK_CALL, BET_RAISE, get_action_bounds
+
+ROLLOUT_WORKERS = os.cpu_count()
+# the API process runs threads (env builds, loop monitor), forking it could copy held locks
+MP_CONTEXT = 'forkserver'
+ROLLOUT_CHUNK = 250
+PERCENTILES = (10, 50, 90)
+
+_pool: Optional[ProcessPoolExecutor] = None
+# worker process state, n_players -> unwrapped environment
+_envs: Dict[int, object] = {}
+
+
+def get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=ROLLOUT_WORKERS, mp_context=multiprocessing.get_context(MP_CONTEXT))
+    return _pool
+
+
+def shutdown_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+def snapshot(env) -> dict:
+    """env is the unwrapped environment of a running hand, i.e. `session.env.env`."""
+    return env.state_dict()
+
+
+def default_actions(legal) -> List[Tuple[int, float]]:
+    """Candidate actions of the player to act: fold, check/call, min raise and all-in, as far as legal."""
+    actions = [(what, -1) for what in (FOLD, CHECK_CALL) if what in legal.actions]
+    if BET_RAISE in legal.actions:
+        actions += [(BET_RAISE, raise_to) for raise_to in sorted({legal.min_raise, legal.max_raise})]
+    return actions
+
+
+def _get_environment(n_players: int):
+    env = _envs.get(n_players)
+    if env is None:
+        from prl.api.environment_registry import build_environment
+        env = _envs[n_players] = build_environment(n_players, [1] * n_players).env
+    return env
+
+
+def _shuffle_deck(env, rng: np.random.Generator):
+    # without a reshuffle every continuation would deal the same runout, so a missing deck must fail
+    deck = env.deck.deck_remaining
+    env.deck.deck_remaining = deck[rng.permutation(len(deck))]
+
+
+def rollout_chunk(state: dict, n_players: int, blinds: Tuple[int, int], action: Tuple[int, float],
+                  policy_name: str, n: int, seed: int) -> np.ndarray:
+    """Plays n continuations that start with action, the other decisions are taken by the policy.
+    Returns the chips won or lost by the acting player, per continuation."""
+    from prl.api.arena import load_policy
+
+    env = _get_environment(n_players)
+    # min raise and legality depend on the blinds, the environments are shared by all tables
+    env.SMALL_BLIND, env.BIG_BLIND = blinds
+    policy = load_policy(policy_name)
+    rng = np.random.default_rng(seed)
+    outcomes = np.empty(n, dtype=np.float64)
+    for i in range(n):
+        env.load_state_dict(state)
+        _shuffle_deck(env, rng)
+        pid = env.current_player.seat_id
+        start_stack = env.seats[pid].stack
+        obs, _, done, _ = env.step(action)
+        while not done:
+            obs, _, done, _ = env.step(policy(obs, get_action_bounds(env), rng))
+        outcomes[i] = env.seats[pid].stack - start_stack
+    return outcomes
+
+
+def submit_rollouts(state: dict, n_players: int, blinds: Tuple[int, int], actions: Sequence[Tuple[int, float]],
+                    policy_name: str, n_rollouts: int, seed: int) -> List[List[Future]]:
+    """Splits n_rollouts per action into chunks on the pool. Returns the futures per action.
+    blinds are (small blind, big blind) of the table."""
+    n_chunks = math.ceil(n_rollouts / ROLLOUT_CHUNK)
+    seeds = np.random.SeedSequence(seed).spawn(len(actions) * n_chunks)
+    pool = get_pool()
+    futures = []
+    for a, action in enumerate(actions):
+        sizes = [ROLLOUT_CHUNK] * (n_chunks - 1) + [n_rollouts - ROLLOUT_CHUNK * (n_chunks - 1)]
+        futures.append([pool.submit(rollout_chunk, state, n_players, tuple(blinds), tuple(action), policy_name, size,
+                                    int(seeds[a * n_chunks + c].generate_state(1)[0]))
+                        for c, size in enumerate(sizes)])
+    return futures
+
+
+def summarize(outcomes: np.ndarray, big_blind: float) -> dict:
+    p10, p50, p90 = np.percentile(outcomes, PERCENTILES)
+    return {'n': len(outcomes),
+            'ev': float(outcomes.mean()),
+            'ev_bb': float(outcomes.mean() / big_blind),
+            'std': float(outcomes.std()),
+            'win_rate': float(np.mean(outcomes > 0)),
+            'loss_rate': float(np.mean(outcomes < 0)),
+            'p10': float(p10), 'p50': float(p50), 'p90': float(p90)}
@@ -0,0 +1,16 @@
+"""Cards dealt while fast-forwarding an all-in hand to showdown, see `fast_forward` of /step."""
+from typing import List
+
+from prl.api.model.environment_state import Board, Card
+
+
+def get_rundown_streets(board_before: Board, board_after: Board) -> List[List[Card]]:
+    """Splits the board cards dealt between two states into streets.
+    Returns a list of the new cards of each street, e.g. [[turn], [river]] for an all-in on the flop."""
+    n_before = len([card for _, card in board_before if card.rank >= 0])
+    cards_after = [card for _, card in board_after if card.rank >= 0]
+    streets = []
+    for street_start, street_end in [(0, 3), (3, 4), (4, 5)]:
+        if n_before <= street_start and street_end <= len(cards_after):
+            streets.append(cards_after[street_start:street_end])
+    return streets
@@ -0,0 +1,113 @@
+"""Per-table state of the backend.
+
+One EnvironmentSession is kept per env_id, such that each request needs a single lookup
+into the EnvironmentRegistry. Seat state is array-backed, all arrays are indexed by
+ - backend pid (relative to the BTN), for `mapped_indices`
+ - frontend seat (relative to HERO), for `last_stack_sizes`
+"""
+from array import array
+from collections import deque
+from typing import Optional, Any
+
+import numpy as np
+
+from prl.api.hand_history import HandRecord, StepRecord, fingerprint
+from prl.api.idempotency import ResponseRing
+from prl.api.observation import ObservationBuffer, ObservationLayout
+from prl.api.player_stats import PlayerStats
+from prl.api.spectators import SpectatorChannel
+
+MAX_PLAYERS = 6
+NO_SEAT = -1
+MAX_RECORDED_HANDS = 50
+
+
+class EnvironmentSession:
+    __slots__ = ('env', 'env_shells',
+                 # randomness and recorded hands, for reproducing them with prl.api.replay
+                 'seed', 'rng', 'hands',
+                 # PlayerStats of this table
+                 'stats',
+                 # TableTrace while tracing is enabled for this table, else None
+                 'trace',
+                 # Tournament owning this table and its (small blind, big blind), else None
+                 'tournament', 'blinds',
+                 # seats
+                 'initial_state', 'button_index', 'sb', 'bb', 'mapped_indices', 'last_stack_sizes',
+                 # LegalActions of the player to act, None when no hand is running
+                 'legal_actions',
+                 # ObservationLayout, valid until the environment is rebuilt, and ObservationBuffer
+                 'layout', 'observation',
+                 # emitted states
+                 'state_version', 'last_state', 'state_bytes', 'responses', 'spectators')
+
+    def __init__(self, env: Any, seed: Optional[int] = None):
+        self.env = env
+        # unseeded tables get a random seed, so that every hand can be reproduced
+        self.seed = int(np.random.SeedSequence().entropy % 2 ** 32) if seed is None else seed
+        self.rng = np.random.default_rng(self.seed)
+        self.hands = deque(maxlen=MAX_RECORDED_HANDS)
+        self.stats = PlayerStats()
+        self.trace = None
+        self.tournament = None
+        self.blinds = None
+        # n_players -> environment built for that many seats, reused across hands
+        self.env_shells = {}
+        self.initial_state = True
+        self.button_index = NO_SEAT
+        self.sb = NO_SEAT
+        self.bb = NO_SEAT
+        # backend pid -> frontend seat, has one entry per player still in the game
+        self.mapped_indices = array('b')
+        # frontend seat -> stack at the end of the last emitted state, None before the first hand
+        self.last_stack_sizes: Optional[array] = None
+        self.legal_actions = None
+        self.layout: Optional[ObservationLayout] = None
+        self.observation: Optional[ObservationBuffer] = None
+        self.state_version = 0
+        # LazyState of the last /reset or /step
+        self.last_state = None
+        self.state_bytes: Optional[bytes] = None
+        self.responses = ResponseRing()
+        self.spectators = SpectatorChannel()
+
+    def update_layout(self):
+        """Caches observation indices. Must be called whenever the environment is rebuilt.
+        The observation buffer is only reallocated if the size of observations changed."""
+        self.layout = ObservationLayout(list(self.env.obs_idx_dict.keys()))
+        if self.observation is None or self.observation.size != self.layout.size:
+            self.observation = ObservationBuffer(self.layout.size)
+
+    def set_stack_sizes(self, stack_sizes: dict):
+        """Stores stacks given as {'p0': ..., 'p5': ...} relative to HERO."""
+        self.last_stack_sizes = array('l', [int(s) for s in stack_sizes.values()])
+
+    def stack_sizes(self) -> dict:
+        """Returns last stacks as {'p0': ..., 'p5': ...} relative to HERO, as used in EnvironmentState."""
+        return {f'p{seat}': stack for seat, stack in enumerate(self.last_stack_sizes)}
+
+    def start_hand(self, n_players: int, starting_stacks: list) -> int:
+        """Starts recording the hand. Returns the seed of its deck, to reset with `hand_history.reset_seeded`."""
+        deck_seed = int(self.rng.integers(2 ** 32))
+        self.hands.append(HandRecord(n_players=n_players,
+                                     starting_stacks=[int(s) for s in starting_stacks],
+                                     deck_seed=deck_seed,
+                                     button_index=self.button_index))
+        return deck_seed
+
+    def record_step(self, action, obs, done):
+        """Records action as passed to env.step and a fingerprint of the resulting state.
+        obs is the view returned by `observation.write`, the fingerprint reads it in place."""
+        if self.hands:
+            self.hands[-1].steps.append(StepRecord(action=[int(action[0]), float(action[1])],
+                                                   fingerprint=fingerprint(self.env, obs, done)))
+
+    def emit_state(self, state):
+        """Stores LazyState state as the latest state of the table and publishes it to spectators.
+        Its observation must be the last one written to `observation`.
+        Decoding and serialization for GET /state is deferred until the state is actually requested."""
+        self.state_version += 1
+        self.observation.pin()
+        self.last_state = state
+        self.state_bytes = None
+        self.spectators.publish(state)
@@ -0,0 +1,197 @@
+"""Soak test of the in-process app, for slow leaks and latency drift.
+
+Churns tables through configure, reset, step until done and delete for a given duration, with
+requests going through the full ASGI stack but no network. Every sample interval it records RSS,
+the allocators that grew most since the baseline (tracemalloc), the object types that grew most
+(gc) and per route latency percentiles. The baseline is taken after a warmup, such that caches
+and environment shells filled once do not count as leaks. Fails if the last sample exceeds the
+budgets, one json sample per line is appended to an optional file:
+
+    python -m prl.api.soak --hours 2 --tables 16 --out soak.jsonl
+"""
+import argparse
+import asyncio
+import gc
+import json
+import os
+import resource
+import sys
+import time
+import tracemalloc
+from collections import Counter, defaultdict
+from dataclasses import dataclass, asdict
+from typing import Dict, List, Optional
+
+N_TOP = 10
+TRACEBACK_DEPTH = 5
+MAX_STEPS_PER_HAND = 200
+
+
+@dataclass
+class SoakBudget:
+    max_rss_growth_mb: float = 50.
+    max_traced_growth_mb: float = 20.
+    max_object_growth: int = 10_000  # per type
+    max_p99_drift: float = 2.  # last p99 / baseline p99, per route
+
+
+def rss_mb() -> float:
+    """Current resident set size. Where /proc is not available, e.g. on macOS, this is the peak
+    resident set size instead, which only grows, so RSS growth is measured from peak to peak."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2 ** 20
+    except OSError:
+        max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # bytes on macOS, kilobytes elsewhere
+        return max_rss / 2 ** 20 if sys.platform == 'darwin' else max_rss / 2 ** 10
+
+
+def count_objects() -> Counter:
+    return Counter(type(o).__name__ for o in gc.get_objects())
+
+
+def percentiles(latencies: List[float]) -> dict:
+    ms = sorted(latency * 1000 for latency in latencies)
+    if not ms:
+        return {'count': 0}
+    return {'count': len(ms), 'p50_ms': ms[len(ms) // 2], 'p99_ms': ms[min(len(ms) - 1, int(len(ms) * 0.99))]}
+
+
+def check_budgets(baseline: dict, sample: dict, budget: SoakBudget) -> List[str]:
+    """Returns a violation message per exceeded budget, comparing sample against baseline."""
+    violations = []
+    rss_growth = sample['rss_mb'] - baseline['rss_mb']
+    if rss_growth > budget.max_rss_growth_mb:
+        violations.append(f'RSS grew by {rss_growth:.1f}MB, budget is {budget.max_rss_growth_mb}MB.')
+    traced_growth = sample['traced_mb'] - baseline['traced_mb']
+    if traced_growth > budget.max_traced_growth_mb:
+        violations.append(f'Traced memory grew by {traced_growth:.1f}MB, budget is {budget.max_traced_growth_mb}MB, '
+                          f'top allocators: {sample["top_allocators"][:3]}')
+    for name, growth in sample['object_growth'].items():
+        if growth > budget.max_object_growth:
+            violations.append(f'{growth} more {name} objects, budget is {budget.max_object_growth}.')
+    for route, latency in sample['latency'].items():
+        base = baseline['latency'].get(route, {}).get('p99_ms')
+        if base and latency.get('p99_ms', 0) > base * budget.max_p99_drift:
+            violations.append(f'p99 of {route} drifted from {base:.2f}ms to {latency["p99_ms"]:.2f}ms.')
+    return violations
+
+
+class Soak:
+    def __init__(self, n_tables: int, n_players: int, starting_stack_size: int):
+        self.n_tables = n_tables
+        self.n_players = n_players
+        self.starting_stack_size = starting_stack_size
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.baseline_snapshot = None
+        self.baseline_objects: Optional[Counter] = None
+
+    async def _timed(self, route: str, call):
+        start = time.perf_counter()
+        result = await call
+        self.latencies[route].append(time.perf_counter() - start)
+        return result
+
+    async def _play_table(self, client, env_id: int, n_hands: int):
+        for _ in range(n_hands):
+            state = await self._timed('reset', client.reset(env_id))
+            for _ in range(MAX_STEPS_PER_HAND):
+                if state.done:
+                    break
+                # -1 lets the server pick a random legal action
+                state = await self._timed('step', client.step(env_id, action=-1))
+
+    async def churn(self, client, n_hands: int):
+        """Creates n_tables tables, plays n_hands on each of them concurrently and deletes them."""
+        configs = [{'n_players': self.n_players, 'starting_stack_size': self.starting_stack_size}] * self.n_tables
+        env_ids = await self._timed('configure', client.configure_many(configs))
+        await asyncio.gather(*(self._play_table(client, env_id, n_hands) for env_id in env_ids))
+        for env_id in env_ids:
+            await self._timed('delete', client.delete(env_id))
+
+    def sample(self, elapsed: float) -> dict:
+        gc.collect()
+        snapshot = tracemalloc.take_snapshot()
+        objects = count_objects()
+        sample = {'elapsed_s': elapsed,
+                  'rss_mb': rss_mb(),
+                  'traced_mb': tracemalloc.get_traced_memory()[0] / 2 ** 20,
+                  'latency': {route: percentiles(latencies) for route, latencies in self.latencies.items()},
+                  'top_allocators': [],
+                  'object_growth': {}}
+        if self.baseline_snapshot is None:
+            self.baseline_snapshot, self.baseline_objects = snapshot, objects
+        else:
+            diff = snapshot.compare_to(self.baseline_snapshot, 'traceback')[:N_TOP]
+            sample['top_allocators'] = [{'size_diff_kb': stat.size_diff / 1024,
+                                         'count_diff': stat.count_diff,
+                                         'where': str(stat.traceback[-1])} for stat in diff]
+            objects.subtract(self.baseline_objects)
+            sample['object_growth'] = {name: growth for name, growth in objects.most_common(N_TOP) if growth > 0}
+        self.latencies.clear()
+        return sample
+
+    async def run(self, app, duration: float, warmup: float, sample_interval: float,
+                  budget: SoakBudget, hands_per_churn: int = 5, out=None) -> List[str]:
+        import httpx
+
+        from prl.api.client import PrlClient
+
+        tracemalloc.start(TRACEBACK_DEPTH)
+        start = time.monotonic()
+        baseline = None
+        next_sample = start + warmup
+        async with PrlClient('http://soak', compress=False, transport=httpx.ASGITransport(app=app)) as client:
+            while True:
+                await self.churn(client, hands_per_churn)
+                now = time.monotonic()
+                if now < next_sample:
+                    continue
+                sample = self.sample(now - start)
+                if out:
+                    out.write(json.dumps(sample) + '\n')
+                    out.flush()
+                if baseline is None:
+                    baseline = sample
+                elif now - start >= duration:
+                    return check_budgets(baseline, sample, budget)
+                next_sample = now + sample_interval
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Churns tables on the in-process app and checks for leaks.')
+    parser.add_argument('--hours', type=float, default=1.)
+    parser.add_argument('--warmup-minutes', type=float, default=2.)
+    parser.add_argument('--sample-minutes', type=float, default=5.)
+    parser.add_argument('--tables', type=int, default=16)
+    parser.add_argument('--players', type=int, default=6)
+    parser.add_argument('--starting-stack-size', type=int, default=20000)
+    parser.add_argument('--out', default=None)
+    for name, default in asdict(SoakBudget()).items():
+        parser.add_argument('--' + name.replace('_', '-'), type=type(default), default=default)
+    args = parser.parse_args()
+    budget = SoakBudget(**{name: getattr(args, name) for name in asdict(SoakBudget())})
+
+    from prl.api.main import app
+
+    soak = Soak(args.tables, args.players, args.starting_stack_size)
+    out = open(args.out, 'a') if args.out else None
+    try:
+        violations = asyncio.run(soak.run(app,
+                                          duration=args.hours * 3600,
+                                          warmup=args.warmup_minutes * 60,
+                                          sample_interval=args.sample_minutes * 60,
+                                          budget=budget,
+                                          out=out))
+    finally:
+        if out:
+            out.close()
+    for violation in violations:
+        print(violation)
+    print('soak failed' if violations else 'soak passed')
+    sys.exit(1 if violations else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,134 @@
+"""Spectator fan-out for a single table.
+
+Every state update is redacted and serialized exactly once, the resulting
+Server-Sent-Events frame is then shared by all subscribers of that table.
+Each subscriber owns a bounded queue, subscribers that cannot keep up are dropped
+so that a slow viewer never holds back the table or the other viewers.
+States may be published from worker threads, e.g. by tournaments dealing their tables,
+frames are then handed to the queues on the event loop of the subscribers.
+"""
+import asyncio
+from typing import Optional, Set, Union
+
+from prl.api.lazy_state import LazyState
+from prl.api.model.environment_state import EnvironmentState, Card, Players
+
+SPECTATOR_QUEUE_SIZE = 32
+# comment frames sent on idle streams, so that proxies do not close them
+KEEPALIVE_SECONDS = 15
+KEEPALIVE_FRAME = b': keepalive\n\n'
+# same encoding that utils.get_player_cards uses for cards that are not dealt
+HIDDEN_CARDS = (Card(name='', suit=-127, rank=-127, index=0),
+                Card(name='', suit=-127, rank=-127, index=1))
+
+
+def redact_hole_cards(state: EnvironmentState) -> EnvironmentState:
+    """Returns a shallow copy of state with hole cards hidden.
+    At showdown, the cards of players that did not fold are revealed."""
+    players = dict(state.players)
+    n_not_folded = len([p for p in players.values() if p and not p.has_folded_this_episode_p])
+    showdown = state.done and n_not_folded > 1
+    for seat, player in players.items():
+        if player is None:
+            continue
+        if showdown and not player.has_folded_this_episode_p:
+            continue
+        players[seat] = player.copy(update={'c0': HIDDEN_CARDS[0], 'c1': HIDDEN_CARDS[1]})
+    return state.copy(update={'players': Players(**players)})
+
+
+def encode_frame(state: EnvironmentState) -> bytes:
+    return b'event: state\ndata: ' + state.json().encode() + b'\n\n'
+
+
+class SpectatorChannel:
+    def __init__(self, max_queue_size: int = SPECTATOR_QUEUE_SIZE):
+        self.max_queue_size = max_queue_size
+        self._subscribers: Set[asyncio.Queue] = set()
+        # last frame is replayed to new subscribers, so they do not wait for the next action
+        self._last_frame: Optional[bytes] = None
+        # event loop the queues belong to
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @property
+    def n_subscribers(self):
+        return len(self._subscribers)
+
+    def subscribe(self, last_state: Union[EnvironmentState, LazyState, None] = None) -> asyncio.Queue:
+        """last_state is the latest state of the table. It is replayed to the new subscriber, if no frame of
+        it was published, because nobody was watching."""
+        self._loop = asyncio.get_running_loop()
+        queue = asyncio.Queue(maxsize=self.max_queue_size)
+        if self._last_frame is None and last_state is not None:
+            self._last_frame = self._encode(last_state)
+        if self._last_frame is not None:
+            queue.put_nowait(self._last_frame)
+        self._subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        self._subscribers.discard(queue)
+
+    def publish(self, state: Union[EnvironmentState, LazyState]):
+        """Redacts and serializes state once and puts the frame into every subscriber queue."""
+        if not self._subscribers:
+            # nobody is watching, do not pay for decoding and serialization
+            self._last_frame = None
+            return
+        frame = self._encode(state)
+        self._last_frame = frame
+        self._call_on_loop(self._put, frame)
+
+    @staticmethod
+    def _encode(state: Union[EnvironmentState, LazyState]) -> bytes:
+        if isinstance(state, LazyState):
+            state = state.full()
+        return encode_frame(redact_hole_cards(state))
+
+    def close(self):
+        self._call_on_loop(self._drop_all)
+
+    def _call_on_loop(self, fn, *args):
+        """asyncio queues are not thread-safe, calls from other threads are scheduled on their loop."""
+        try:
+            on_loop = asyncio.get_running_loop() is self._loop
+        except RuntimeError:
+            on_loop = False
+        if self._loop is None or on_loop or self._loop.is_closed():
+            return fn(*args)
+        self._loop.call_soon_threadsafe(fn, *args)
+
+    def _put(self, frame: bytes):
+        for queue in list(self._subscribers):
+            try:
+                queue.put_nowait(frame)
+            except asyncio.QueueFull:
+                self._drop(queue)
+
+    def _drop_all(self):
+        for queue in list(self._subscribers):
+            self._drop(queue)
+
+    def _drop(self, queue: asyncio.Queue):
+        """Removes subscriber and signals end of stream via None."""
+        self._subscribers.discard(queue)
+        while not queue.empty():
+            queue.get_nowait()
+        queue.put_nowait(None)
+
+
+async def stream_frames(channel: SpectatorChannel, queue: asyncio.Queue, keepalive: float = KEEPALIVE_SECONDS):
+    """Yields the frames of a subscriber, and a keepalive comment whenever no frame came for keepalive seconds."""
+    try:
+        while True:
+            try:
+                frame = await asyncio.wait_for(queue.get(), keepalive)
+            except asyncio.TimeoutError:
+                yield KEEPALIVE_FRAME
+                continue
+            if frame is None:
+                # dropped as slow consumer or table was deleted
+                break
+            yield frame
+    finally:
+        channel.unsubscribe(queue)
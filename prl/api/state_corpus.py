@@ -0,0 +1,90 @@
+"""Synthetic corpus of /reset, /step and /state responses, for training the compression dictionary.
+
+States are drawn at random, but have the shape of those the API emits: 2 to 6 players, eliminated
+seats as null, undealt cards as empty cards and legal actions only while the hand is running.
+The shipped dictionary is regenerated with
+
+    python -m prl.api.state_corpus responses.jsonl
+    python -m prl.api.compression responses.jsonl
+
+Retrain it on recorded responses once a corpus of production traffic exists.
+"""
+import sys
+from typing import List
+
+import numpy as np
+
+from prl.api.model.environment_state import Board, Card, EnvironmentState, Info, LastAction, LegalActions, \
+    PlayerInfo, Players, Table
+
+MAX_PLAYERS = 6
+N_SAMPLES = 5000
+CARD_NOT_DEALT = -127
+RANK_NAMES = '23456789TJQKA'
+SUIT_NAMES = 'hdsc'
+N_BOARD_CARDS = (0, 3, 4, 5)  # per street
+
+
+def _card(card: int, index: int) -> Card:
+    if card == CARD_NOT_DEALT:
+        return Card(name='', suit=CARD_NOT_DEALT, rank=CARD_NOT_DEALT, index=index)
+    rank, suit = divmod(card, len(SUIT_NAMES))
+    return Card(name=RANK_NAMES[rank] + SUIT_NAMES[suit], suit=suit, rank=rank, index=index)
+
+
+def random_state(rng: np.random.Generator, env_id: int) -> EnvironmentState:
+    n_players = int(rng.integers(2, MAX_PLAYERS + 1))
+    seats = sorted(rng.choice(MAX_PLAYERS, size=n_players, replace=False).tolist())
+    big_blind = int(rng.choice([100, 200, 400, 1000]))
+    stacks = {seat: int(rng.integers(big_blind, 200 * big_blind)) for seat in seats}
+    street = int(rng.integers(len(N_BOARD_CARDS)))
+    done = bool(rng.random() < 0.15)
+    deck = rng.permutation(52)
+    board = [int(c) for c in deck[:N_BOARD_CARDS[street]]] + [CARD_NOT_DEALT] * (5 - N_BOARD_CARDS[street])
+    players = {}
+    pot = 0
+    for pid, seat in enumerate(seats):
+        bet = int(rng.choice([0, big_blind, 2 * big_blind, 3 * big_blind]))
+        pot += bet
+        hole = deck[5 + 2 * pid:7 + 2 * pid]
+        players[f'p{seat}'] = PlayerInfo(pid=pid, stack_p=float(stacks[seat] - bet), curr_bet_p=float(bet),
+                                         has_folded_this_episode_p=bool(rng.random() < 0.3),
+                                         is_allin_p=bool(rng.random() < 0.05),
+                                         side_pot_rank_p_is_0=0, side_pot_rank_p_is_1=0, side_pot_rank_p_is_2=0,
+                                         side_pot_rank_p_is_3=0, side_pot_rank_p_is_4=0, side_pot_rank_p_is_5=0,
+                                         c0=_card(int(hole[0]), 0), c1=_card(int(hole[1]), 1))
+    to_call = int(rng.choice([0, big_blind, 2 * big_blind]))
+    table = Table(ante=0, small_blind=big_blind // 2, big_blind=big_blind, min_raise=2 * big_blind,
+                  pot_amt=pot, total_to_call=to_call,
+                  round_preflop=int(street == 0), round_flop=int(street == 1),
+                  round_turn=int(street == 2), round_river=int(street == 3),
+                  side_pot_0=0.0, side_pot_1=0.0, side_pot_2=0.0, side_pot_3=0.0, side_pot_4=0.0, side_pot_5=0.0)
+    button_index = seats[int(rng.integers(n_players))]
+    acting = seats[int(rng.integers(n_players))]
+    reset = street == 0 and rng.random() < 0.3
+    last_action = None if reset else LastAction(action_what=int(rng.integers(3)),
+                                                action_how_much=float(rng.choice([0, to_call, 3 * big_blind])),
+                                                action_who=seats[int(rng.integers(n_players))])
+    legal_actions = None if done else LegalActions(actions=[0, 1, 2] if to_call else [1, 2], to_call=to_call,
+                                                   min_raise=to_call + big_blind, max_raise=stacks[acting])
+    return EnvironmentState(env_id=env_id, n_players=n_players,
+                            stack_sizes={f'p{seat}': stacks.get(seat, 0) for seat in range(MAX_PLAYERS)},
+                            table=table,
+                            players=Players(**players),
+                            board=Board(**{f'b{i}': _card(card, i) for i, card in enumerate(board)}),
+                            button_index=button_index, sb=seats[1 % n_players], bb=seats[2 % n_players],
+                            last_action=last_action, p_acts_next=acting, game_over=False, done=done,
+                            info=Info(continue_round=not done, draw_next_stage=False, rundown=False,
+                                      deal_next_hand=done, payouts={acting: float(pot)} if done else None),
+                            legal_actions=legal_actions)
+
+
+def generate(n_samples: int = N_SAMPLES, seed: int = 0) -> List[bytes]:
+    """Returns n_samples json responses, as serialized by the API."""
+    rng = np.random.default_rng(seed)
+    return [random_state(rng, env_id=int(rng.integers(1, 1000))).json().encode() for _ in range(n_samples)]
+
+
+if __name__ == '__main__':
+    with open(sys.argv[1], 'wb') as f:
+        f.writelines(sample + b'\n' for sample in generate())
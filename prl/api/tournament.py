@@ -0,0 +1,226 @@
+"""Multi-table tournaments on tables of the EnvironmentRegistry.
+
+A Tournament seats its entrants on tables of six, deals every table's next hand as soon as its last
+hand is done (see the hook at the end of /step) and escalates blinds by wall clock. Whenever a hand
+ends, busted players are removed and tables are broken or balanced, which only ever moves players off
+tables that are between hands. Seats are plain frontend seats, a moved player joins the next hand of
+the target table and a vacated seat is skipped by /reset like the seat of an eliminated player.
+A table whose hand cannot be dealt is logged and taken out of play, its players keep their chips there
+and the other tables play on. Dealing builds and resets environments, so /step calls `hand_finished`
+on a worker thread, where a lock keeps tables that finish at the same time from interleaving.
+
+Tables are bucketed by their number of players, so the smallest and largest table are found by
+scanning at most seven buckets. Each balancing decision is O(1), regardless of the number of entrants.
+"""
+import logging
+import math
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+from prl.api.player_stats import PlayerStats
+
+logger = logging.getLogger('tournament')
+
+SEATS_PER_TABLE = 6
+EMPTY = -1
+DEFAULT_BLIND_LEVELS = ((25, 50), (50, 100), (75, 150), (100, 200), (150, 300), (200, 400),
+                        (300, 600), (400, 800), (600, 1200), (1000, 2000), (1500, 3000), (2000, 4000))
+DEFAULT_LEVEL_SECONDS = 600
+
+
+class Tournament:
+    def __init__(self,
+                 tournament_id: int,
+                 registry,
+                 n_entrants: int,
+                 starting_stack_size: int,
+                 blind_levels: Sequence[Tuple[int, int]] = DEFAULT_BLIND_LEVELS,
+                 level_seconds: float = DEFAULT_LEVEL_SECONDS,
+                 seed: Optional[int] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        self.tournament_id = tournament_id
+        self.registry = registry
+        self.n_entrants = n_entrants
+        self.starting_stack_size = starting_stack_size
+        self.blind_levels = [tuple(level) for level in blind_levels]
+        self.level_seconds = level_seconds
+        self.rng = np.random.default_rng(seed)
+        self.clock = clock
+        self.started_at = None
+        # per player
+        self.chips = np.full(n_entrants, starting_stack_size, dtype=np.int64)
+        self.player_table = np.full(n_entrants, EMPTY, dtype=np.int64)
+        self.player_seat = np.full(n_entrants, EMPTY, dtype=np.int8)
+        self.eliminated: List[int] = []  # in order of elimination
+        # HUD stats per player, summed over every table they played at
+        self.stats = PlayerStats(n_rows=n_entrants)
+        # per table
+        self.seats: Dict[int, np.ndarray] = {}  # env_id -> player id per frontend seat
+        self.sizes: Dict[int, int] = {}
+        self._by_size: List[Set[int]] = [set() for _ in range(SEATS_PER_TABLE + 1)]
+        self.idle: Set[int] = set()  # tables between hands
+        # env_id -> seats as dealt, players moved to a table mid-hand are not part of its hand
+        self.in_hand: Dict[int, np.ndarray] = {}
+        # tables that failed to deal, neither dealt nor balanced again
+        self.failed: Set[int] = set()
+        self._lock = threading.Lock()
+
+    @property
+    def n_remaining(self) -> int:
+        return self.n_entrants - len(self.eliminated)
+
+    @property
+    def finished(self) -> bool:
+        return self.n_remaining < 2
+
+    def level(self) -> int:
+        if self.started_at is None:
+            return 0
+        return min(int((self.clock() - self.started_at) // self.level_seconds), len(self.blind_levels) - 1)
+
+    def blinds(self) -> Tuple[int, int]:
+        return self.blind_levels[self.level()]
+
+    def start(self):
+        """Creates the tables, seats the entrants at random and deals the first hand everywhere.
+        Builds environments, so call it off the event loop."""
+        n_tables = math.ceil(self.n_entrants / SEATS_PER_TABLE)
+        seeds = self.rng.integers(2 ** 32, size=n_tables)
+        env_ids = self.registry.add_environments([{'n_players': SEATS_PER_TABLE,
+                                                   'starting_stack_size': self.starting_stack_size,
+                                                   'seed': int(seed)} for seed in seeds])
+        for env_id in env_ids:
+            self.seats[env_id] = np.full(SEATS_PER_TABLE, EMPTY, dtype=np.int64)
+            self.sizes[env_id] = 0
+            self._by_size[0].add(env_id)
+            self.registry.sessions[env_id].tournament = self
+        # dealing players round robin keeps table sizes within one of each other
+        for i, player in enumerate(self.rng.permutation(self.n_entrants)):
+            self._seat(int(player), env_ids[i % n_tables])
+        self.started_at = self.clock()
+        self.idle.update(env_ids)
+        self._deal_idle_tables()
+
+    def _resize(self, env_id: int, delta: int):
+        size = self.sizes[env_id]
+        self._by_size[size].discard(env_id)
+        self.sizes[env_id] = size + delta
+        self._by_size[size + delta].add(env_id)
+
+    def _seat(self, player: int, env_id: int):
+        seats = self.seats[env_id]
+        seat = int(np.flatnonzero(seats == EMPTY)[0])
+        seats[seat] = player
+        self.player_table[player] = env_id
+        self.player_seat[player] = seat
+        self._resize(env_id, 1)
+
+    def _unseat(self, player: int):
+        env_id = int(self.player_table[player])
+        self.seats[env_id][self.player_seat[player]] = EMPTY
+        self.player_table[player] = EMPTY
+        self.player_seat[player] = EMPTY
+        self._resize(env_id, -1)
+
+    def _smallest(self, exclude: int = None) -> Optional[int]:
+        for bucket in self._by_size[1:]:
+            for env_id in bucket:
+                if env_id != exclude:
+                    return env_id
+        return None
+
+    def _largest_size(self) -> int:
+        for size in range(SEATS_PER_TABLE, 0, -1):
+            if self._by_size[size]:
+                return size
+        return 0
+
+    def _smallest_size(self) -> int:
+        for size in range(1, SEATS_PER_TABLE + 1):
+            if self._by_size[size]:
+                return size
+        return 0
+
+    def _move(self, player: int, env_id: int):
+        self._unseat(player)
+        self._seat(player, env_id)
+
+    def _break_table(self, env_id: int):
+        for player in self.seats[env_id][self.seats[env_id] != EMPTY]:
+            self._move(int(player), self._smallest(exclude=env_id))
+        self._by_size[0].discard(env_id)
+        del self.seats[env_id], self.sizes[env_id]
+        self.idle.discard(env_id)
+        self.registry.remove_environment(env_id)
+
+    def _rebalance(self):
+        """Breaks surplus tables and moves players from the largest to the smallest tables,
+        taking players only from tables between hands."""
+        n_playing = self.n_remaining - sum(self.sizes[env_id] for env_id in self.failed)
+        n_needed = math.ceil(n_playing / SEATS_PER_TABLE)
+        while len(self.seats) - len(self.failed) > n_needed and self.idle:
+            self._break_table(min(self.idle, key=self.sizes.get))
+        while self._largest_size() - self._smallest_size() > 1:
+            sources = [env_id for env_id in self._by_size[self._largest_size()] if env_id in self.idle]
+            if not sources:
+                break  # wait for a hand at a large table to end
+            seats = self.seats[sources[0]]
+            self._move(int(seats[seats != EMPTY][-1]), self._smallest())
+
+    def _deal(self, session, env_id: int, stacks: list):
+        # imported here, because reset.py needs the environment package
+        from prl.api.calls.environment.reset import deal_hand
+        deal_hand(session, env_id, stacks)
+
+    def _deal_idle_tables(self):
+        blinds = self.blinds()
+        for env_id in [env_id for env_id in self.idle if self.sizes[env_id] > 1]:
+            session = self.registry.sessions[env_id]
+            session.blinds = blinds
+            stacks = [int(self.chips[player]) if player != EMPTY else 0 for player in self.seats[env_id]]
+            self.idle.discard(env_id)
+            session.stats.set_players(self.stats, self.seats[env_id])
+            try:
+                self._deal(session, env_id, stacks)
+            except Exception:
+                logger.exception(f'Tournament {self.tournament_id} could not deal table {env_id}, '
+                                 f'taking it out of play.')
+                self._fail(env_id)
+                continue
+            self.in_hand[env_id] = self.seats[env_id].copy()
+
+    def _fail(self, env_id: int):
+        self.failed.add(env_id)
+        # out of the buckets, so balancing neither moves players to nor from the table
+        self._by_size[self.sizes[env_id]].discard(env_id)
+
+    def hand_finished(self, env_id: int):
+        """Called by /step when the hand at env_id is done. Books its stacks, eliminates busted
+        players, rebalances and deals the next hand at every table that can play one.
+        Builds and resets environments, so call it off the event loop."""
+        with self._lock:
+            self._hand_finished(env_id)
+
+    def _hand_finished(self, env_id: int):
+        session = self.registry.sessions[env_id]
+        for seat, player in enumerate(self.in_hand.pop(env_id)):
+            if player == EMPTY:
+                continue
+            self.chips[player] = session.last_stack_sizes[seat]
+            if self.chips[player] == 0:
+                self._unseat(int(player))
+                self.eliminated.append(int(player))
+        self.idle.add(env_id)
+        if self.finished:
+            return
+        self._rebalance()
+        self._deal_idle_tables()
+
+    def standings(self) -> List[int]:
+        """Player ids, winner first. Players still in the tournament are ordered by chips."""
+        remaining = np.flatnonzero(self.player_table != EMPTY)
+        remaining = remaining[np.argsort(-self.chips[remaining], kind='stable')]
+        return [int(p) for p in remaining] + self.eliminated[::-1]
@@ -0,0 +1,96 @@
+import asyncio
+
+from prl.api.admission import AdmissionController, get_priority, CRITICAL, BULK
+
+
+def test_get_priority():
+    assert get_priority('/environment/1/step') == CRITICAL
+    assert get_priority('/environment/1/reset/') == CRITICAL
+    assert get_priority('/environment/configure_batch') == BULK
+    assert get_priority('/environment/1/equity') == BULK
+    assert get_priority('/environment/1/rollout') == BULK
+    assert get_priority('/environment/1/spectate') is None
+    assert get_priority('/admin/admission') is None
+
+
+def test_bulk_is_shed_before_critical():
+    async def run():
+        controller = AdmissionController(max_in_flight=2, bulk_share=0.5, max_queue=1, queue_timeout=0.05)
+        assert await controller.acquire(BULK)
+        # bulk budget exhausted, waits and times out
+        assert not await controller.acquire(BULK)
+        assert await controller.acquire(CRITICAL)
+        assert controller.stats()['bulk']['rejected'] == 1
+        assert controller.in_flight == 2
+
+    asyncio.run(run())
+
+
+def test_release_wakes_critical_first():
+    async def run():
+        controller = AdmissionController(max_in_flight=1, max_queue=4, queue_timeout=1)
+        assert await controller.acquire(CRITICAL)
+        bulk = asyncio.ensure_future(controller.acquire(BULK))
+        critical = asyncio.ensure_future(controller.acquire(CRITICAL))
+        await asyncio.sleep(0)
+        controller.release()
+        assert await critical
+        assert not bulk.done()
+        controller.release()
+        assert await bulk
+
+    asyncio.run(run())
+
+
+def test_full_queue_is_rejected_immediately():
+    async def run():
+        controller = AdmissionController(max_in_flight=1, max_queue=0)
+        assert await controller.acquire(CRITICAL)
+        assert not await controller.acquire(CRITICAL)
+
+    asyncio.run(run())
+
+
+def test_timed_out_waiter_leaves_the_queue():
+    async def run():
+        controller = AdmissionController(max_in_flight=2, bulk_share=0.5, max_queue=4, queue_timeout=0.01)
+        assert await controller.acquire(CRITICAL)
+        assert await controller.acquire(CRITICAL)
+        assert not await controller.acquire(CRITICAL)
+        assert controller.stats()['critical']['queued'] == 0
+        controller.release()
+        controller.release()
+        # no critical request is waiting anymore, so bulk is admitted right away
+        assert await controller.acquire(BULK)
+        assert controller.in_flight == 1
+
+    asyncio.run(run())
+
+
+def test_cancelled_waiter_does_not_leak_a_slot():
+    async def run():
+        controller = AdmissionController(max_in_flight=1, max_queue=4, queue_timeout=1)
+        assert await controller.acquire(CRITICAL)
+        waiter = asyncio.ensure_future(controller.acquire(CRITICAL))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        assert controller.stats()['critical']['queued'] == 0
+        controller.release()
+        assert controller.in_flight == 0
+
+    asyncio.run(run())
+
+
+def test_step_is_admitted_while_rollouts_saturate_the_bulk_limit():
+    async def run():
+        controller = AdmissionController(max_in_flight=4, bulk_share=0.5, max_queue=4, queue_timeout=0.05)
+        rollout = get_priority('/environment/1/rollout')
+        assert await controller.acquire(rollout)
+        assert await controller.acquire(rollout)
+        assert not await controller.acquire(rollout)
+        step = get_priority('/environment/1/step')
+        assert await controller.acquire(step)
+        assert await controller.acquire(step)
+
+    asyncio.run(run())
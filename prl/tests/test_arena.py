@@ -0,0 +1,29 @@
+import random
+
+import numpy as np
+import pytest
+
+pytest.importorskip('prl.environment')
+
+from prl.api.arena import ArenaConfig, SeatResult, make_chunks
+
+
+def test_merged_seat_results_match_single_pass():
+    values = [random.gauss(0.5, 3) for _ in range(1000)]
+    single, left, right = SeatResult(), SeatResult(), SeatResult()
+    for i, v in enumerate(values):
+        single.add(v)
+        (left if i < 300 else right).add(v)
+    left.merge(right)
+    assert left.n_hands == 1000
+    assert np.isclose(left.mean, single.mean) and np.isclose(left.m2, single.m2)
+    assert np.isclose(single.bb_per_100(), np.mean(values) * 100)
+    assert np.isclose(single.ci_95(), 1.96 * np.std(values, ddof=1) / np.sqrt(1000) * 100)
+
+
+def test_chunks_cover_all_hands_with_distinct_seeds():
+    chunks = make_chunks(ArenaConfig(policies=['call', 'call'], n_hands=25, chunk_size=10, seed=1))
+    assert [c.n_hands for c in chunks] == [10, 10, 5]
+    assert len({c.seed for c in chunks}) == 3
+    assert [c.seed for c in chunks] == [c.seed for c in make_chunks(
+        ArenaConfig(policies=['call', 'call'], n_hands=25, chunk_size=10, seed=1))]
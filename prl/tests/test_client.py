@@ -0,0 +1,118 @@
+import asyncio
+import json
+
+import pytest
+
+httpx = pytest.importorskip('httpx')
+
+from prl.api.client import PrlClient
+
+
+def test_configure_many_uses_batch_and_retries_shed_requests():
+    calls = []
+
+    def handle(request):
+        calls.append(request.url.path)
+        if request.url.path == '/openapi.json':
+            return httpx.Response(200, json={'paths': {'/environment/configure_batch': {}}})
+        if calls.count(request.url.path) == 1:
+            return httpx.Response(503, headers={'Retry-After': '0'})
+        configs = json.loads(request.content)['configs']
+        return httpx.Response(200, json={'environments': [
+            {'env_id': i + 1, 'num_players': c['n_players'], 'starting_stack_size': c['starting_stack_size'],
+             'seed': 0} for i, c in enumerate(configs)]})
+
+    async def run():
+        async with PrlClient(transport=httpx.MockTransport(handle)) as client:
+            return await client.configure_many([{'n_players': 2, 'starting_stack_size': 100}] * 3)
+
+    assert asyncio.run(run()) == [1, 2, 3]
+    assert calls == ['/openapi.json', '/environment/configure_batch', '/environment/configure_batch']
+
+
+def test_step_retries_with_same_idempotency_key():
+    keys = []
+
+    def handle(request):
+        keys.append(json.loads(request.content)['idempotency_key'])
+        if len(keys) == 1:
+            return httpx.Response(503, headers={'Retry-After': '0'})
+        return httpx.Response(200, json={'p_acts_next': 1})
+
+    async def run():
+        async with PrlClient(transport=httpx.MockTransport(handle)) as client:
+            return await client.step(1, action=1, fields='p_acts_next')
+
+    assert asyncio.run(run()) == {'p_acts_next': 1}
+    assert len(keys) == 2 and keys[0] == keys[1]
+
+
+def test_idempotency_keys_differ_across_clients():
+    keys = []
+
+    def handle(request):
+        keys.append(json.loads(request.content)['idempotency_key'])
+        return httpx.Response(200, json={'p_acts_next': 1})
+
+    async def run():
+        # e.g. two bots at one tournament table, or a bot before and after a restart
+        for _ in range(2):
+            async with PrlClient(transport=httpx.MockTransport(handle)) as client:
+                await client.step(1, action=1, fields='p_acts_next')
+
+    asyncio.run(run())
+    assert len(set(keys)) == 2
+
+
+def read_timeout_once(monkeypatch, paths):
+    """Handler that times out reading the response to the first request, after the server handled it."""
+    monkeypatch.setattr('prl.api.client.async_client.DEFAULT_RETRY_AFTER', 0)
+
+    def handle(request):
+        paths.append(request.url.path)
+        if len(paths) == 1:
+            raise httpx.ReadTimeout('timed out', request=request)
+        return httpx.Response(200, json={'p_acts_next': 1})
+
+    return handle
+
+
+def test_reset_is_not_retried_after_read_timeout(monkeypatch):
+    paths = []
+
+    async def run():
+        async with PrlClient(transport=httpx.MockTransport(read_timeout_once(monkeypatch, paths))) as client:
+            await client.reset(1, fields='p_acts_next')
+
+    with pytest.raises(httpx.ReadTimeout):
+        asyncio.run(run())
+    assert paths == ['/environment/1/reset/']
+
+
+def test_step_is_retried_after_read_timeout(monkeypatch):
+    paths = []
+
+    async def run():
+        async with PrlClient(transport=httpx.MockTransport(read_timeout_once(monkeypatch, paths))) as client:
+            return await client.step(1, action=1, fields='p_acts_next')
+
+    assert asyncio.run(run()) == {'p_acts_next': 1}
+    assert paths == ['/environment/1/step'] * 2
+
+
+def test_connect_errors_are_retried(monkeypatch):
+    monkeypatch.setattr('prl.api.client.async_client.DEFAULT_RETRY_AFTER', 0)
+    paths = []
+
+    def handle(request):
+        paths.append(request.url.path)
+        if len(paths) == 1:
+            raise httpx.ConnectError('refused', request=request)
+        return httpx.Response(200, json={'p_acts_next': 1})
+
+    async def run():
+        async with PrlClient(transport=httpx.MockTransport(handle)) as client:
+            return await client.reset(1, fields='p_acts_next')
+
+    assert asyncio.run(run()) == {'p_acts_next': 1}
+    assert len(paths) == 2
@@ -0,0 +1,106 @@
+import pytest
+import asyncio
+
+from starlette.applications import Starlette
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route
+
+from prl.api import compression
+from prl.api.compression import CompressionMiddleware, ENCODING
+
+STATE = {'players': {f'p{i}': {'stack_p': 20000, 'curr_bet_p': 0, 'has_folded_this_episode_p': False}
+                     for i in range(6)}}
+
+
+async def state(request):
+    return JSONResponse(STATE)
+
+
+async def stream(request):
+    async def frames():
+        for i in range(3):
+            yield f'event: state\ndata: {{"version": {i}}}\n\n'.encode()
+    return StreamingResponse(frames(), media_type='text/event-stream')
+
+
+def get(path, accept_encoding=None, dictionary_id=None, **kwargs):
+    """Returns headers and body of a GET request to the compressed app."""
+    app = CompressionMiddleware(Starlette(routes=[Route('/state', state), Route('/stream', stream)]), **kwargs)
+    headers = [(b'accept-encoding', accept_encoding.encode())] if accept_encoding else []
+    if dictionary_id is not None:
+        headers.append((b'prl-zstd-dictionary', dictionary_id.encode()))
+    scope = {'type': 'http', 'method': 'GET', 'path': path, 'raw_path': path.encode(), 'root_path': '',
+             'query_string': b'', 'headers': headers, 'scheme': 'http', 'server': ('test', 80),
+             'http_version': '1.1'}
+    messages = []
+
+    requests = [{'type': 'http.request', 'body': b'', 'more_body': False}]
+
+    async def receive():
+        if requests:
+            return requests.pop()
+        await asyncio.Event().wait()  # client stays connected
+
+    async def send(message):
+        messages.append(message)
+
+    asyncio.run(app(scope, receive, send))
+    return Headers(raw=messages[0]['headers']), b''.join(m.get('body', b'') for m in messages[1:])
+
+
+def test_uncompressed_without_negotiation():
+    headers, body = get('/state')
+    assert 'content-encoding' not in headers
+    assert body == JSONResponse(STATE).body
+
+
+def test_compresses_responses_and_streams():
+    pytest.importorskip('zstandard')
+    headers, body = get('/state', ENCODING, minimum_size=16, dictionary_path='/nonexistent')
+    assert headers['content-encoding'] == ENCODING
+    assert int(headers['content-length']) == len(body) < len(JSONResponse(STATE).body)
+    assert compression.decompress(body, None) == JSONResponse(STATE).body
+
+    headers, body = get('/stream', ENCODING, minimum_size=16, dictionary_path='/nonexistent')
+    assert headers['content-encoding'] == ENCODING and 'content-length' not in headers
+    assert compression.decompress(body, None).count(b'event: state') == 3
+
+
+def test_small_responses_stay_uncompressed():
+    pytest.importorskip('zstandard')
+    headers, body = get('/state', ENCODING, minimum_size=10 ** 6)
+    assert 'content-encoding' not in headers
+
+
+def test_dictionary_is_used_when_ids_match(tmp_path):
+    pytest.importorskip('zstandard')
+    samples = [JSONResponse({'players': {f'p{i}': {'stack_p': i * seed, 'curr_bet_p': seed % 7}
+                                         for i in range(6)}}).body for seed in range(500)]
+    path = str(tmp_path / 'dictionary.zstd')
+    compression.train_dictionary(samples, path=path, size=2048)
+    dictionary = compression.load_dictionary(path)
+    dictionary_id = str(dictionary.dict_id())
+
+    app = CompressionMiddleware(Starlette(routes=[Route('/state', state)]), minimum_size=16, dictionary_path=path)
+    assert app.dictionary_id == dictionary_id
+    headers, body = get('/state', ENCODING, minimum_size=16, dictionary_path=path)
+    assert 'prl-zstd-dictionary' not in headers  # client did not announce the dictionary
+    assert compression.decompress(body, None) == JSONResponse(STATE).body
+
+    headers, body = get('/state', ENCODING, dictionary_id, minimum_size=16, dictionary_path=path)
+    assert headers['prl-zstd-dictionary'] == dictionary_id
+    assert compression.decompress(body, dictionary_id, dictionary) == JSONResponse(STATE).body
+    with pytest.raises(ValueError):
+        compression.decompress(body, dictionary_id + '0', dictionary)
+
+
+def test_shipped_dictionary_round_trips_a_state():
+    zstandard = pytest.importorskip('zstandard')
+    from prl.api.state_corpus import generate
+    dictionary = compression.load_dictionary()
+    assert dictionary is not None
+    state, = generate(1, seed=1)
+    body = zstandard.ZstdCompressor(dict_data=dictionary).compress(state)
+    assert len(body) < len(zstandard.ZstdCompressor().compress(state)) / 2
+    assert compression.decompress(body, str(dictionary.dict_id()), dictionary) == state
@@ -0,0 +1,73 @@
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+
+pytest.importorskip('prl.environment')
+
+from prl.api import environment_registry
+from prl.api.calls.environment.configure import configure_environment_batch, MAX_BATCH_SIZE
+from prl.api.environment_registry import EnvironmentRegistry
+from prl.api.model.environment_config import EnvironmentConfigBatchRequestBody
+
+
+@pytest.fixture
+def fake_builds(monkeypatch):
+    """Builds stand-ins instead of environments, configs with n_players == 5 fail to build.
+    Larger seeds take shorter, so builds finish out of order."""
+    def build(config):
+        time.sleep(0.01 / (1 + (config.get('seed') or 0)))
+        if config['n_players'] == 5:
+            raise RuntimeError('build failed')
+        return SimpleNamespace(config=config)
+
+    monkeypatch.setattr(environment_registry, 'build_environment_from_config', build)
+
+
+def configs(*seeds, n_players=2):
+    return [{'n_players': n_players, 'starting_stack_size': 100, 'seed': seed} for seed in seeds]
+
+
+def test_env_ids_follow_config_order(fake_builds):
+    registry = EnvironmentRegistry()
+    env_ids = registry.add_environments(configs(0, 1, 2, 3))
+    assert env_ids == [1, 2, 3, 4]
+    assert [registry.sessions[env_id].seed for env_id in env_ids] == [0, 1, 2, 3]
+
+
+def test_failed_batch_registers_nothing(fake_builds):
+    registry = EnvironmentRegistry()
+    with pytest.raises(RuntimeError):
+        registry.add_environments(configs(0, 1) + configs(2, n_players=5))
+    assert registry.sessions == {}
+    assert registry.add_environments(configs(0)) == [1]
+
+
+def test_concurrent_batches_get_distinct_env_ids(fake_builds):
+    registry = EnvironmentRegistry()
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(registry.add_environments(configs(0, 1, 2))))
+               for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    env_ids = [env_id for batch in results for env_id in batch]
+    assert sorted(env_ids) == list(range(1, 25))
+    # each batch gets consecutive ids
+    assert all(batch == list(range(batch[0], batch[0] + 3)) for batch in results)
+
+
+@pytest.mark.parametrize('batch', [[], configs(0, n_players=7), configs(0, n_players=1),
+                                   configs(*range(MAX_BATCH_SIZE + 1))])
+def test_configure_batch_validation(fake_builds, batch):
+    registry = EnvironmentRegistry()
+    request = SimpleNamespace(app=SimpleNamespace(backend=registry))
+    body = EnvironmentConfigBatchRequestBody(configs=batch)
+    with pytest.raises(HTTPException) as e:
+        asyncio.run(configure_environment_batch(body, request))
+    assert e.value.status_code == 422
+    assert registry.sessions == {}
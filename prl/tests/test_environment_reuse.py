@@ -0,0 +1,56 @@
+import pytest
+
+pytest.importorskip('prl.environment')
+
+from prl.api.calls.environment.reset import deal_hand
+from prl.api.environment_registry import build_environment
+from prl.api.session import EnvironmentSession
+
+
+def decoded_starting_stacks(state) -> dict:
+    """Stack plus posted blinds of every seat, as decoded from the observation."""
+    players = state.resolve('players')
+    return {seat: player.stack_p + player.curr_bet_p for seat, player in players if player is not None}
+
+
+def test_reuses_environment_when_stacks_change():
+    session = EnvironmentSession(build_environment(3, [200, 200, 200]), seed=1)
+    env = session.env
+    deal_hand(session, 1, [200, 200, 200, 0, 0, 0])
+    state = deal_hand(session, 1, [100, 300, 2000, 0, 0, 0])
+    assert session.env is env
+    assert decoded_starting_stacks(state) == {'p0': 100, 'p1': 300, 'p2': 2000}
+
+
+def test_decoded_stacks_match_a_fresh_environment():
+    stacks = [150, 450, 900, 0, 0, 0]
+    reused = EnvironmentSession(build_environment(3, [200, 200, 200]), seed=1)
+    deal_hand(reused, 1, [200, 200, 200, 0, 0, 0])
+    reused_stacks = decoded_starting_stacks(deal_hand(reused, 1, stacks))
+    fresh = EnvironmentSession(build_environment(3, [150, 450, 900]), seed=1)
+    assert reused_stacks == decoded_starting_stacks(deal_hand(fresh, 1, stacks))
+
+
+def test_rebuilds_environment_on_elimination_only_once():
+    session = EnvironmentSession(build_environment(3, [200, 200, 200]), seed=1)
+    three_seats = session.env
+    deal_hand(session, 1, [200, 200, 200, 0, 0, 0])
+    deal_hand(session, 1, [300, 0, 300, 0, 0, 0])
+    two_seats = session.env
+    assert two_seats is not three_seats and two_seats.env.N_SEATS == 2
+    deal_hand(session, 1, [200, 200, 200, 0, 0, 0])
+    assert session.env is three_seats
+    deal_hand(session, 1, [300, 0, 300, 0, 0, 0])
+    assert session.env is two_seats
+
+
+def test_same_number_of_seats_does_not_overwrite_args():
+    session = EnvironmentSession(build_environment(3, [200, 200, 200]), seed=1)
+    calls = []
+    overwrite_args = session.env.overwrite_args
+    session.env.overwrite_args = lambda *args, **kwargs: calls.append(args) or overwrite_args(*args, **kwargs)
+    deal_hand(session, 1, [200, 200, 200, 0, 0, 0])
+    deal_hand(session, 1, [100, 300, 200, 0, 0, 0])
+    state = deal_hand(session, 1, [250, 250, 100, 0, 0, 0])
+    assert calls == []
+    assert sorted(decoded_starting_stacks(state).values()) == [100, 250, 250]
@@ -0,0 +1,91 @@
+import numpy as np
+
+from prl.api.equity import evaluate, monte_carlo_equity, card_id, matchup_keys, load_preflop_table, preflop_equity
+
+RANKS = '23456789TJQKA'
+SUITS = 'hdsc'
+
+
+def cards(hand: str):
+    return [card_id(RANKS.index(c[0]), SUITS.index(c[1])) for c in hand.split()]
+
+
+def score(hand: str):
+    return evaluate(np.array([cards(hand)]))[0]
+
+
+def test_hand_categories_are_ordered():
+    hands = ["Ah Kh Qh Jh Th 2c 3d",  # straight flush
+             "As Ad Ac Ah Kd 2c 3d",  # quads
+             "Ks Kd Kc 2h 2d 3c 3d",  # full house
+             "Ah 9h 5h 3h 2h Kc Kd",  # flush
+             "6h 2d 3c 4s 5h 9c Jd",  # straight
+             "Qs Qd Qc 2h 7d 8c 3d",  # trips
+             "Ks Kd Qc Qh 7d 7c 3d",  # two pair
+             "As Ad Qc Jh 7d 5c 3d",  # pair
+             "As Kd Qc Jh 9d 5c 3d"]  # high card
+    scores = [score(h) for h in hands]
+    assert scores == sorted(scores, reverse=True)
+
+
+def test_wheel_is_lowest_straight():
+    assert score("Ah 2d 3c 4s 5h 9c Jd") < score("6h 2d 3c 4s 5h 9c Jd")
+
+
+def test_kickers():
+    assert score("As Ad Ac Ah 2d 2c Kd") > score("As Ad Ac Ah Qd Qc Jd")
+    assert score("Ks Kd Qc Qh 7d 7c 3d") < score("Ks Kd Qc Qh 7d 7c Ad")
+    assert score("As Ad Qc Jh 7d 5c 3d") == score("Ac Ah Qs Jd 7h 5s 2d")
+
+
+def test_equity_on_complete_board_is_exact():
+    wins, ties, n = monte_carlo_equity([cards("As Ks"), cards("2h 2d")], cards("3h 4d 5c Qs Js"))
+    assert n == 1
+    assert list(wins) == [0, 1]
+    assert list(ties) == [0, 0]
+
+
+def test_preflop_monte_carlo_equity():
+    wins, ties, n = monte_carlo_equity([cards("As Ad"), cards("Kh Kd")], [],
+                                       n_samples=20000, tolerance=0, rng=np.random.default_rng(0))
+    assert n == 20000
+    assert abs(wins[0] - 0.82) < 0.02
+
+
+def matchup_key(first: str, second: str):
+    key, = matchup_keys([[cards(first), cards(second)]])
+    return key
+
+
+def test_matchup_keys_only_ignore_suit_permutations():
+    assert matchup_key("Ah Kh", "Qh Jh") == matchup_key("As Ks", "Qs Js") == matchup_key("Kd Ad", "Jd Qd")
+    assert matchup_key("Ah Kh", "Qh Jh") != matchup_key("Ah Kh", "Qs Js")
+    assert matchup_key("Ah Kd", "Qh Jd") != matchup_key("Ah Kd", "Qd Jh")
+    assert matchup_key("Ah Kh", "Qs Js") != matchup_key("Qs Js", "Ah Kh")
+
+
+def test_preflop_table_keeps_suit_interactions():
+    assert len(load_preflop_table()) == 47008
+    wins, ties = preflop_equity([cards("Ah Kh"), cards("Qh Jh")])
+    # 0.659 by Monte Carlo with 10**6 samples, 0.627 against QsJs
+    assert abs(wins[0] + ties[0] / 2 - 0.659) < 0.015
+    wins, ties = preflop_equity([cards("Ah Kh"), cards("Qs Js")])
+    assert abs(wins[0] + ties[0] / 2 - 0.627) < 0.015
+
+
+def test_preflop_equity_does_not_depend_on_order():
+    wins, ties = preflop_equity([cards("7c 2d"), cards("As Ad")])
+    swapped_wins, swapped_ties = preflop_equity([cards("As Ad"), cards("7c 2d")])
+    assert list(wins) == list(swapped_wins[::-1])
+    assert list(ties) == list(swapped_ties)
+    assert wins[1] > 0.8
+
+
+def test_monte_carlo_stops_early_on_lopsided_matchups():
+    rng = np.random.default_rng(0)
+    wins, ties, n_lopsided = monte_carlo_equity([cards("As Ad"), cards("7h 2d")], [], rng=rng)
+    assert n_lopsided < 20000
+    assert abs(wins[0] + ties[0] / 2 - 0.88) < 0.02
+    # a coin flip has a larger variance and needs more samples
+    _, _, n_even = monte_carlo_equity([cards("As Kd"), cards("Qh Qd")], [], rng=rng)
+    assert n_lopsided < n_even < 20000
@@ -0,0 +1,29 @@
+import json
+
+import numpy as np
+
+from prl.api.hand_history import HandRecord, StepRecord, reset_seeded
+
+
+def test_hand_record_round_trip():
+    record = HandRecord(n_players=3, starting_stacks=[200, 140, 800], deck_seed=7, button_index=5,
+                        steps=[StepRecord(action=[1, -1.0], fingerprint=[1, 20.0, 0, [180, 140, 800], False, 123])])
+    restored = HandRecord.from_dict(json.loads(json.dumps(record.to_dict())))
+    assert restored == record
+
+
+class ShufflingEnv:
+    """Shuffles its deck with the global numpy RNG on reset, like the environment does."""
+
+    def reset(self):
+        return np.random.permutation(52)
+
+
+def test_reset_seeded_deals_reproducibly_and_restores_global_rng():
+    np.random.seed(0)
+    expected = np.random.random()
+    np.random.seed(0)
+    first = reset_seeded(ShufflingEnv(), deck_seed=7)
+    assert np.random.random() == expected
+    assert np.array_equal(reset_seeded(ShufflingEnv(), deck_seed=7), first)
+    assert not np.array_equal(reset_seeded(ShufflingEnv(), deck_seed=8), first)
@@ -0,0 +1,29 @@
+import pytest
+
+from prl.api.idempotency import ResponseRing, IdempotencyKeyReused
+
+
+def test_replays_recent_responses():
+    ring = ResponseRing(size=2)
+    ring.put('a', 1)
+    ring.put('b', 2)
+    assert ring.get('a') == 1
+    assert ring.get('b') == 2
+    assert ring.get('c') is None
+
+
+def test_evicts_oldest_response():
+    ring = ResponseRing(size=2)
+    ring.put('a', 1)
+    ring.put('b', 2)
+    ring.put('c', 3)
+    assert ring.get('a') is None
+    assert ring.get('c') == 3
+
+
+def test_rejects_key_reused_for_another_request():
+    ring = ResponseRing(size=2)
+    ring.put('a', 1, fingerprint=(1, -1., False))
+    assert ring.get('a', (1, -1., False)) == 1
+    with pytest.raises(IdempotencyKeyReused):
+        ring.get('a', (2, 400., False))
@@ -0,0 +1,45 @@
+import pytest
+from fastapi import HTTPException
+
+from prl.api.calls.environment.response import parse_fields
+from prl.api.lazy_state import Lazy, LazyState
+from prl.api.model.environment_state import Table
+
+
+def make_table():
+    return Table(ante=0, small_blind=1, big_blind=2, min_raise=4, pot_amt=3, total_to_call=2,
+                 round_preflop=1, round_flop=0, round_turn=0, round_river=0,
+                 side_pot_0=0, side_pot_1=0, side_pot_2=0, side_pot_3=0, side_pot_4=0, side_pot_5=0)
+
+
+def test_parse_fields():
+    assert parse_fields(None) is None
+    assert parse_fields('p_acts_next, table.total_to_call,table.pot_amt') == {
+        'p_acts_next': None, 'table': {'total_to_call': None, 'pot_amt': None}}
+    # whole field wins over sub-fields, regardless of order
+    assert parse_fields('table.pot_amt,table') == {'table': None}
+    assert parse_fields('table,table.pot_amt') == {'table': None}
+    with pytest.raises(HTTPException):
+        parse_fields('not_a_field')
+
+
+def test_select_decodes_only_selected_fields():
+    decoded = []
+
+    def decode(name, value):
+        def _decode():
+            decoded.append(name)
+            return value
+        return Lazy(_decode)
+
+    state = LazyState({'p_acts_next': 3,
+                       'stack_sizes': {'p0': 100, 'p1': 200},
+                       'table': decode('table', make_table()),
+                       'board': decode('board', None)})
+    selected = state.select({'p_acts_next': None, 'table': {'total_to_call': None},
+                             'stack_sizes': {'p1': None}})
+    assert selected == {'p_acts_next': 3, 'table': {'total_to_call': 2}, 'stack_sizes': {'p1': 200}}
+    assert decoded == ['table']
+    # decoded values are cached
+    state.select({'table': None})
+    assert decoded == ['table']
@@ -0,0 +1,40 @@
+from types import SimpleNamespace
+
+from prl.api.legal_actions import FOLD, CHECK_CALL, BET_RAISE, get_legal_actions, validate_actions
+
+
+def make_env(stack, current_bet, to_call, min_raise, capped=False):
+    player = SimpleNamespace(stack=stack, current_bet=current_bet)
+    return SimpleNamespace(current_player=player,
+                           capped_raise=SimpleNamespace(happened_this_round=capped,
+                                                        player_that_cant_reopen=player if capped else None),
+                           _get_biggest_bet_out_there_aka_total_to_call=lambda: to_call,
+                           _get_current_total_min_raise=lambda: min_raise)
+
+
+def test_facing_a_bet():
+    legal = get_legal_actions(make_env(stack=190, current_bet=10, to_call=20, min_raise=40), done=False)
+    assert legal.actions == [FOLD, CHECK_CALL, BET_RAISE]
+    assert (legal.to_call, legal.min_raise, legal.max_raise) == (20, 40, 200)
+
+
+def test_fold_is_illegal_when_check_is_possible():
+    legal = get_legal_actions(make_env(stack=180, current_bet=20, to_call=20, min_raise=40), done=False)
+    assert legal.actions == [CHECK_CALL, BET_RAISE]
+
+
+def test_short_stack_and_capped_raise():
+    short = get_legal_actions(make_env(stack=20, current_bet=10, to_call=20, min_raise=40), done=False)
+    assert (short.min_raise, short.max_raise) == (30, 30)
+    capped = get_legal_actions(make_env(stack=190, current_bet=10, to_call=20, min_raise=40, capped=True),
+                               done=False)
+    assert capped.actions == [FOLD, CHECK_CALL] and capped.min_raise is None
+    assert get_legal_actions(make_env(stack=0, current_bet=20, to_call=20, min_raise=40), done=True) is None
+
+
+def test_validate_actions():
+    legal = get_legal_actions(make_env(stack=180, current_bet=20, to_call=20, min_raise=40), done=False)
+    reasons = validate_actions(legal, [(CHECK_CALL, -1), (FOLD, -1), (BET_RAISE, 30), (BET_RAISE, 200), (3, 0)])
+    assert reasons[0] is None and reasons[3] is None
+    assert 'not legal' in reasons[1] and 'out of bounds' in reasons[2] and 'not legal' in reasons[4]
+    assert validate_actions(None, [(CHECK_CALL, -1)])[0].startswith('The hand is over')
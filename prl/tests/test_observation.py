@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+
+from prl.api.observation import OBS_DTYPE, ObservationBuffer, ObservationLayout, TABLE_KEYS, MAX_PLAYERS
+
+
+def make_obs_keys():
+    keys = list(TABLE_KEYS) + [f'side_pot_{pid}' for pid in range(MAX_PLAYERS)]
+    for i in range(MAX_PLAYERS):
+        keys += [f'stack_p{i}', f'curr_bet_p{i}'] + [f'side_pot_rank_p{i}_is_{r}' for r in range(6)]
+    for card in range(5):
+        keys += [f'{card}th_board_card_rank_{r}' for r in range(13)] + [f'{card}th_board_card_suit_{s}' for s in range(4)]
+    for pid in range(MAX_PLAYERS):
+        for card in range(2):
+            keys += [f'{pid}th_player_card_{card}_rank_{r}' for r in range(13)]
+            keys += [f'{pid}th_player_card_{card}_suit_{s}' for s in range(4)]
+    return keys
+
+
+def test_layout():
+    keys = make_obs_keys()
+    layout = ObservationLayout(keys)
+    assert layout.size == len(keys)
+    assert layout.player_keys == ['stack_p', 'curr_bet_p'] + [f'side_pot_rank_p_is_{r}' for r in range(6)]
+    assert keys[layout.players[2]][0] == 'stack_p2'
+    assert layout.idx_board_end - layout.idx_board_start == 5 * 17
+    start, end = layout.player_cards[1]
+    assert (keys[start], keys[end - 1]) == ('1th_player_card_0_rank_0', '1th_player_card_1_suit_3')
+
+
+def test_writes_do_not_touch_pinned_observation():
+    buffer = ObservationBuffer(3)
+    first = buffer.write(np.array([1., 2., 3.]))
+    buffer.pin()
+    second = buffer.write(np.array([4., 5., 6.]))
+    # e.g. steps of a rundown, written over the unpinned slot
+    third = buffer.write(np.array([7., 8., 9.]))
+    assert first.dtype == OBS_DTYPE
+    assert first.tolist() == [1., 2., 3.]
+    assert np.shares_memory(second, third) and third.tolist() == [7., 8., 9.]
+    assert np.shares_memory(buffer.pinned(), first)
+    buffer.pin()
+    assert buffer.pinned().tolist() == [7., 8., 9.]
+
+
+def test_views_are_read_only():
+    buffer = ObservationBuffer(2)
+    view = buffer.write(np.zeros(2))
+    with pytest.raises(ValueError):
+        view[0] = 1.
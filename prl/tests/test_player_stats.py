@@ -0,0 +1,46 @@
+from prl.api.legal_actions import FOLD, CHECK_CALL, BET_RAISE
+from prl.api.player_stats import PlayerStats, NO_PLAYER
+
+
+def test_preflop_stats_count_once_per_hand():
+    stats = PlayerStats()
+    stats.start_hand([0, 1, 2])
+    stats.record_action(0, BET_RAISE, preflop=True, facing_bet=True)  # open raise
+    stats.record_action(1, BET_RAISE, preflop=True, facing_bet=True)  # 3-bet
+    stats.record_action(2, FOLD, preflop=True, facing_bet=True)  # folds facing 3-bet, no opportunity
+    stats.record_action(0, CHECK_CALL, preflop=True, facing_bet=True)  # calls 3-bet
+    stats.end_hand([0, 1, 2], [False, False, True], payouts={1: 100})
+    stats.start_hand([0, 1, 2])
+    stats.record_action(0, FOLD, preflop=True, facing_bet=True)
+    stats.record_action(1, CHECK_CALL, preflop=True, facing_bet=True)  # limp
+    stats.record_action(2, CHECK_CALL, preflop=True, facing_bet=False)  # check in the BB
+    stats.record_action(1, BET_RAISE, preflop=False, facing_bet=False)  # flop bet
+    stats.record_action(2, CHECK_CALL, preflop=False, facing_bet=True)  # flop call
+    stats.record_action(1, BET_RAISE, preflop=False, facing_bet=False)  # turn bet
+    stats.record_action(2, FOLD, preflop=False, facing_bet=True)
+    stats.end_hand([0, 1, 2], [True, False, True], payouts={1: 30})
+
+    seats = {s['seat']: s for s in stats.summary()}
+    assert seats[0]['hands'] == 2 and seats[0]['vpip'] == 0.5 and seats[0]['pfr'] == 0.5
+    assert seats[1]['vpip'] == 1 and seats[1]['pfr'] == 0.5 and seats[1]['three_bet'] == 1
+    assert seats[2]['vpip'] == 0 and seats[2]['three_bet'] is None
+    assert seats[1]['aggression_factor'] is None and seats[2]['aggression_factor'] == 0
+    # only the first hand went to showdown
+    assert seats[0]['showdown_win_rate'] == 0 and seats[1]['showdown_win_rate'] == 1
+
+
+def test_aggregate_is_keyed_by_player():
+    aggregate = PlayerStats(n_rows=10)
+    table_a, table_b = PlayerStats(), PlayerStats()
+    # player 7 sits in seat 0 at table a, player 3 in seat 0 at table b
+    table_a.set_players(aggregate, [7, 4, NO_PLAYER, NO_PLAYER, NO_PLAYER, NO_PLAYER])
+    table_b.set_players(aggregate, [3, 7, NO_PLAYER, NO_PLAYER, NO_PLAYER, NO_PLAYER])
+    for table in (table_a, table_b):
+        table.start_hand([0, 1])
+        table.record_action(0, BET_RAISE, preflop=True, facing_bet=True)
+        table.record_action(1, FOLD, preflop=True, facing_bet=True)
+    players = {p['player_id']: p for p in aggregate.summary(key='player_id')}
+    assert sorted(players) == [3, 4, 7]
+    # player 7 raised at table a and folded at table b
+    assert players[7]['hands'] == 2 and players[7]['pfr'] == 0.5
+    assert players[3]['pfr'] == 1 and players[4]['vpip'] == 0
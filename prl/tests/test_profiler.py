@@ -0,0 +1,61 @@
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+
+from prl.api.profiler import sample_stacks, collapse, TableTrace, LoopMonitor
+
+
+def busy(stop: threading.Event):
+    while not stop.is_set():
+        sum(range(1000))
+
+
+def test_sample_stacks_sees_other_threads():
+    stop = threading.Event()
+    worker = threading.Thread(target=busy, args=(stop,), name='busy-worker')
+    worker.start()
+    try:
+        samples = sample_stacks(duration=0.05, interval=0.005)
+    finally:
+        stop.set()
+        worker.join()
+    busy_stacks = [stack for stack in samples if stack.startswith('busy-worker;')]
+    assert busy_stacks
+    assert any('busy (' in stack for stack in busy_stacks)
+    assert collapse(samples).splitlines()[0].rsplit(' ', 1)[1].isdigit()
+
+
+def test_table_trace_laps():
+    trace = TableTrace(max_len=2)
+    for _ in range(3):
+        trace.begin()
+        time.sleep(0.001)
+        trace.lap('env_step')
+        trace.lap('decode')
+    summary = trace.summary()
+    assert summary['env_step']['count'] == 2
+    assert summary['env_step']['max_ms'] >= 1
+    assert set(summary) == {'env_step', 'decode'}
+
+
+def test_loop_monitor_attributes_blocking_handler():
+    monitor = LoopMonitor(tick=0.01, threshold=0.05)
+
+    def blocking_handler(request, env_id):
+        time.sleep(0.2)
+
+    async def run():
+        monitor.start()
+        await asyncio.sleep(0.05)
+        blocking_handler(SimpleNamespace(scope={'path': '/environment/7/step'}), 7)
+        await asyncio.sleep(0.05)
+        monitor.stop()
+
+    asyncio.run(run())
+    summary = monitor.summary()
+    assert summary['max_lag_ms'] >= 150
+    assert sum(summary['histogram']['counts']) >= 2
+    handler, = summary['by_handler']
+    assert (handler['route'], handler['env_id'], handler['count']) == ('/environment/7/step', 7, 1)
+    assert 'blocking_handler (' in summary['events'][0]['stack']
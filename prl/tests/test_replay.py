@@ -0,0 +1,38 @@
+import json
+
+import pytest
+
+pytest.importorskip('prl.environment')
+
+from prl.api.calls.environment.reset import deal_hand
+from prl.api.environment_registry import build_environment
+from prl.api.hand_history import HandRecord
+from prl.api.legal_actions import CHECK_CALL
+from prl.api.replay import ReplayEngine
+from prl.api.session import EnvironmentSession
+
+
+def play_recorded_hand(seed: int) -> HandRecord:
+    """Deals a hand like /reset and checks it down to showdown like /step, returns its record."""
+    session = EnvironmentSession(build_environment(3, [200, 200, 200]), seed=seed)
+    deal_hand(session, 1, [200, 200, 200, 0, 0, 0])
+    done = False
+    while not done:
+        action = (CHECK_CALL, -1)
+        obs, _, done, _ = session.env.step(action)
+        session.record_step(action, session.observation.write(obs), done)
+    # through json, as written by GET /environment/{env_id}/hands
+    return HandRecord.from_dict(json.loads(json.dumps(session.hands[-1].to_dict())))
+
+
+def test_replays_recorded_hand():
+    record = play_recorded_hand(seed=3)
+    result = ReplayEngine().replay_hand(record)
+    assert result.ok and result.n_steps == len(record.steps)
+
+
+def test_detects_a_different_deck():
+    record = play_recorded_hand(seed=3)
+    record.deck_seed += 1
+    result = ReplayEngine().replay_hand(record)
+    assert not result.ok and result.mismatch_at is not None
@@ -0,0 +1,59 @@
+from concurrent.futures import Future
+
+import numpy as np
+
+from prl.api import rollout
+from prl.api.legal_actions import FOLD, CHECK_CALL, BET_RAISE
+from prl.api.model.environment_state import LegalActions
+from prl.api.rollout import default_actions, submit_rollouts, summarize
+
+
+def test_summarize():
+    outcomes = np.array([-100., 0., 0., 300.])
+    summary = summarize(outcomes, big_blind=100)
+    assert summary['n'] == 4
+    assert summary['ev'] == 50.
+    assert summary['ev_bb'] == .5
+    assert summary['win_rate'] == .25
+    assert summary['loss_rate'] == .25
+    assert summary['p50'] == 0.
+
+
+def test_default_actions():
+    facing_bet = LegalActions(actions=[FOLD, CHECK_CALL, BET_RAISE], to_call=100, min_raise=200, max_raise=1000)
+    assert default_actions(facing_bet) == [(FOLD, -1), (CHECK_CALL, -1), (BET_RAISE, 200), (BET_RAISE, 1000)]
+    # min raise is all-in, evaluated once
+    short = LegalActions(actions=[FOLD, CHECK_CALL, BET_RAISE], to_call=100, min_raise=150, max_raise=150)
+    assert default_actions(short) == [(FOLD, -1), (CHECK_CALL, -1), (BET_RAISE, 150)]
+    checked_to = LegalActions(actions=[CHECK_CALL], to_call=0, min_raise=None, max_raise=None)
+    assert default_actions(checked_to) == [(CHECK_CALL, -1)]
+
+
+class RecordingPool:
+    def __init__(self):
+        self.calls = []
+
+    def submit(self, fn, *args):
+        self.calls.append(args)
+        future = Future()
+        future.set_result(None)
+        return future
+
+
+def test_submit_rollouts_chunks_and_seeds(monkeypatch):
+    pool = RecordingPool()
+    monkeypatch.setattr(rollout, 'get_pool', lambda: pool)
+    monkeypatch.setattr(rollout, 'ROLLOUT_CHUNK', 250)
+    futures = submit_rollouts({}, 3, (50, 100), [(FOLD, -1), (CHECK_CALL, -1)], 'random', n_rollouts=600, seed=7)
+    assert [len(chunks) for chunks in futures] == [3, 3]
+    sizes = [call[5] for call in pool.calls]
+    assert sizes == [250, 250, 100] * 2
+    assert all(call[2] == (50, 100) for call in pool.calls)
+    assert [call[3] for call in pool.calls] == [(FOLD, -1)] * 3 + [(CHECK_CALL, -1)] * 3
+    seeds = [call[6] for call in pool.calls]
+    assert len(set(seeds)) == len(seeds)
+    # same seed, same continuations
+    again = RecordingPool()
+    monkeypatch.setattr(rollout, 'get_pool', lambda: again)
+    submit_rollouts({}, 3, (50, 100), [(FOLD, -1), (CHECK_CALL, -1)], 'random', n_rollouts=600, seed=7)
+    assert [call[6] for call in again.calls] == seeds
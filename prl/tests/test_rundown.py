@@ -0,0 +1,19 @@
+from prl.api.rundown import get_rundown_streets
+from prl.api.model.environment_state import Board, Card
+
+NOT_DEALT = Card(name='', suit=-127, rank=-127, index=0)
+
+
+def make_board(n_dealt):
+    return Board(**{f'b{i}': Card(name='2h', suit=0, rank=i, index=i) if i < n_dealt else NOT_DEALT
+                    for i in range(5)})
+
+
+def test_rundown_from_preflop():
+    streets = get_rundown_streets(make_board(0), make_board(5))
+    assert [len(s) for s in streets] == [3, 1, 1]
+
+
+def test_rundown_from_flop():
+    streets = get_rundown_streets(make_board(3), make_board(5))
+    assert [[c.rank for c in s] for s in streets] == [[3], [4]]
@@ -0,0 +1,14 @@
+from prl.api.session import EnvironmentSession
+
+
+def test_stack_sizes_round_trip():
+    session = EnvironmentSession(env=None)
+    stacks = {'p0': 0, 'p1': 140, 'p2': 800, 'p3': 0, 'p4': 0, 'p5': 200}
+    session.set_stack_sizes(stacks)
+    assert list(session.last_stack_sizes) == [0, 140, 800, 0, 0, 200]
+    assert session.stack_sizes() == stacks
+
+
+def test_session_has_no_instance_dict():
+    session = EnvironmentSession(env=None)
+    assert not hasattr(session, '__dict__')
@@ -0,0 +1,63 @@
+import asyncio
+from types import SimpleNamespace
+
+from prl.api import soak as soak_module
+from prl.api.soak import Soak, SoakBudget, check_budgets
+
+
+class FakeClient:
+    def __init__(self):
+        self.tables = {}
+        self.deleted = []
+
+    async def configure_many(self, configs):
+        env_ids = list(range(len(self.tables) + 1, len(self.tables) + len(configs) + 1))
+        self.tables.update({env_id: 0 for env_id in env_ids})
+        return env_ids
+
+    async def reset(self, env_id):
+        self.tables[env_id] = 0
+        return SimpleNamespace(done=False)
+
+    async def step(self, env_id, action):
+        self.tables[env_id] += 1
+        return SimpleNamespace(done=self.tables[env_id] == 3)
+
+    async def delete(self, env_id):
+        self.deleted.append(env_id)
+        return True
+
+
+def test_churn_plays_and_deletes_every_table():
+    soak = Soak(n_tables=4, n_players=2, starting_stack_size=100)
+    client = FakeClient()
+    asyncio.run(soak.churn(client, n_hands=2))
+    assert sorted(client.deleted) == [1, 2, 3, 4]
+    assert len(soak.latencies['step']) == 4 * 2 * 3
+    assert len(soak.latencies['reset']) == 8
+
+
+def test_check_budgets():
+    baseline = {'rss_mb': 100, 'traced_mb': 10, 'object_growth': {},
+                'latency': {'step': {'count': 10, 'p50_ms': 1, 'p99_ms': 2}}}
+    healthy = {'rss_mb': 110, 'traced_mb': 12, 'object_growth': {'dict': 10}, 'top_allocators': [],
+               'latency': {'step': {'count': 10, 'p50_ms': 1, 'p99_ms': 3}}}
+    assert check_budgets(baseline, healthy, SoakBudget()) == []
+    leaking = {'rss_mb': 200, 'traced_mb': 50, 'object_growth': {'ndarray': 20000}, 'top_allocators': [],
+               'latency': {'step': {'count': 10, 'p50_ms': 1, 'p99_ms': 10}}}
+    violations = check_budgets(baseline, leaking, SoakBudget())
+    assert len(violations) == 4
+    assert any('ndarray' in v for v in violations)
+
+
+def test_rss_fallback_units(monkeypatch):
+    def no_proc(*args, **kwargs):
+        raise OSError
+
+    monkeypatch.setattr(soak_module, 'open', no_proc, raising=False)
+    monkeypatch.setattr(soak_module.resource, 'getrusage', lambda who: SimpleNamespace(ru_maxrss=200 * 2 ** 20))
+    monkeypatch.setattr(soak_module.sys, 'platform', 'darwin')
+    assert soak_module.rss_mb() == 200
+    monkeypatch.setattr(soak_module.resource, 'getrusage', lambda who: SimpleNamespace(ru_maxrss=200 * 2 ** 10))
+    monkeypatch.setattr(soak_module.sys, 'platform', 'linux')
+    assert soak_module.rss_mb() == 200
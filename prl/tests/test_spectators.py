@@ -0,0 +1,96 @@
+import asyncio
+
+from prl.api.model.environment_state import EnvironmentState, Card, Board, Table, Players, PlayerInfo, Info
+from prl.api.spectators import SpectatorChannel, redact_hole_cards, HIDDEN_CARDS, KEEPALIVE_FRAME, stream_frames
+
+
+def make_player(pid, folded=False):
+    return PlayerInfo(pid=pid, stack_p=100, curr_bet_p=0,
+                      has_folded_this_episode_p=folded, is_allin_p=False,
+                      side_pot_rank_p_is_0=0, side_pot_rank_p_is_1=0, side_pot_rank_p_is_2=0,
+                      side_pot_rank_p_is_3=0, side_pot_rank_p_is_4=0, side_pot_rank_p_is_5=0,
+                      c0=Card(name='Ah', suit=0, rank=12, index=0),
+                      c1=Card(name='Kd', suit=1, rank=11, index=1))
+
+
+def make_state(done=False):
+    board = Board(**{f'b{i}': Card(name='', suit=-127, rank=-127, index=i) for i in range(5)})
+    table = Table(ante=0, small_blind=1, big_blind=2, min_raise=4, pot_amt=0, total_to_call=2,
+                  round_preflop=1, round_flop=0, round_turn=0, round_river=0,
+                  side_pot_0=0, side_pot_1=0, side_pot_2=0, side_pot_3=0, side_pot_4=0, side_pot_5=0)
+    return EnvironmentState(env_id=1, n_players=3, stack_sizes={'p0': 100, 'p1': 100, 'p2': 100},
+                            table=table, board=board, button_index=0, sb=1, bb=2,
+                            players=Players(p0=make_player(0), p1=make_player(1, folded=True), p2=make_player(2)),
+                            last_action=None, p_acts_next=0, game_over=False, done=done,
+                            info=Info(continue_round=True, draw_next_stage=False, rundown=False,
+                                      deal_next_hand=False, payouts=None))
+
+
+def test_redact_hole_cards():
+    redacted = redact_hole_cards(make_state())
+    for player in [redacted.players.p0, redacted.players.p1, redacted.players.p2]:
+        assert player.c0 == HIDDEN_CARDS[0]
+        assert player.c1 == HIDDEN_CARDS[1]
+
+
+def test_reveal_hole_cards_at_showdown():
+    redacted = redact_hole_cards(make_state(done=True))
+    assert redacted.players.p0.c0.name == 'Ah'
+    assert redacted.players.p1.c0 == HIDDEN_CARDS[0]  # folded
+    assert redacted.players.p2.c1.name == 'Kd'
+
+
+def test_slow_subscriber_is_dropped():
+    async def run():
+        channel = SpectatorChannel(max_queue_size=2)
+        fast, slow = channel.subscribe(), channel.subscribe()
+        state = make_state()
+        for _ in range(2):
+            channel.publish(state)
+            await fast.get()
+        channel.publish(state)
+        assert channel.n_subscribers == 1
+        assert slow.get_nowait() is None
+        assert fast.get_nowait().startswith(b'event: state')
+
+    asyncio.run(run())
+
+
+def test_publish_from_worker_thread():
+    async def run():
+        channel = SpectatorChannel()
+        queue = channel.subscribe()
+        # e.g. a tournament dealing the next hand off the event loop
+        await asyncio.get_running_loop().run_in_executor(None, channel.publish, make_state())
+        frame = await asyncio.wait_for(queue.get(), timeout=1)
+        assert frame.startswith(b'event: state')
+        await asyncio.get_running_loop().run_in_executor(None, channel.close)
+        assert await asyncio.wait_for(queue.get(), timeout=1) is None
+
+    asyncio.run(run())
+
+
+def test_first_subscriber_gets_state_published_while_nobody_watched():
+    async def run():
+        channel = SpectatorChannel()
+        channel.publish(make_state())
+        queue = channel.subscribe(make_state(done=True))
+        frame = queue.get_nowait()
+        assert frame.startswith(b'event: state') and b'"done": true' in frame
+
+    asyncio.run(run())
+
+
+def test_idle_stream_sends_keepalives():
+    async def run():
+        channel = SpectatorChannel()
+        queue = channel.subscribe()
+        frames = stream_frames(channel, queue, keepalive=0.01)
+        assert await frames.__anext__() == KEEPALIVE_FRAME
+        channel.publish(make_state())
+        assert (await frames.__anext__()).startswith(b'event: state')
+        channel.close()
+        assert [frame async for frame in frames] == []
+        assert channel.n_subscribers == 0
+
+    asyncio.run(run())
@@ -0,0 +1,11 @@
+from prl.api.calls.environment.response import etag_matches
+
+
+def test_etag_matches():
+    etag = '"abc-1-3"'
+    assert etag_matches('"abc-1-3"', etag)
+    assert etag_matches('"abc-1-2", "abc-1-3"', etag)
+    assert etag_matches('W/"abc-1-3"', etag)
+    assert etag_matches('*', etag)
+    assert not etag_matches('"abc-1-2"', etag)
+    assert not etag_matches(None, etag)
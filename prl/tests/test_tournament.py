@@ -0,0 +1,128 @@
+from types import SimpleNamespace
+
+import numpy as np
+
+from prl.api.player_stats import PlayerStats
+from prl.api.tournament import Tournament, EMPTY
+
+
+class FakeRegistry:
+    def __init__(self):
+        self.sessions = {}
+        self.removed = []
+
+    def add_environments(self, configs):
+        env_ids = list(range(len(self.sessions) + 1, len(self.sessions) + len(configs) + 1))
+        for env_id in env_ids:
+            self.sessions[env_id] = SimpleNamespace(tournament=None, blinds=None, last_stack_sizes=None,
+                                                     stats=PlayerStats())
+        return env_ids
+
+    def remove_environment(self, env_id):
+        self.removed.append(env_id)
+        del self.sessions[env_id]
+
+
+class RecordingTournament(Tournament):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.dealt = []
+
+    def _deal(self, session, env_id, stacks):
+        self.dealt.append((env_id, stacks, session.blinds))
+
+
+def finish_hand(tournament, env_id, stacks_by_player):
+    """Ends the hand at env_id, players not in stacks_by_player keep their chips."""
+    seats = tournament.in_hand[env_id]
+    tournament.registry.sessions[env_id].last_stack_sizes = [
+        stacks_by_player.get(int(p), int(tournament.chips[p])) if p != EMPTY else 0 for p in seats]
+    tournament.hand_finished(env_id)
+
+
+def sizes(tournament):
+    return sorted(tournament.sizes.values())
+
+
+def test_seating_and_first_deal():
+    now = [0.]
+    tournament = RecordingTournament(1, FakeRegistry(), n_entrants=14, starting_stack_size=1000,
+                                     blind_levels=[(5, 10), (10, 20)], level_seconds=60, seed=0,
+                                     clock=lambda: now[0])
+    tournament.start()
+    assert sizes(tournament) == [4, 5, 5]
+    assert len(tournament.dealt) == 3 and all(blinds == (5, 10) for _, _, blinds in tournament.dealt)
+    assert sorted(p for seats in tournament.seats.values() for p in seats if p != EMPTY) == list(range(14))
+    now[0] = 61
+    assert tournament.blinds() == (10, 20)
+    now[0] = 1000
+    assert tournament.level() == 1
+
+
+def test_busts_balance_and_break_tables():
+    tournament = RecordingTournament(1, FakeRegistry(), n_entrants=14, starting_stack_size=1000, seed=1)
+    tournament.start()
+    four = next(env_id for env_id, size in tournament.sizes.items() if size == 4)
+    # a player busts at the table of four, the tables of five are mid-hand and keep their players
+    busted = int(tournament.seats[four][tournament.seats[four] != EMPTY][0])
+    finish_hand(tournament, four, {busted: 0})
+    assert tournament.eliminated == [busted]
+    assert sizes(tournament) == [3, 5, 5]
+    # a table of five finishes, so one of its players moves to the table of three
+    five = next(env_id for env_id, size in tournament.sizes.items() if size == 5)
+    finish_hand(tournament, five, {})
+    assert sizes(tournament) == [4, 4, 5]
+    assert tournament.dealt[-1][0] == five and five not in tournament.idle
+    # 12 players fit on two tables, so the next table to finish is broken
+    busted = int(tournament.in_hand[four][tournament.in_hand[four] != EMPTY][0])
+    finish_hand(tournament, four, {busted: 0})
+    assert four in tournament.registry.removed and four not in tournament.seats
+    assert sizes(tournament) == [6, 6]
+    assert tournament.n_remaining == 12
+    assert np.all(tournament.player_table[tournament.eliminated] == EMPTY)
+
+
+def test_tournament_finishes_with_one_player():
+    tournament = RecordingTournament(1, FakeRegistry(), n_entrants=2, starting_stack_size=100, seed=2)
+    tournament.start()
+    env_id, = tournament.seats
+    loser, winner = [int(p) for p in tournament.seats[env_id] if p != EMPTY]
+    finish_hand(tournament, env_id, {loser: 0, winner: 200})
+    assert tournament.finished
+    assert tournament.standings() == [winner, loser]
+
+
+class FailingTournament(RecordingTournament):
+    def __init__(self, *args, failing=(), **kwargs):
+        super().__init__(*args, **kwargs)
+        self.failing = set(failing)
+
+    def _deal(self, session, env_id, stacks):
+        if env_id in self.failing:
+            raise RuntimeError('cannot deal')
+        super()._deal(session, env_id, stacks)
+
+
+def test_table_that_fails_to_deal_is_taken_out_of_play():
+    tournament = FailingTournament(1, FakeRegistry(), n_entrants=14, starting_stack_size=1000, seed=1, failing=[2])
+    tournament.start()
+    assert tournament.failed == {2}
+    assert 2 not in tournament.idle and 2 not in tournament.in_hand
+    assert sorted(env_id for env_id, _, _ in tournament.dealt) == [1, 3]
+    players_at_failed = set(int(p) for p in tournament.seats[2] if p != EMPTY)
+    # the other tables play on and are balanced among themselves
+    busted = int(tournament.in_hand[1][tournament.in_hand[1] != EMPTY][0])
+    finish_hand(tournament, 1, {busted: 0})
+    assert set(int(p) for p in tournament.seats[2] if p != EMPTY) == players_at_failed
+    assert tournament.dealt[-1][0] == 1 and 1 in tournament.in_hand
+
+
+def test_tables_forward_stats_to_their_players():
+    tournament = RecordingTournament(1, FakeRegistry(), n_entrants=8, starting_stack_size=1000, seed=0)
+    tournament.start()
+    env_id, seats = next(iter(tournament.seats.items()))
+    stats = tournament.registry.sessions[env_id].stats
+    # what deal_hand does for the dealt seats
+    stats.start_hand([seat for seat, player in enumerate(seats) if player != EMPTY])
+    players = {p['player_id']: p['hands'] for p in tournament.stats.summary(key='player_id')}
+    assert players == {int(player): 1 for player in seats if player != EMPTY}
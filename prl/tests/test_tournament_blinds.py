@@ -0,0 +1,45 @@
+import pytest
+
+pytest.importorskip('prl.environment')
+
+from prl.api.calls.environment.reset import deal_hand
+from prl.api.environment_registry import build_environment, EnvironmentRegistry
+from prl.api.session import EnvironmentSession
+
+
+def posted_blinds(session):
+    env = session.env.env
+    return int(env.seats[env.SB_POS].current_bet), int(env.seats[env.BB_POS].current_bet)
+
+
+def test_blind_levels_change_posted_blinds_of_a_reused_environment():
+    session = EnvironmentSession(build_environment(3, [1000, 1000, 1000]), seed=1)
+    env = session.env
+    session.blinds = (5, 10)
+    deal_hand(session, 1, [1000, 1000, 1000, 0, 0, 0])
+    assert posted_blinds(session) == (5, 10)
+    session.blinds = (25, 50)
+    state = deal_hand(session, 1, [1000, 1000, 1000, 0, 0, 0])
+    assert session.env is env
+    assert posted_blinds(session) == (25, 50)
+    table = state.resolve('table')
+    assert (table.small_blind, table.big_blind) == (25, 50)
+
+
+def test_tournament_deals_its_tables_with_the_current_level():
+    registry = EnvironmentRegistry()
+    tournament_id = registry.add_tournament(n_entrants=8, starting_stack_size=1000,
+                                            blind_levels=[(25, 50)], seed=0)
+    tournament = registry.tournaments[tournament_id]
+    assert not tournament.failed
+    for env_id in tournament.seats:
+        assert posted_blinds(registry.sessions[env_id]) == (25, 50)
+
+
+def test_environment_built_after_elimination_posts_the_current_blinds():
+    session = EnvironmentSession(build_environment(3, [1000, 1000, 1000]), seed=1)
+    session.blinds = (25, 50)
+    deal_hand(session, 1, [1000, 1000, 1000, 0, 0, 0])
+    deal_hand(session, 1, [1500, 0, 1500, 0, 0, 0])
+    assert session.env.env.N_SEATS == 2
+    assert posted_blinds(session) == (25, 50)
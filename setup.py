@@ -12,7 +12,9 @@ setup(
     license='MIT',
     url="https://github.com/hellovertex/prl_api",
     install_requires=requirements,
+    extras_require={'client': ['httpx'], 'compression': ['zstandard']},
     include_package_data=True,
+    package_data={'prl.api': ['data/*.npy', 'data/*.zstd']},
     classifiers=[
         "Programming Language :: Python :: 3",
         "Programming Language :: Python :: 3.6",